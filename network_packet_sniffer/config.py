@@ -2,4 +2,31 @@
 INTERFACE = r'\Device\NPF_{4216ADDE-FA90-420A-AB07-65BEB98F4B23}'  # replace this with your valid interface
 PACKET_COUNT = 10
 # You can change the interface and packet count as needed
-# Example: INTERFACE = 'eth0' for Linux or 'Wi-Fi' for Windows
\ No newline at end of file
+# Example: INTERFACE = 'eth0' for Linux or 'Wi-Fi' for Windows
+
+# Captured packets wait in a ring buffer per worker (analyzer, pcap writer)
+BUFFER_SIZE = 65536          # Packets each buffer can hold
+DROP_POLICY = 'drop-oldest'  # What to do when a buffer is full: 'drop-oldest', 'sample' or 'block'
+SAMPLE_RATE = 10             # 'sample' keeps 1 in SAMPLE_RATE packets once a buffer is half full
+
+# Capture file. Use a .pcapng extension for pcapng; strftime fields name rotated files
+OUTPUT_FILE = 'captured_packets.pcap'  # e.g. 'capture-%Y%m%d-%H%M%S.pcapng'
+ROTATE_SIZE_MB = None        # Start a new file after this many megabytes (None: never)
+ROTATE_INTERVAL = None       # Start a new file after this many seconds (None: never)
+WRITE_BUFFER_SIZE = 1 << 20  # Bytes buffered before writing to disk
+FLUSH_INTERVAL = 1.0         # Also write out the buffer at least this often (seconds)
+APPEND_OUTPUT = False        # Append to an existing OUTPUT_FILE instead of overwriting it
+
+# Capture backend: 'scapy' (any OS) or 'raw' (Linux AF_PACKET, headers decoded on demand)
+CAPTURE_BACKEND = 'scapy'
+RING_BLOCK_SIZE = 1 << 20    # Bytes per TPACKET_V3 ring block (raw backend)
+RING_BLOCK_COUNT = 4         # Ring blocks shared with the kernel (raw backend); 4 MiB in total
+RING_BLOCK_TIMEOUT_MS = 64   # Hand over a partly filled block after this long (raw backend)
+
+# Kernel-side capture filter in tcpdump/BPF syntax, e.g. 'tcp port 443' (None: capture everything)
+BPF_FILTER = None
+
+# Flow export: aggregate packets into flows instead of printing each packet
+FLOW_EXPORT = None           # .jsonl, .csv or .ipfix file (None: print packets)
+FLOW_IDLE_TIMEOUT = 15       # A flow ends after this many seconds without packets
+FLOW_ACTIVE_TIMEOUT = 1800   # Long-lived flows are reported in parts of this many seconds
@@ -1,14 +1,57 @@
+import argparse
 from packet_sniffer.sniffer import start_sniffing
-from packet_sniffer.pcap_writer import save_remaining_packets
-from config import INTERFACE, PACKET_COUNT
+from packet_sniffer.pcap_writer import open_writer, save_remaining_packets
+from packet_sniffer.flows import FlowTable
+from packet_sniffer.flow_export import open_exporter
+from config import (INTERFACE, PACKET_COUNT, BUFFER_SIZE, DROP_POLICY, SAMPLE_RATE, OUTPUT_FILE,
+                    ROTATE_SIZE_MB, ROTATE_INTERVAL, WRITE_BUFFER_SIZE, FLUSH_INTERVAL, APPEND_OUTPUT,
+                    CAPTURE_BACKEND, RING_BLOCK_SIZE, RING_BLOCK_COUNT, RING_BLOCK_TIMEOUT_MS, BPF_FILTER,
+                    FLOW_EXPORT, FLOW_IDLE_TIMEOUT, FLOW_ACTIVE_TIMEOUT)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Network packet sniffer (defaults come from config.py)")
+    parser.add_argument('-i', '--interface', default=INTERFACE, help='Interface to capture on')
+    parser.add_argument('-c', '--count', type=int, default=PACKET_COUNT,
+                        help='Packets to capture, 0 for no limit')
+    parser.add_argument('-f', '--filter', default=BPF_FILTER, metavar='EXPRESSION',
+                        help="BPF capture filter applied in the kernel, e.g. 'tcp port 443'")
+    parser.add_argument('-w', '--write', default=OUTPUT_FILE, metavar='FILE',
+                        help='Capture file (.pcap or .pcapng, strftime fields allowed)')
+    parser.add_argument('--backend', choices=['scapy', 'raw'], default=CAPTURE_BACKEND,
+                        help='Capture backend (raw: Linux AF_PACKET)')
+    parser.add_argument('--no-pcap', action='store_true', help='Do not write a capture file')
+    parser.add_argument('--flows', default=FLOW_EXPORT, metavar='FILE',
+                        help='Export flows to FILE (.jsonl, .csv or .ipfix) instead of printing packets')
+    parser.add_argument('--idle-timeout', type=float, default=FLOW_IDLE_TIMEOUT, metavar='SECONDS',
+                        help='End a flow after SECONDS without packets')
+    parser.add_argument('--active-timeout', type=float, default=FLOW_ACTIVE_TIMEOUT, metavar='SECONDS',
+                        help='Report long-lived flows every SECONDS')
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     print("Starting Packet Sniffer...")
-    print(f"Using interface: {INTERFACE}")
-    print(f"Capturing {PACKET_COUNT} packets...")
-    
+    print(f"Using interface: {args.interface}")
+    print(f"Capturing {args.count} packets...")
+
+    flow_table = None
+    if args.flows:
+        try:
+            flow_table = FlowTable(open_exporter(args.flows), args.idle_timeout, args.active_timeout)
+        except (ValueError, OSError) as e:
+            print(f"Error opening flow export: {e}")
+            raise SystemExit(1)
+        print(f"Exporting flows to: {args.flows}")
+    if not args.no_pcap:
+        open_writer(args.write, buffer_size=WRITE_BUFFER_SIZE, flush_interval=FLUSH_INTERVAL,
+                    rotate_size=ROTATE_SIZE_MB * 1024 * 1024 if ROTATE_SIZE_MB else None,
+                    rotate_interval=ROTATE_INTERVAL, append=APPEND_OUTPUT)
     try:
-        start_sniffing(interface=INTERFACE, packet_count=PACKET_COUNT)
+        start_sniffing(interface=args.interface, packet_count=args.count, buffer_size=BUFFER_SIZE,
+                       drop_policy=DROP_POLICY, sample_rate=SAMPLE_RATE, backend=args.backend,
+                       ring_options={'block_size': RING_BLOCK_SIZE, 'block_count': RING_BLOCK_COUNT,
+                                     'block_timeout_ms': RING_BLOCK_TIMEOUT_MS},
+                       bpf_filter=args.filter, flow_table=flow_table, write_pcap=not args.no_pcap)
     except KeyboardInterrupt:
         print("\nStopping packet capture...")
     finally:
@@ -1,8 +1,28 @@
-from scapy.layers.inet import IP, TCP, UDP
+from .frame import Frame
+
+def analyze_frame(frame):
+    print("\n=== Packet Captured ===")
+
+    if frame.ip_version:
+        print(f"From: {frame.src} -> To: {frame.dst}")
+        print(f"Protocol: {frame.proto}")
+
+        if frame.proto in (6, 17) and frame.sport is not None:
+            print("Protocol: TCP" if frame.proto == 6 else "Protocol: UDP")
+            print(f"Source Port: {frame.sport} -> Destination Port: {frame.dport}")
+    else:
+        print("Non-IP Packet")
 
 def analyze_packet(packet):
+    # Frames from the raw backend decode their headers lazily, without scapy
+    if isinstance(packet, Frame):
+        analyze_frame(packet)
+        return
+
+    from scapy.layers.inet import IP, TCP, UDP
+
     print("\n=== Packet Captured ===")
-    
+
     if IP in packet:
         ip_layer = packet[IP]
         print(f"From: {ip_layer.src} -> To: {ip_layer.dst}")
@@ -12,7 +32,7 @@ def analyze_packet(packet):
             tcp_layer = packet[TCP]
             print("Protocol: TCP")
             print(f"Source Port: {tcp_layer.sport} -> Destination Port: {tcp_layer.dport}")
-        
+
         elif UDP in packet:
             udp_layer = packet[UDP]
             print("Protocol: UDP")
@@ -0,0 +1,90 @@
+import ctypes
+import ctypes.util
+import shutil
+import socket
+import struct
+import subprocess
+
+DLT_EN10MB = 1
+# AF_PACKET link types (<linux/if_arp.h>) whose frames carry an Ethernet header
+ETHERNET_HATYPES = {1: 'ethernet', 772: 'loopback'}
+PCAP_NETMASK_UNKNOWN = 0xFFFFFFFF
+SO_ATTACH_FILTER = 26
+SOCK_FILTER = struct.Struct('HBBI')  # code, jt, jf, k
+SOCK_FPROG = struct.Struct('HP')     # instruction count, pointer to the instructions
+
+
+class BpfInstruction(ctypes.Structure):
+    _fields_ = [('code', ctypes.c_ushort), ('jt', ctypes.c_ubyte), ('jf', ctypes.c_ubyte), ('k', ctypes.c_uint)]
+
+
+class BpfProgram(ctypes.Structure):
+    _fields_ = [('bf_len', ctypes.c_uint), ('bf_insns', ctypes.POINTER(BpfInstruction))]
+
+
+def compile_with_libpcap(expression, linktype, snaplen):
+    path = ctypes.util.find_library('pcap')
+    if path is None:
+        return None
+    pcap = ctypes.CDLL(path)
+    pcap.pcap_open_dead.restype = ctypes.c_void_p
+    pcap.pcap_open_dead.argtypes = [ctypes.c_int, ctypes.c_int]
+    pcap.pcap_compile.argtypes = [ctypes.c_void_p, ctypes.POINTER(BpfProgram), ctypes.c_char_p,
+                                  ctypes.c_int, ctypes.c_uint]
+    pcap.pcap_geterr.restype = ctypes.c_char_p
+    pcap.pcap_geterr.argtypes = [ctypes.c_void_p]
+    pcap.pcap_freecode.argtypes = [ctypes.POINTER(BpfProgram)]
+    pcap.pcap_close.argtypes = [ctypes.c_void_p]
+
+    handle = pcap.pcap_open_dead(linktype, snaplen)
+    program = BpfProgram()
+    try:
+        if pcap.pcap_compile(handle, ctypes.byref(program), expression.encode(), 1, PCAP_NETMASK_UNKNOWN) != 0:
+            raise ValueError(f"Invalid BPF filter '{expression}': {pcap.pcap_geterr(handle).decode()}")
+        instructions = [(insn.code, insn.jt, insn.jf, insn.k) for insn in program.bf_insns[:program.bf_len]]
+        pcap.pcap_freecode(ctypes.byref(program))
+        return instructions
+    finally:
+        pcap.pcap_close(handle)
+
+
+def compile_with_tcpdump(expression, snaplen):
+    tcpdump = shutil.which('tcpdump')
+    if tcpdump is None:
+        return None
+    result = subprocess.run([tcpdump, '-y', 'EN10MB', '-s', str(snaplen), '-ddd', expression],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"Invalid BPF filter '{expression}': {result.stderr.strip()}")
+    # First line: instruction count, then one "code jt jf k" line per instruction
+    lines = result.stdout.split('\n')[1:]
+    return [tuple(int(field) for field in line.split()) for line in lines if line.strip()]
+
+
+def compile_filter(expression, linktype=DLT_EN10MB, snaplen=65535):
+    """Compile a tcpdump-style filter expression into classic BPF instructions.
+
+    Uses libpcap through ctypes, or `tcpdump -ddd` if libpcap is not found.
+    Returns a list of (code, jt, jf, k) tuples; raises ValueError for an
+    invalid expression or if neither compiler is available.
+    """
+    instructions = compile_with_libpcap(expression, linktype, snaplen)
+    if instructions is None:
+        instructions = compile_with_tcpdump(expression, snaplen)
+    if instructions is None:
+        raise ValueError(f"Cannot compile BPF filter '{expression}': libpcap or tcpdump is needed")
+    return instructions
+
+
+def linktype_for(hatype, interface):
+    """libpcap link type to compile a filter for on an AF_PACKET interface of type `hatype`"""
+    if hatype not in ETHERNET_HATYPES:
+        raise ValueError(f"Capture filters need an Ethernet interface; {interface} has link type {hatype}")
+    return DLT_EN10MB
+
+
+def attach_filter(sock, instructions):
+    """Attach compiled BPF instructions to a socket, so the kernel drops non-matching packets"""
+    program = ctypes.create_string_buffer(b''.join(SOCK_FILTER.pack(*insn) for insn in instructions))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER,
+                    SOCK_FPROG.pack(len(instructions), ctypes.addressof(program)))
@@ -0,0 +1,160 @@
+import os
+import struct
+import time
+
+LINKTYPE_ETHERNET = 1
+
+# pcap: global header and per-record header, microsecond timestamps
+PCAP_MAGIC = 0xA1B2C3D4
+PCAP_HEADER = struct.Struct('<IHHiIII')
+PCAP_RECORD = struct.Struct('<IIII')
+
+# pcapng: section header, interface description and enhanced packet blocks
+PCAPNG_SHB = struct.Struct('<IIIHHqI')
+PCAPNG_IDB = struct.Struct('<IIHHII')
+PCAPNG_EPB = struct.Struct('<IIIIIII')
+PCAPNG_SHB_TYPE = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER = 0x1A2B3C4D
+
+
+def capture_format(path):
+    """'pcapng' for .pcapng/.ntar files, 'pcap' otherwise"""
+    return 'pcapng' if os.path.splitext(path)[1].lower() in ('.pcapng', '.ntar') else 'pcap'
+
+
+class CaptureWriter:
+    """Streaming pcap/pcapng writer.
+
+    The output file stays open for the whole capture and records go
+    through a large write buffer, so the disk sees big sequential writes.
+    The buffer is flushed when it fills up, when `flush_interval` seconds
+    have passed since the last flush (checked on each write and by tick()
+    while no packets arrive), and on close. With `rotate_size`
+    (bytes) or `rotate_interval` (seconds) the capture continues in a new
+    file named from the strftime `pattern`, e.g. 'capture-%Y%m%d-%H%M%S.pcap'.
+    """
+
+    def __init__(self, pattern, linktype=None, snaplen=262144, buffer_size=1 << 20,
+                 flush_interval=1.0, rotate_size=None, rotate_interval=None, append=False):
+        self.pattern = pattern
+        self.format = capture_format(pattern)
+        self.linktype = linktype
+        self.snaplen = snaplen
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.rotate_size = rotate_size
+        self.rotate_interval = rotate_interval
+        self.append = append
+        self.file = None
+        self.path = None
+        self.paths = []
+        self.opened_at = 0.0
+        self.flushed_at = 0.0
+        self.file_bytes = 0
+        self.packets = 0
+        self.bytes = 0
+
+    def next_path(self, now):
+        path = time.strftime(self.pattern, time.localtime(now))
+        if path not in self.paths:
+            return path
+        # The pattern gave the same name again: number the files instead
+        base, ext = os.path.splitext(path)
+        number = 1
+        while f"{base}-{number}{ext}" in self.paths:
+            number += 1
+        return f"{base}-{number}{ext}"
+
+    def rotating(self):
+        return bool(self.rotate_size or self.rotate_interval)
+
+    def open(self, now):
+        self.path = self.next_path(now)
+        self.paths.append(self.path)
+        appending = self.append and len(self.paths) == 1 and os.path.exists(self.path) \
+            and os.path.getsize(self.path) > 0
+        if appending and self.format == 'pcap':
+            self.check_pcap_header(self.path)
+        self.file = open(self.path, 'ab' if appending else 'wb', buffering=self.buffer_size)
+        self.opened_at = self.flushed_at = now
+        # An appended file counts towards rotate_size from its current size
+        self.file_bytes = os.path.getsize(self.path) if appending else 0
+        # A pcapng file may hold several sections, so appending just starts a new one
+        if not (appending and self.format == 'pcap'):
+            self.write_header()
+
+    def check_pcap_header(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(PCAP_HEADER.size)
+        if len(header) < PCAP_HEADER.size:
+            raise ValueError(f"Cannot append to {path}: truncated pcap header")
+        magic, _, _, _, _, _, linktype = PCAP_HEADER.unpack(header)
+        if magic != PCAP_MAGIC:
+            raise ValueError(f"Cannot append to {path}: not a little-endian microsecond pcap file")
+        if linktype != self.linktype:
+            raise ValueError(f"Cannot append to {path}: link type {linktype}, capture is {self.linktype}")
+
+    def write_header(self):
+        if self.format == 'pcap':
+            header = PCAP_HEADER.pack(PCAP_MAGIC, 2, 4, 0, 0, self.snaplen, self.linktype)
+        else:
+            header = (PCAPNG_SHB.pack(PCAPNG_SHB_TYPE, PCAPNG_SHB.size, PCAPNG_BYTE_ORDER, 1, 0, -1,
+                                      PCAPNG_SHB.size) +
+                      PCAPNG_IDB.pack(1, PCAPNG_IDB.size, self.linktype, 0, self.snaplen, PCAPNG_IDB.size))
+        self.file.write(header)
+        self.file_bytes += len(header)
+
+    def write(self, data, timestamp=None, orig_len=None):
+        """Append one frame (bytes) captured at `timestamp` (seconds since the epoch)"""
+        now = time.time()
+        if timestamp is None:
+            timestamp = now
+        if self.linktype is None:
+            self.linktype = LINKTYPE_ETHERNET
+        if self.file is None:
+            self.open(now)
+        elif self.rotating() and (
+                (self.rotate_size and self.file_bytes >= self.rotate_size) or
+                (self.rotate_interval and now - self.opened_at >= self.rotate_interval)):
+            self.file.close()
+            self.open(now)
+
+        if orig_len is None:
+            orig_len = len(data)
+        if len(data) > self.snaplen:
+            data = data[:self.snaplen]
+        usec = int(round(timestamp * 1000000))
+        if self.format == 'pcap':
+            record = PCAP_RECORD.pack(usec // 1000000, usec % 1000000, len(data), orig_len)
+            self.file.write(record)
+            self.file.write(data)
+            size = len(record) + len(data)
+        else:
+            padding = -len(data) % 4
+            size = PCAPNG_EPB.size + len(data) + padding + 4
+            self.file.write(PCAPNG_EPB.pack(6, size, 0, usec >> 32, usec & 0xFFFFFFFF, len(data), orig_len))
+            self.file.write(data)
+            self.file.write(b'\0' * padding + struct.pack('<I', size))
+
+        self.file_bytes += size
+        self.bytes += size
+        self.packets += 1
+        self.tick(now)
+
+    def tick(self, now=None):
+        """Flush the buffer if `flush_interval` seconds have passed since the last flush"""
+        if now is None:
+            now = time.time()
+        if self.file is not None and self.flush_interval is not None \
+                and now - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+            self.flushed_at = time.time()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
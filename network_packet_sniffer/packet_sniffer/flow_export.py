@@ -0,0 +1,159 @@
+import csv
+import json
+import os
+import socket
+import struct
+import time
+from .frame import format_tcp_flags
+
+FIELDS = ['first', 'last', 'proto', 'src', 'sport', 'dst', 'dport', 'packets', 'bytes', 'tcp_flags', 'end_reason']
+
+
+def flow_record(flow, reason):
+    return {
+        'first': round(flow.first, 3),
+        'last': round(flow.last, 3),
+        'proto': flow.proto,
+        'src': flow.src,
+        'sport': flow.sport,
+        'dst': flow.dst,
+        'dport': flow.dport,
+        'packets': flow.packets,
+        'bytes': flow.bytes,
+        'tcp_flags': format_tcp_flags(flow.tcp_flags),
+        'end_reason': reason,
+    }
+
+
+class JsonLinesExporter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8', buffering=1 << 16)
+
+    def export(self, flow, reason):
+        self.file.write(json.dumps(flow_record(flow, reason), separators=(',', ':')) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class CsvExporter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8', newline='', buffering=1 << 16)
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+        self.writer.writeheader()
+
+    def export(self, flow, reason):
+        self.writer.writerow(flow_record(flow, reason))
+
+    def close(self):
+        self.file.close()
+
+
+# IPFIX (RFC 7011) messages, stored back to back as in the IPFIX file format (RFC 5655)
+IPFIX_VERSION = 10
+MESSAGE_HEADER = struct.Struct('!HHIII')  # version, length, export time, sequence number, domain id
+SET_HEADER = struct.Struct('!HH')         # set id, length
+TEMPLATE_SET_ID = 2
+MAX_MESSAGE_SIZE = 65535
+
+# Information elements: (id, length)
+FLOW_ELEMENTS = [
+    (7, 2),    # sourceTransportPort
+    (11, 2),   # destinationTransportPort
+    (4, 1),    # protocolIdentifier
+    (6, 2),    # tcpControlBits
+    (2, 8),    # packetDeltaCount
+    (1, 8),    # octetDeltaCount
+    (152, 8),  # flowStartMilliseconds
+    (153, 8),  # flowEndMilliseconds
+    (136, 1),  # flowEndReason
+]
+TEMPLATES = {
+    4: (256, [(8, 4), (12, 4)] + FLOW_ELEMENTS, struct.Struct('!4s4sHHBHQQQQB')),
+    6: (257, [(27, 16), (28, 16)] + FLOW_ELEMENTS, struct.Struct('!16s16sHHBHQQQQB')),
+}
+END_REASONS = {'idle': 1, 'active': 2, 'end': 4}
+
+
+class IpfixExporter:
+    """Writes flows as IPFIX messages, batching up to `batch_size` records per message.
+
+    A message is also sent early when the next record would take it past
+    MAX_MESSAGE_SIZE, the largest length its header can hold.
+    """
+
+    def __init__(self, path, batch_size=500, domain_id=0):
+        self.path = path
+        self.file = open(path, 'wb', buffering=1 << 16)
+        self.batch_size = batch_size
+        self.domain_id = domain_id
+        self.sequence = 0
+        self.pending = {version: [] for version in TEMPLATES}
+        self.count = 0
+        self.templates_sent = False
+        self.size = MESSAGE_HEADER.size + len(self.template_set())
+
+    def export(self, flow, reason):
+        template_id, _, record = TEMPLATES[flow.ip_version]
+        family = socket.AF_INET if flow.ip_version == 4 else socket.AF_INET6
+        data = record.pack(
+            socket.inet_pton(family, flow.src), socket.inet_pton(family, flow.dst), flow.sport, flow.dport,
+            flow.proto, flow.tcp_flags, flow.packets, flow.bytes, int(flow.first * 1000),
+            int(flow.last * 1000), END_REASONS[reason])
+        pending = self.pending[flow.ip_version]
+        if self.size + len(data) + (0 if pending else SET_HEADER.size) > MAX_MESSAGE_SIZE:
+            self.flush()
+        if not pending:
+            self.size += SET_HEADER.size
+        pending.append(data)
+        self.size += len(data)
+        self.count += 1
+        if self.count >= self.batch_size:
+            self.flush()
+
+    def template_set(self):
+        body = b''
+        for template_id, elements, _ in TEMPLATES.values():
+            body += struct.pack('!HH', template_id, len(elements))
+            body += b''.join(struct.pack('!HH', element, length) for element, length in elements)
+        return SET_HEADER.pack(TEMPLATE_SET_ID, SET_HEADER.size + len(body)) + body
+
+    def flush(self):
+        sets = []
+        if not self.templates_sent:
+            sets.append(self.template_set())
+            self.templates_sent = True
+        records = 0
+        for version, pending in self.pending.items():
+            if pending:
+                body = b''.join(pending)
+                sets.append(SET_HEADER.pack(TEMPLATES[version][0], SET_HEADER.size + len(body)) + body)
+                records += len(pending)
+                pending.clear()
+        if not sets:
+            return
+        body = b''.join(sets)
+        self.file.write(MESSAGE_HEADER.pack(IPFIX_VERSION, MESSAGE_HEADER.size + len(body), int(time.time()),
+                                            self.sequence, self.domain_id) + body)
+        # The sequence number counts the data records sent before this message
+        self.sequence += records
+        self.count = 0
+        self.size = MESSAGE_HEADER.size
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+EXPORTERS = {'.jsonl': JsonLinesExporter, '.json': JsonLinesExporter, '.csv': CsvExporter,
+             '.ipfix': IpfixExporter}
+
+
+def open_exporter(path):
+    """Flow exporter for a file, chosen by extension: .jsonl, .csv or .ipfix"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXPORTERS:
+        raise ValueError(f"Unknown flow export format '{ext}' (use .jsonl, .csv or .ipfix)")
+    return EXPORTERS[ext](path)
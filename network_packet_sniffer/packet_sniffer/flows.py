@@ -0,0 +1,170 @@
+import time
+from .frame import Frame
+
+IDLE = 'idle'
+ACTIVE = 'active'
+END = 'end'
+
+
+class Flow:
+    """Counters of one unidirectional flow (protocol, addresses and ports)"""
+
+    __slots__ = ('key', 'ip_version', 'first', 'last', 'packets', 'bytes', 'tcp_flags')
+
+    def __init__(self, key, ip_version, timestamp):
+        self.key = key
+        self.ip_version = ip_version
+        self.first = timestamp
+        self.last = timestamp
+        self.packets = 0
+        self.bytes = 0
+        self.tcp_flags = 0
+
+    @property
+    def proto(self):
+        return self.key[0]
+
+    @property
+    def src(self):
+        return self.key[1]
+
+    @property
+    def sport(self):
+        return self.key[2]
+
+    @property
+    def dst(self):
+        return self.key[3]
+
+    @property
+    def dport(self):
+        return self.key[4]
+
+    def deadline(self, idle_timeout, active_timeout):
+        return min(self.last + idle_timeout, self.first + active_timeout)
+
+
+class TimerWheel:
+    """Hashed timer wheel with `slots` buckets of `tick` seconds.
+
+    Items are filed under the bucket of their deadline and handed back
+    once the wheel turns past it. Deadlines further out than one turn
+    come back early and are filed again, as are items whose deadline
+    moved later in the meantime; scheduling and expiry are O(1) either way.
+    """
+
+    def __init__(self, tick=1.0, slots=4096):
+        self.tick = tick
+        self.buckets = [[] for _ in range(slots)]
+        self.current = None
+
+    def schedule(self, item, deadline):
+        index = int(deadline // self.tick)
+        if self.current is not None and index <= self.current:
+            index = self.current + 1
+        self.buckets[index % len(self.buckets)].append(item)
+
+    def advance(self, now):
+        """Turn the wheel to `now`; returns the items of the buckets passed"""
+        target = int(now // self.tick)
+        if self.current is None:
+            self.current = target
+            return []
+        due = []
+        # After a gap longer than one turn every bucket is due once
+        for index in range(self.current + 1, min(target, self.current + len(self.buckets)) + 1):
+            bucket = index % len(self.buckets)
+            if self.buckets[bucket]:
+                due.extend(self.buckets[bucket])
+                self.buckets[bucket] = []
+        self.current = max(self.current, target)
+        return due
+
+
+def packet_fields(packet):
+    """(flow key, IP version, IP bytes, TCP flags, timestamp) of a packet, or None if it is not IP"""
+    if isinstance(packet, Frame):
+        version = packet.ip_version
+        if not version:
+            return None
+        key = (packet.proto, packet.src, packet.sport or 0, packet.dst, packet.dport or 0)
+        return key, version, packet.ip_length, packet.tcp_flag_bits or 0, packet.time
+
+    from scapy.layers.inet import IP, TCP, UDP
+    from scapy.layers.inet6 import IPv6
+    if IP in packet:
+        ip, version, proto = packet[IP], 4, packet[IP].proto
+    elif IPv6 in packet:
+        ip, version, proto = packet[IPv6], 6, packet[IPv6].nh
+    else:
+        return None
+    sport = dport = flags = 0
+    if TCP in packet:
+        proto, sport, dport, flags = 6, packet[TCP].sport, packet[TCP].dport, int(packet[TCP].flags)
+    elif UDP in packet:
+        proto, sport, dport = 17, packet[UDP].sport, packet[UDP].dport
+    length = ip.len if version == 4 else ip.plen + 40
+    return (proto, ip.src, sport, ip.dst, dport), version, length, flags, float(packet.time)
+
+
+class FlowTable:
+    """Aggregates packets into flows and exports the flows that end.
+
+    A flow ends when no packet has been seen for `idle_timeout` seconds,
+    or `active_timeout` seconds after its first packet (a long-lived
+    connection is then reported in parts). Expiry is driven by a timer
+    wheel that advances with packet timestamps, and with the clock via
+    tick() while no packets arrive.
+    """
+
+    def __init__(self, exporter, idle_timeout=15, active_timeout=1800, tick=1.0):
+        self.exporter = exporter
+        self.idle_timeout = idle_timeout
+        self.active_timeout = active_timeout
+        self.flows = {}
+        self.wheel = TimerWheel(tick)
+        self.exported = 0
+        self.skipped = 0
+
+    def add(self, packet):
+        fields = packet_fields(packet)
+        if fields is None:
+            self.skipped += 1
+            return
+        key, version, length, flags, timestamp = fields
+        self.expire(timestamp)
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = self.flows[key] = Flow(key, version, timestamp)
+            self.wheel.schedule(flow, flow.deadline(self.idle_timeout, self.active_timeout))
+        flow.packets += 1
+        flow.bytes += length
+        flow.tcp_flags |= flags
+        if timestamp > flow.last:
+            flow.last = timestamp
+
+    def expire(self, now):
+        for flow in self.wheel.advance(now):
+            deadline = flow.deadline(self.idle_timeout, self.active_timeout)
+            if deadline > now:
+                self.wheel.schedule(flow, deadline)
+            else:
+                self.export(flow, IDLE if flow.last + self.idle_timeout <= now else ACTIVE)
+
+    def tick(self):
+        self.expire(time.time())
+
+    def export(self, flow, reason):
+        del self.flows[flow.key]
+        self.exporter.export(flow, reason)
+        self.exported += 1
+
+    def close(self):
+        """Export the flows still open and close the exporter"""
+        for flow in list(self.flows.values()):
+            self.export(flow, END)
+        self.exporter.close()
+
+    def report(self):
+        print(f"[flows] exported {self.exported} flows to '{self.exporter.path}', "
+              f"{self.skipped} non-IP packets skipped")
@@ -0,0 +1,173 @@
+import socket
+import struct
+
+ETH_HEADER = struct.Struct('!6s6sH')
+VLAN_TYPES = (0x8100, 0x88A8)
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+IPV6_EXTENSION_HEADERS = (0, 43, 60)  # hop-by-hop, routing, destination options
+IPV6_FRAGMENT = 44
+PROTO_TCP = 6
+PROTO_UDP = 17
+TCP_FLAG_NAMES = 'FSRPAUEC'
+
+
+def format_tcp_flags(bits):
+    return ''.join(name for i, name in enumerate(TCP_FLAG_NAMES) if bits & (1 << i))
+
+
+def format_mac(raw):
+    return ':'.join(f'{byte:02x}' for byte in raw)
+
+
+class Frame:
+    """A captured Ethernet frame that is decoded only as far as it is used.
+
+    `data` is the raw frame (bytes or a memoryview). Header fields are
+    unpacked with struct on first access and cached. A frame that views
+    a capture ring is only valid until the ring slot is handed back to
+    the kernel; detach() copies it so it can be queued. scapy() gives a
+    full scapy dissection when a field is needed that is not decoded here.
+    """
+
+    __slots__ = ('data', 'time', 'wirelen', '_l2', '_l3')
+
+    def __init__(self, data, timestamp, wirelen=None):
+        self.data = data
+        self.time = timestamp
+        self.wirelen = len(data) if wirelen is None else wirelen
+        self._l2 = None
+        self._l3 = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def detach(self):
+        """Copy of the frame that owns its bytes"""
+        return Frame(bytes(self.data), self.time, self.wirelen)
+
+    @property
+    def original(self):
+        return bytes(self.data)
+
+    def scapy(self):
+        """Full scapy dissection of the frame"""
+        from scapy.layers.l2 import Ether
+        return Ether(bytes(self.data))
+
+    # Layer 2: (EtherType, offset of the layer 3 header), VLAN tags skipped
+    def _decode_l2(self):
+        if self._l2 is None:
+            data = self.data
+            if len(data) < ETH_HEADER.size:
+                self._l2 = (None, len(data))
+            else:
+                eth_type = struct.unpack_from('!H', data, 12)[0]
+                offset = ETH_HEADER.size
+                while eth_type in VLAN_TYPES and len(data) >= offset + 4:
+                    eth_type = struct.unpack_from('!H', data, offset + 2)[0]
+                    offset += 4
+                self._l2 = (eth_type, offset)
+        return self._l2
+
+    # Layer 3: (IP version, protocol, offset of the IP header, offset of the layer 4 header)
+    def _decode_l3(self):
+        if self._l3 is None:
+            eth_type, offset = self._decode_l2()
+            data = self.data
+            self._l3 = (None, None, offset, None)
+            if eth_type == ETH_P_IP and len(data) >= offset + 20:
+                version_ihl = data[offset]
+                fragment = struct.unpack_from('!H', data, offset + 6)[0] & 0x1FFF
+                # Only the first fragment carries the transport header
+                l4 = offset + (version_ihl & 0x0F) * 4 if not fragment else None
+                self._l3 = (4, data[offset + 9], offset, l4)
+            elif eth_type == ETH_P_IPV6 and len(data) >= offset + 40:
+                proto = data[offset + 6]
+                l4 = offset + 40
+                while proto in IPV6_EXTENSION_HEADERS and len(data) >= l4 + 8:
+                    proto, size = data[l4], (data[l4 + 1] + 1) * 8
+                    l4 += size
+                if proto == IPV6_FRAGMENT and len(data) >= l4 + 8:
+                    fragment = struct.unpack_from('!H', data, l4 + 2)[0] >> 3
+                    proto = data[l4]
+                    l4 = l4 + 8 if not fragment else None
+                self._l3 = (6, proto, offset, l4)
+        return self._l3
+
+    @property
+    def eth_type(self):
+        return self._decode_l2()[0]
+
+    @property
+    def dst_mac(self):
+        return format_mac(self.data[0:6]) if len(self.data) >= 6 else None
+
+    @property
+    def src_mac(self):
+        return format_mac(self.data[6:12]) if len(self.data) >= 12 else None
+
+    @property
+    def ip_version(self):
+        return self._decode_l3()[0]
+
+    @property
+    def proto(self):
+        return self._decode_l3()[1]
+
+    def _address(self, ipv4_offset, ipv6_offset):
+        version, _, offset, _ = self._decode_l3()
+        if version == 4:
+            return socket.inet_ntop(socket.AF_INET, bytes(self.data[offset + ipv4_offset:offset + ipv4_offset + 4]))
+        if version == 6:
+            return socket.inet_ntop(socket.AF_INET6, bytes(self.data[offset + ipv6_offset:offset + ipv6_offset + 16]))
+        return None
+
+    @property
+    def src(self):
+        return self._address(12, 8)
+
+    @property
+    def dst(self):
+        return self._address(16, 24)
+
+    def _ports(self):
+        _, proto, _, l4 = self._decode_l3()
+        if proto in (PROTO_TCP, PROTO_UDP) and l4 is not None and len(self.data) >= l4 + 4:
+            return struct.unpack_from('!HH', self.data, l4)
+        return None, None
+
+    @property
+    def sport(self):
+        return self._ports()[0]
+
+    @property
+    def dport(self):
+        return self._ports()[1]
+
+    @property
+    def ip_length(self):
+        """Length of the IP packet from its header, without Ethernet padding"""
+        version, _, offset, _ = self._decode_l3()
+        if version == 4:
+            length = struct.unpack_from('!H', self.data, offset + 2)[0]
+        elif version == 6:
+            # A zero payload length marks a jumbogram (or a segmentation offload capture)
+            length = struct.unpack_from('!H', self.data, offset + 4)[0]
+            length = length + 40 if length else 0
+        else:
+            return None
+        return length or self.wirelen - offset
+
+    @property
+    def tcp_flag_bits(self):
+        _, proto, _, l4 = self._decode_l3()
+        if proto != PROTO_TCP or l4 is None or len(self.data) < l4 + 14:
+            return None
+        return self.data[l4 + 13]
+
+    @property
+    def tcp_flags(self):
+        """TCP flags as a string such as 'SA', or None for other packets"""
+        bits = self.tcp_flag_bits
+        return None if bits is None else format_tcp_flags(bits)
@@ -1,26 +1,51 @@
-from scapy.utils import wrpcap
-import os
+from .capture_file import CaptureWriter, LINKTYPE_ETHERNET
 
-captured_packets = []
+writer = None
+
+def open_writer(pattern='captured_packets.pcap', **options):
+    """Start a new capture file; options are passed to CaptureWriter"""
+    global writer
+    if writer is not None:
+        writer.close()
+    writer = CaptureWriter(pattern, **options)
+    return writer
+
+def linktype_of(packet):
+    try:
+        from scapy.config import conf
+        return conf.l2types.layer2num[packet.__class__]
+    except (ImportError, KeyError):
+        return LINKTYPE_ETHERNET
 
 def save_packet(packet):
-    global captured_packets
-    captured_packets.append(packet)
-    if len(captured_packets) >= 10:  # Save after 10 packets
+    global writer
+    if writer is None:
+        open_writer()
+    if writer.linktype is None:
+        writer.linktype = linktype_of(packet)
+    try:
+        # Dissected packets keep the captured bytes; only rebuild crafted ones
+        data = getattr(packet, 'original', None) or bytes(packet)
+        writer.write(data, float(packet.time), getattr(packet, 'wirelen', None))
+    except Exception as e:
+        print(f"Error saving packet to file: {e}")
+
+def flush_packets():
+    """Idle tick of the writer worker: flush buffered packets when they are due"""
+    if writer is not None:
         try:
-            wrpcap('captured_packets.pcap', captured_packets)
-            print("Saved packets to 'captured_packets.pcap'")
-            captured_packets.clear()  # Clear the list after saving
+            writer.tick()
         except Exception as e:
-            print(f"Error saving packets to file: {e}")
+            print(f"Error flushing capture file: {e}")
 
 def save_remaining_packets():
-    """Save any remaining packets at the end of capture"""
-    global captured_packets
-    if captured_packets:
+    """Flush and close the capture file at the end of capture"""
+    global writer
+    if writer is not None:
         try:
-            wrpcap('captured_packets.pcap', captured_packets)
-            print(f"Saved {len(captured_packets)} remaining packets to 'captured_packets.pcap'")
-            captured_packets.clear()
+            writer.close()
+            if writer.packets:
+                files = ", ".join(f"'{path}'" for path in writer.paths)
+                print(f"Saved {writer.packets} packets to {files}")
         except Exception as e:
             print(f"Error saving remaining packets: {e}")
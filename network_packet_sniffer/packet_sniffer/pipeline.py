@@ -0,0 +1,87 @@
+import threading
+from .ring_buffer import RingBuffer, DROP_OLDEST
+
+
+class Consumer:
+    """Worker thread that drains its own ring buffer into a handler.
+
+    An optional `tick` callable runs about once a second while the
+    buffer stays empty.
+    """
+
+    def __init__(self, name, handler, capacity, policy, sample_rate, tick=None):
+        self.name = name
+        self.handler = handler
+        self.tick = tick
+        self.buffer = RingBuffer(capacity, policy, sample_rate)
+        self.errors = 0
+        self.thread = threading.Thread(target=self.run, name=f"sniffer-{name}", daemon=True)
+
+    def run(self):
+        while True:
+            batch = self.buffer.get_batch(timeout=1.0 if self.tick else None)
+            if not batch:
+                if self.buffer.closed:
+                    return
+                if self.tick:
+                    self.tick()
+                continue
+            for packet in batch:
+                try:
+                    self.handler(packet)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error in {self.name} worker: {e}")
+
+
+class CapturePipeline:
+    """Decouples packet capture from packet processing.
+
+    The capture callback only appends each packet to one bounded ring
+    buffer per consumer (analysis, pcap writer, ...). Each consumer
+    drains its buffer on its own thread, so a slow terminal or disk
+    never stalls the capture thread, and one slow consumer does not
+    hold back the others. Packets a full buffer cannot take are counted
+    per consumer instead of being lost silently.
+    """
+
+    def __init__(self, handlers, capacity=65536, policy=DROP_OLDEST, sample_rate=10):
+        # handlers: (name, handler) or (name, handler, tick) tuples
+        self.consumers = [Consumer(name, handler, capacity, policy, sample_rate, *tick)
+                          for name, handler, *tick in handlers]
+        self.buffers = [consumer.buffer for consumer in self.consumers]
+
+    def start(self):
+        for consumer in self.consumers:
+            consumer.thread.start()
+        return self
+
+    def submit(self, packet):
+        """Capture callback: queue a packet for every consumer"""
+        for buffer in self.buffers:
+            buffer.put(packet)
+
+    def close(self):
+        """Stop accepting packets and wait until the consumers have drained their buffers"""
+        for buffer in self.buffers:
+            buffer.close()
+        for consumer in self.consumers:
+            consumer.thread.join()
+
+    def stats(self):
+        stats = {}
+        for consumer in self.consumers:
+            stats[consumer.name] = consumer.buffer.stats()
+            stats[consumer.name]['errors'] = consumer.errors
+        return stats
+
+    def report(self):
+        for name, stats in self.stats().items():
+            line = (f"[{name}] received {stats['received']}, processed {stats['delivered']}, "
+                    f"dropped {stats['dropped']} ({stats['policy']}), "
+                    f"peak queue {stats['high_water']}/{stats['capacity']}")
+            if stats['blocked_seconds']:
+                line += f", capture blocked {stats['blocked_seconds']}s"
+            if stats['errors']:
+                line += f", {stats['errors']} errors"
+            print(line)
@@ -0,0 +1,212 @@
+import mmap
+import select
+import socket
+import struct
+import time
+from .bpf import compile_filter, attach_filter, linktype_for
+from .frame import Frame
+
+# Linux <linux/if_packet.h> and <linux/if_ether.h>
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_STATISTICS = 6
+PACKET_AUXDATA = 8
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+ETH_P_ALL = 0x0003
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+TP_STATUS_VLAN_VALID = 1 << 4
+TP_STATUS_VLAN_TPID_VALID = 1 << 6
+ETH_P_8021Q = 0x8100
+PACKET_OUTGOING = 4
+ARPHRD_LOOPBACK = 772
+
+TPACKET_REQ3 = struct.Struct('IIIIIII')          # block size/count, frame size/count, timeout, priv, features
+BLOCK_HEADER = struct.Struct('IIIII')            # version, offset_to_priv, block_status, num_pkts, offset_to_first_pkt
+# next_offset, sec, nsec, snaplen, len, status, mac/net offsets, rxhash, vlan_tci, vlan_tpid
+PACKET_HEADER = struct.Struct('IIIIIIHHIIH')
+AUXDATA = struct.Struct('IIIHHHH')               # status, len, snaplen, mac, net, vlan_tci, vlan_tpid
+STATS = struct.Struct('II')                      # packets, drops (TPACKET_V3 appends freeze_q_cnt)
+BLOCK_STATUS_OFFSET = 8
+# sockaddr_ll follows the aligned tpacket3_hdr; hatype and pkttype are at offset 8
+LINK_ADDRESS = struct.Struct('HB')
+LINK_ADDRESS_OFFSET = 48 + 8
+
+
+def vlan_status(status, tci, tpid):
+    """(TPID, TCI) of a VLAN tag the kernel took off the frame, or None"""
+    if not status & TP_STATUS_VLAN_VALID:
+        return None
+    return (tpid if status & TP_STATUS_VLAN_TPID_VALID else ETH_P_8021Q), tci
+
+
+def insert_vlan_tag(data, tag):
+    """Frame bytes with the VLAN tag put back after the MAC addresses, as libpcap does"""
+    return b''.join((data[:12], struct.pack('!HH', *tag), data[12:]))
+
+
+class RawSocketCapture:
+    """Linux AF_PACKET capture that hands out undecoded frames.
+
+    With `ring=True` the kernel writes frames into a TPACKET_V3 ring of
+    `block_count` blocks of `block_size` bytes shared through mmap, so a
+    whole block of packets is picked up per wakeup without copying or
+    system calls. The frames yielded by frames() are memoryviews into
+    the ring and are only valid until the next frame is requested; call
+    Frame.detach() to keep one. If the ring cannot be set up, frames are
+    read with one recv() each instead. A `bpf_filter` expression is
+    compiled for the link type of `interface` (which it requires) and
+    attached to the socket, so the kernel drops frames that do not match
+    before they reach the ring. Loopback frames are seen both
+    leaving and arriving; as in libpcap, only the arriving copy is kept.
+    A VLAN tag that the network card stripped is put back into the frame,
+    also as in libpcap; such frames are copies rather than ring views.
+    """
+
+    def __init__(self, interface=None, ring=True, block_size=1 << 20, block_count=4,
+                 frame_size=2048, block_timeout_ms=64, snaplen=65535, bpf_filter=None):
+        if not hasattr(socket, 'AF_PACKET'):
+            raise OSError("The raw capture backend needs Linux (AF_PACKET sockets)")
+        self.interface = interface
+        self.block_size = block_size
+        self.block_count = block_count
+        self.snaplen = snaplen
+        self.ring = None
+        self.view = None
+        self.stopped = False
+        self.kernel_packets = 0
+        self.kernel_drops = 0
+        if bpf_filter and not interface:
+            # Without an interface the socket sees every link type, and one filter cannot fit them all
+            raise ValueError("A capture filter on the raw backend needs an interface (-i)")
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            if interface:
+                self.sock.bind((interface, 0))
+            if bpf_filter:
+                hatype = self.sock.getsockname()[3]
+                attach_filter(self.sock, compile_filter(bpf_filter, linktype_for(hatype, interface), snaplen))
+                self.drain()
+            if ring:
+                try:
+                    self.setup_ring(frame_size, block_timeout_ms)
+                except OSError as e:
+                    print(f"TPACKET_V3 ring unavailable ({e}); reading frames one at a time")
+        except Exception:
+            self.close()
+            raise
+
+    def drain(self):
+        """Discard frames queued before the filter was attached"""
+        while True:
+            try:
+                self.sock.recv(1, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                return
+
+    def setup_ring(self, frame_size, block_timeout_ms):
+        self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+        frame_count = self.block_size * self.block_count // frame_size
+        request = TPACKET_REQ3.pack(self.block_size, self.block_count, frame_size, frame_count,
+                                    block_timeout_ms, 0, 0)
+        self.sock.setsockopt(SOL_PACKET, PACKET_RX_RING, request)
+        self.ring = mmap.mmap(self.sock.fileno(), self.block_size * self.block_count,
+                              mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        self.view = memoryview(self.ring)
+
+    def stop(self):
+        self.stopped = True
+
+    def frames(self):
+        """Yield captured frames until stop() is called"""
+        if self.ring is not None:
+            yield from self._ring_frames()
+        else:
+            yield from self._recv_frames()
+
+    def _wait(self, poller):
+        # Short timeout so stop() takes effect while the link is idle
+        poller.poll(200)
+
+    def _ring_frames(self):
+        ring = self.ring
+        view = self.view
+        poller = select.poll()
+        poller.register(self.sock, select.POLLIN | select.POLLERR)
+        block = 0
+        while not self.stopped:
+            base = block * self.block_size
+            _, _, status, count, first = BLOCK_HEADER.unpack_from(ring, base)
+            if not status & TP_STATUS_USER:
+                self._wait(poller)
+                continue
+            position = base + first
+            try:
+                for _ in range(count):
+                    next_offset, sec, nsec, snaplen, length, status, mac, _, _, tci, tpid = \
+                        PACKET_HEADER.unpack_from(ring, position)
+                    hatype, pkttype = LINK_ADDRESS.unpack_from(ring, position + LINK_ADDRESS_OFFSET)
+                    if not (pkttype == PACKET_OUTGOING and hatype == ARPHRD_LOOPBACK):
+                        start = position + mac
+                        data = view[start:start + snaplen]
+                        tag = vlan_status(status, tci, tpid)
+                        if tag is not None:
+                            data, length = insert_vlan_tag(data, tag), length + 4
+                        yield Frame(data, sec + nsec / 1e9, length)
+                    position += next_offset
+                    if self.stopped:
+                        break
+            finally:
+                # Hand the block back to the kernel
+                struct.pack_into('I', ring, base + BLOCK_STATUS_OFFSET, TP_STATUS_KERNEL)
+            block = (block + 1) % self.block_count
+
+    def _recv_frames(self):
+        buffer = bytearray(self.snaplen)
+        view = memoryview(buffer)
+        # The kernel reports a stripped VLAN tag in the auxiliary data
+        self.sock.setsockopt(SOL_PACKET, PACKET_AUXDATA, 1)
+        aux_size = socket.CMSG_SPACE(AUXDATA.size)
+        self.sock.settimeout(0.2)
+        while not self.stopped:
+            try:
+                # MSG_TRUNC makes recv report the full frame length
+                length, ancillary, _, address = self.sock.recvmsg_into([buffer], aux_size, socket.MSG_TRUNC)
+            except socket.timeout:
+                continue
+            if address[2] == PACKET_OUTGOING and address[3] == ARPHRD_LOOPBACK:
+                continue
+            data = view[:min(length, self.snaplen)]
+            for level, kind, aux in ancillary:
+                if level == SOL_PACKET and kind == PACKET_AUXDATA and len(aux) >= AUXDATA.size:
+                    status, _, _, _, _, tci, tpid = AUXDATA.unpack_from(aux)
+                    tag = vlan_status(status, tci, tpid)
+                    if tag is not None:
+                        data, length = insert_vlan_tag(data, tag), length + 4
+            yield Frame(data, time.time(), length)
+
+    def stats(self):
+        """Packets seen and dropped by the kernel since the socket was opened"""
+        try:
+            packets, drops = STATS.unpack_from(self.sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, 12))
+            # Reading the statistics resets them
+            self.kernel_packets += packets
+            self.kernel_drops += drops
+        except (OSError, struct.error):
+            pass
+        return {'packets': self.kernel_packets, 'drops': self.kernel_drops}
+
+    def close(self):
+        if self.sock.fileno() >= 0:
+            self.stats()
+        if self.view is not None:
+            try:
+                self.view.release()
+                self.ring.close()
+            except BufferError:
+                # A frame still views the ring; the mapping goes with the last reference
+                pass
+            self.view = None
+            self.ring = None
+        self.sock.close()
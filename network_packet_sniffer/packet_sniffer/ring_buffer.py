@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import deque
+
+DROP_OLDEST = 'drop-oldest'
+SAMPLE = 'sample'
+BLOCK = 'block'
+POLICIES = (DROP_OLDEST, SAMPLE, BLOCK)
+
+
+class RingBuffer:
+    """Bounded packet queue between the capture thread and one consumer.
+
+    When the buffer is full, the policy decides what happens:
+      drop-oldest  evict the oldest queued packet to make room
+      sample       once the buffer is half full, keep only 1 in `sample_rate`
+                   new packets, and drop new packets while it is full
+      block        make the producer wait for room (backpressure)
+    """
+
+    def __init__(self, capacity, policy=DROP_OLDEST, sample_rate=10):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy} (choose from {', '.join(POLICIES)})")
+        self.capacity = capacity
+        self.policy = policy
+        self.sample_rate = max(1, sample_rate)
+        self.items = deque()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.closed = False
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.blocked_time = 0.0
+        self._sample_count = 0
+
+    def put(self, item):
+        """Queue an item; returns False if it was dropped"""
+        with self.lock:
+            if self.closed:
+                return False
+            self.received += 1
+            if len(self.items) >= self.capacity:
+                if self.policy == DROP_OLDEST:
+                    self.items.popleft()
+                    self.dropped += 1
+                elif self.policy == SAMPLE:
+                    self.dropped += 1
+                    return False
+                else:
+                    start = time.monotonic()
+                    while len(self.items) >= self.capacity and not self.closed:
+                        self.not_full.wait()
+                    self.blocked_time += time.monotonic() - start
+                    if self.closed:
+                        self.dropped += 1
+                        return False
+            elif self.policy == SAMPLE and len(self.items) * 2 >= self.capacity:
+                self._sample_count += 1
+                if self._sample_count % self.sample_rate:
+                    self.dropped += 1
+                    return False
+            self.items.append(item)
+            if len(self.items) > self.high_water:
+                self.high_water = len(self.items)
+            self.not_empty.notify()
+            return True
+
+    def get_batch(self, max_items=256, timeout=None):
+        """Take up to max_items queued items, waiting for at least one.
+
+        Returns an empty list on timeout or once the buffer is closed and empty.
+        """
+        with self.lock:
+            if not self.items and not self.closed:
+                self.not_empty.wait(timeout)
+            count = min(max_items, len(self.items))
+            batch = [self.items.popleft() for _ in range(count)]
+            self.delivered += count
+            if count:
+                self.not_full.notify_all()
+            return batch
+
+    def close(self):
+        """Stop accepting items; queued items can still be drained"""
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'policy': self.policy,
+                'capacity': self.capacity,
+                'received': self.received,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'queued': len(self.items),
+                'high_water': self.high_water,
+                'blocked_seconds': round(self.blocked_time, 3),
+            }
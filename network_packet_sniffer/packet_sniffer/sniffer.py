@@ -1,24 +1,67 @@
-from scapy.all import sniff
 from .analyzer import analyze_packet
-from .pcap_writer import save_packet
+from .pcap_writer import save_packet, flush_packets
+from .pipeline import CapturePipeline
 
-def packet_callback(packet):
+def sniff_scapy(pipeline, interface, packet_count, bpf_filter=None):
+    from scapy.all import sniff
+    # scapy compiles the filter and attaches it to the capture socket in the kernel
+    if interface is None:
+        print("No interface specified. Sniffing on all interfaces...")
+        sniff(prn=pipeline.submit, count=packet_count, store=False, filter=bpf_filter)
+    else:
+        print(f"Sniffing on interface: {interface} for {packet_count} packets...")
+        sniff(iface=interface, prn=pipeline.submit, count=packet_count, store=False, filter=bpf_filter)
+
+def sniff_raw(pipeline, interface, packet_count, ring_options, bpf_filter=None):
+    from .raw_capture import RawSocketCapture
+    capture = RawSocketCapture(interface, bpf_filter=bpf_filter, **(ring_options or {}))
+    print(f"Sniffing on {interface or 'all interfaces'} with the AF_PACKET backend "
+          f"({'TPACKET_V3 ring' if capture.ring is not None else 'recv'}) for {packet_count or 'unlimited'} packets...")
+    captured = 0
+    frames = capture.frames()
     try:
-        analyze_packet(packet)
-        save_packet(packet)
-    except Exception as e:
-        print(f"Error processing packet: {e}")
+        for frame in frames:
+            # The frame views the capture ring, so queue a copy
+            pipeline.submit(frame.detach())
+            captured += 1
+            if captured == packet_count:
+                break
+    finally:
+        # Let the generator hand its ring block back before the ring is unmapped
+        frames.close()
+        capture.close()
+        stats = capture.stats()
+        print(f"[kernel] received {stats['packets']}, dropped {stats['drops']}")
 
-def start_sniffing(interface=None, packet_count=10):
+def start_sniffing(interface=None, packet_count=10, buffer_size=65536, drop_policy='drop-oldest',
+                   sample_rate=10, backend='scapy', ring_options=None, bpf_filter=None,
+                   flow_table=None, write_pcap=True):
+    # Analysis and saving run on worker threads; the capture callback only queues packets.
+    # With a flow table, packets are aggregated into flows instead of printed one by one.
+    if flow_table is None:
+        handlers = [('analyzer', analyze_packet)]
+    else:
+        handlers = [('flows', flow_table.add, flow_table.tick)]
+    if write_pcap:
+        handlers.append(('writer', save_packet, flush_packets))
+    pipeline = CapturePipeline(handlers, buffer_size, drop_policy, sample_rate).start()
+    if bpf_filter:
+        print(f"Capture filter: {bpf_filter}")
     try:
-        if interface is None:
-            print("No interface specified. Sniffing on all interfaces...")
-            sniff(prn=packet_callback, count=packet_count)
+        if backend == 'raw':
+            sniff_raw(pipeline, interface, packet_count, ring_options, bpf_filter)
         else:
-            print(f"Sniffing on interface: {interface} for {packet_count} packets...")
-            sniff(iface=interface, prn=packet_callback, count=packet_count)
+            sniff_scapy(pipeline, interface, packet_count, bpf_filter)
     except PermissionError:
         print("Error: Permission denied. Run as administrator or with elevated privileges.")
+    except ValueError as e:
+        print(f"Error: {e}")
     except Exception as e:
         print(f"Error starting packet capture: {e}")
         print("Try running the list_interfaces.py script to check available interfaces.")
+    finally:
+        pipeline.close()
+        pipeline.report()
+        if flow_table is not None:
+            flow_table.close()
+            flow_table.report()
@@ -0,0 +1,142 @@
+import ctypes
+import socket
+import subprocess
+import threading
+import unittest
+from unittest import mock
+from packet_sniffer.bpf import (compile_filter, compile_with_tcpdump, linktype_for, attach_filter,
+                                SOCK_FILTER, SOCK_FPROG, SO_ATTACH_FILTER, DLT_EN10MB)
+from packet_sniffer.raw_capture import RawSocketCapture
+
+# tcpdump -ddd output: the instruction count, then one "code jt jf k" line per instruction
+TCPDUMP_OUTPUT = '4\n40 0 0 12\n21 0 1 2048\n6 0 0 262144\n6 0 0 0\n'
+
+
+def udp_dst_port(port):
+    """Hand-built classic BPF for 'udp dst port N' on IPv4 over Ethernet"""
+    return [(0x28, 0, 0, 12),       # ldh [12]
+            (0x15, 0, 6, 0x0800),   # jeq IPv4, else drop
+            (0x30, 0, 0, 23),       # ldb [23]
+            (0x15, 0, 4, 17),       # jeq UDP, else drop
+            (0xb1, 0, 0, 14),       # ldxb 4*([14]&0xf)
+            (0x48, 0, 0, 16),       # ldh [x + 16]
+            (0x15, 0, 1, port),     # jeq port, else drop
+            (0x06, 0, 0, 0x40000),  # ret whole frame
+            (0x06, 0, 0, 0)]        # ret 0
+
+
+def tcpdump_result(returncode=0, stdout='', stderr=''):
+    return subprocess.CompletedProcess([], returncode, stdout, stderr)
+
+
+class TestCompileFilter(unittest.TestCase):
+    def test_tcpdump_output_is_parsed(self):
+        with mock.patch('packet_sniffer.bpf.shutil.which', return_value='/usr/sbin/tcpdump'), \
+                mock.patch('packet_sniffer.bpf.subprocess.run', return_value=tcpdump_result(stdout=TCPDUMP_OUTPUT)) as run:
+            instructions = compile_with_tcpdump('ip', 96)
+        self.assertEqual(instructions, [(40, 0, 0, 12), (21, 0, 1, 2048), (6, 0, 0, 262144), (6, 0, 0, 0)])
+        self.assertEqual(run.call_args[0][0], ['/usr/sbin/tcpdump', '-y', 'EN10MB', '-s', '96', '-ddd', 'ip'])
+
+    def test_tcpdump_missing(self):
+        with mock.patch('packet_sniffer.bpf.shutil.which', return_value=None):
+            self.assertIsNone(compile_with_tcpdump('ip', 96))
+
+    def test_invalid_expression(self):
+        failure = tcpdump_result(1, stderr='tcpdump: syntax error in filter expression\n')
+        with mock.patch('packet_sniffer.bpf.compile_with_libpcap', return_value=None), \
+                mock.patch('packet_sniffer.bpf.shutil.which', return_value='/usr/sbin/tcpdump'), \
+                mock.patch('packet_sniffer.bpf.subprocess.run', return_value=failure):
+            with self.assertRaisesRegex(ValueError, 'syntax error in filter expression'):
+                compile_filter('udp prot 53')
+
+    def test_no_compiler_available(self):
+        with mock.patch('packet_sniffer.bpf.compile_with_libpcap', return_value=None), \
+                mock.patch('packet_sniffer.bpf.shutil.which', return_value=None):
+            with self.assertRaisesRegex(ValueError, 'libpcap or tcpdump is needed'):
+                compile_filter('udp')
+
+    def test_libpcap_is_preferred(self):
+        with mock.patch('packet_sniffer.bpf.compile_with_libpcap', return_value=[(6, 0, 0, 0)]), \
+                mock.patch('packet_sniffer.bpf.compile_with_tcpdump') as tcpdump:
+            self.assertEqual(compile_filter('udp'), [(6, 0, 0, 0)])
+        tcpdump.assert_not_called()
+
+    def test_linktype_for(self):
+        self.assertEqual(linktype_for(1, 'eth0'), DLT_EN10MB)
+        self.assertEqual(linktype_for(772, 'lo'), DLT_EN10MB)
+        # ARPHRD_NONE, e.g. a WireGuard or tun interface
+        with self.assertRaisesRegex(ValueError, 'wg0 has link type 65534'):
+            linktype_for(65534, 'wg0')
+
+
+class TestAttachFilter(unittest.TestCase):
+    def test_sock_fprog_points_at_packed_instructions(self):
+        program = udp_dst_port(5353)
+        attached = []
+
+        def setsockopt(level, option, value):
+            count, address = SOCK_FPROG.unpack(value)
+            # The instruction buffer only lives for the duration of the call
+            attached.append((level, option, count, ctypes.string_at(address, count * SOCK_FILTER.size)))
+
+        sock = mock.Mock()
+        sock.setsockopt.side_effect = setsockopt
+        attach_filter(sock, program)
+        self.assertEqual(attached, [(socket.SOL_SOCKET, SO_ATTACH_FILTER, len(program),
+                                     b''.join(SOCK_FILTER.pack(*insn) for insn in program))])
+
+
+class TestRawCaptureFilter(unittest.TestCase):
+    def test_filter_needs_an_interface(self):
+        if not hasattr(socket, 'AF_PACKET'):
+            self.skipTest('AF_PACKET sockets are Linux only')
+        with mock.patch('packet_sniffer.raw_capture.socket.socket') as sock:
+            with self.assertRaisesRegex(ValueError, r'needs an interface \(-i\)'):
+                RawSocketCapture(bpf_filter='udp')
+        sock.assert_not_called()
+
+    def test_drain_discards_queued_frames(self):
+        capture = RawSocketCapture.__new__(RawSocketCapture)
+        capture.sock = mock.Mock()
+        capture.sock.recv.side_effect = [b'a', b'b', BlockingIOError()]
+        capture.drain()
+        self.assertEqual(capture.sock.recv.call_count, 3)
+        capture.sock.recv.assert_called_with(1, socket.MSG_DONTWAIT)
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_PACKET'), 'AF_PACKET sockets are Linux only')
+class TestKernelFilter(unittest.TestCase):
+    def setUp(self):
+        try:
+            socket.socket(socket.AF_PACKET, socket.SOCK_RAW).close()
+        except PermissionError:
+            self.skipTest('AF_PACKET sockets need root or CAP_NET_RAW')
+        self.receivers = []
+        for _ in range(2):
+            receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            receiver.bind(('127.0.0.1', 0))
+            self.receivers.append(receiver)
+        self.port, self.other_port = (receiver.getsockname()[1] for receiver in self.receivers)
+
+    def tearDown(self):
+        for receiver in self.receivers:
+            receiver.close()
+
+    def test_only_matching_frames_arrive(self):
+        with mock.patch('packet_sniffer.raw_capture.compile_filter', return_value=udp_dst_port(self.port)):
+            capture = RawSocketCapture('lo', ring=False, bpf_filter=f'udp dst port {self.port}')
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                for port in (self.other_port, self.port, self.other_port, self.port):
+                    sender.sendto(b'probe', ('127.0.0.1', port))
+            timer = threading.Timer(0.5, capture.stop)
+            timer.start()
+            ports = [frame.dport for frame in capture.frames()]
+            timer.join()
+        finally:
+            capture.close()
+        self.assertEqual(ports, [self.port, self.port])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from unittest import mock
+from packet_sniffer.capture_file import (CaptureWriter, capture_format, PCAP_HEADER, PCAP_RECORD, PCAP_MAGIC,
+                                         PCAPNG_SHB, PCAPNG_IDB, PCAPNG_EPB, PCAPNG_SHB_TYPE, LINKTYPE_ETHERNET)
+
+
+def read_pcap(path):
+    """(global header fields, [(seconds, microseconds, captured bytes, original length)])"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = PCAP_HEADER.unpack_from(data)
+    records = []
+    offset = PCAP_HEADER.size
+    while offset < len(data):
+        sec, usec, caplen, orig_len = PCAP_RECORD.unpack_from(data, offset)
+        offset += PCAP_RECORD.size
+        records.append((sec, usec, data[offset:offset + caplen], orig_len))
+        offset += caplen
+    return header, records
+
+
+def read_pcapng_blocks(path):
+    """[(block type, block body)], checking that both length fields agree"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    blocks = []
+    offset = 0
+    while offset < len(data):
+        block_type, length = struct.unpack_from('<II', data, offset)
+        assert length % 4 == 0
+        assert struct.unpack_from('<I', data, offset + length - 4)[0] == length
+        blocks.append((block_type, data[offset:offset + length]))
+        offset += length
+    return blocks
+
+
+class TestCaptureWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_format_from_extension(self):
+        self.assertEqual(capture_format('a.pcapng'), 'pcapng')
+        self.assertEqual(capture_format('a.NTAR'), 'pcapng')
+        self.assertEqual(capture_format('a.pcap'), 'pcap')
+        self.assertEqual(capture_format('a.cap'), 'pcap')
+
+    def test_pcap_framing(self):
+        writer = CaptureWriter(self.path('out.pcap'), snaplen=8)
+        writer.write(b'0123456789', 1.25, orig_len=60)
+        writer.write(b'abc', 2.0)
+        writer.close()
+        header, records = read_pcap(self.path('out.pcap'))
+        self.assertEqual(header, (PCAP_MAGIC, 2, 4, 0, 0, 8, LINKTYPE_ETHERNET))
+        # Frames longer than snaplen are cut; the original length is kept
+        self.assertEqual(records, [(1, 250000, b'01234567', 60), (2, 0, b'abc', 3)])
+        self.assertEqual(writer.packets, 2)
+
+    def test_pcapng_framing(self):
+        writer = CaptureWriter(self.path('out.pcapng'))
+        writer.write(b'\x01\x02\x03\x04\x05', 1.5)
+        writer.close()
+        blocks = read_pcapng_blocks(self.path('out.pcapng'))
+        self.assertEqual([block_type for block_type, _ in blocks], [PCAPNG_SHB_TYPE, 1, 6])
+        self.assertEqual(len(blocks[0][1]), PCAPNG_SHB.size)
+        self.assertEqual(PCAPNG_IDB.unpack(blocks[1][1])[2], LINKTYPE_ETHERNET)
+        packet = blocks[2][1]
+        _, length, interface, high, low, caplen, orig_len = PCAPNG_EPB.unpack_from(packet)
+        self.assertEqual((interface, (high << 32) | low, caplen, orig_len), (0, 1500000, 5, 5))
+        # Packet data is padded to 32 bits
+        self.assertEqual(length, PCAPNG_EPB.size + 8 + 4)
+        self.assertEqual(packet[PCAPNG_EPB.size:PCAPNG_EPB.size + 8], b'\x01\x02\x03\x04\x05\0\0\0')
+
+    def test_rotate_by_size(self):
+        writer = CaptureWriter(self.path('out.pcap'), rotate_size=PCAP_HEADER.size + 2 * (PCAP_RECORD.size + 10))
+        for packet in range(5):
+            writer.write(bytes(10), float(packet))
+        writer.close()
+        # The repeated name is numbered
+        self.assertEqual([os.path.basename(path) for path in writer.paths],
+                         ['out.pcap', 'out-1.pcap', 'out-2.pcap'])
+        self.assertEqual([len(read_pcap(path)[1]) for path in writer.paths], [2, 2, 1])
+
+    def test_rotate_by_interval(self):
+        writer = CaptureWriter(self.path('out-%S.pcap'), rotate_interval=10)
+        with mock.patch('packet_sniffer.capture_file.time.time', return_value=1000.0):
+            writer.write(b'a')
+        with mock.patch('packet_sniffer.capture_file.time.time', return_value=1005.0):
+            writer.write(b'b')
+        with mock.patch('packet_sniffer.capture_file.time.time', return_value=1011.0):
+            writer.write(b'c')
+        writer.close()
+        self.assertEqual(len(writer.paths), 2)
+        self.assertEqual([len(read_pcap(path)[1]) for path in writer.paths], [2, 1])
+
+    def test_append_counts_existing_bytes_towards_rotation(self):
+        path = self.path('out.pcap')
+        writer = CaptureWriter(path)
+        writer.write(bytes(100), 1.0)
+        writer.close()
+        existing = os.path.getsize(path)
+        writer = CaptureWriter(path, append=True, rotate_size=existing + 1)
+        writer.write(bytes(10), 2.0)
+        writer.write(bytes(10), 3.0)
+        writer.close()
+        self.assertEqual(len(writer.paths), 2)
+        self.assertEqual([record[2] for record in read_pcap(path)[1]], [bytes(100), bytes(10)])
+
+    def test_append_checks_link_type(self):
+        path = self.path('out.pcap')
+        writer = CaptureWriter(path, linktype=LINKTYPE_ETHERNET)
+        writer.write(b'a', 1.0)
+        writer.close()
+        with self.assertRaises(ValueError):
+            CaptureWriter(path, linktype=101, append=True).write(b'b', 2.0)
+
+    def test_pcapng_append_starts_new_section(self):
+        path = self.path('out.pcapng')
+        for timestamp in (1.0, 2.0):
+            writer = CaptureWriter(path, append=True)
+            writer.write(b'a', timestamp)
+            writer.close()
+        self.assertEqual([block_type for block_type, _ in read_pcapng_blocks(path)],
+                         [PCAPNG_SHB_TYPE, 1, 6, PCAPNG_SHB_TYPE, 1, 6])
+
+    def test_tick_flushes_when_interval_passed(self):
+        writer = CaptureWriter(self.path('out.pcap'), flush_interval=1.0)
+        with mock.patch('packet_sniffer.capture_file.time.time', return_value=1000.0):
+            writer.write(b'a')
+        self.assertEqual(os.path.getsize(writer.path), 0)
+        writer.tick(1000.5)
+        self.assertEqual(os.path.getsize(writer.path), 0)
+        writer.tick(1001.0)
+        self.assertEqual(os.path.getsize(writer.path), PCAP_HEADER.size + PCAP_RECORD.size + 1)
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import csv
+import json
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import unittest
+from packet_sniffer.frame import Frame
+from packet_sniffer.flows import Flow, FlowTable, TimerWheel, IDLE, ACTIVE, END
+from packet_sniffer.flow_export import (open_exporter, JsonLinesExporter, CsvExporter, IpfixExporter,
+                                        MESSAGE_HEADER, SET_HEADER, TEMPLATES, MAX_MESSAGE_SIZE)
+
+
+def udp_frame(timestamp, sport=5000, dport=53, src='10.0.0.1', dst='10.0.0.2', payload=b'abcd'):
+    udp = struct.pack('!HHHH', sport, dport, 8 + len(payload), 0) + payload
+    ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0, 64, 17, 0,
+                     socket.inet_aton(src), socket.inet_aton(dst)) + udp
+    return Frame(bytes(12) + b'\x08\x00' + ip, timestamp)
+
+
+class ListExporter:
+    path = 'memory'
+
+    def __init__(self):
+        self.flows = []
+        self.closed = False
+
+    def export(self, flow, reason):
+        self.flows.append((flow.key, flow.packets, flow.bytes, reason))
+
+    def close(self):
+        self.closed = True
+
+
+class TestTimerWheel(unittest.TestCase):
+    def test_items_come_back_once_their_bucket_passes(self):
+        wheel = TimerWheel(tick=1.0, slots=8)
+        self.assertEqual(wheel.advance(100.0), [])
+        wheel.schedule('a', 102.5)
+        wheel.schedule('b', 104.0)
+        self.assertEqual(wheel.advance(101.9), [])
+        self.assertEqual(wheel.advance(102.0), ['a'])
+        self.assertEqual(wheel.advance(105.0), ['b'])
+
+    def test_past_deadlines_go_to_the_next_bucket(self):
+        wheel = TimerWheel(tick=1.0, slots=8)
+        wheel.advance(100.0)
+        wheel.schedule('late', 90.0)
+        self.assertEqual(wheel.advance(101.0), ['late'])
+
+    def test_deadlines_beyond_one_turn_come_back_early(self):
+        wheel = TimerWheel(tick=1.0, slots=8)
+        wheel.advance(100.0)
+        wheel.schedule('far', 111.0)
+        # Bucket 111 % 8 is passed at 103, before the deadline
+        self.assertEqual(wheel.advance(103.0), ['far'])
+
+    def test_gap_longer_than_one_turn_visits_each_bucket_once(self):
+        wheel = TimerWheel(tick=1.0, slots=8)
+        wheel.advance(100.0)
+        for deadline in range(101, 109):
+            wheel.schedule(deadline, deadline)
+        self.assertEqual(sorted(wheel.advance(1000.0)), list(range(101, 109)))
+        self.assertEqual(wheel.current, 1000)
+
+
+class TestFlowTable(unittest.TestCase):
+    def test_packets_aggregate_into_one_flow(self):
+        exporter = ListExporter()
+        table = FlowTable(exporter, idle_timeout=15)
+        for timestamp in (1.0, 2.0, 3.0):
+            table.add(udp_frame(timestamp))
+        table.add(udp_frame(3.5, sport=5001))
+        self.assertEqual(len(table.flows), 2)
+        flow = table.flows[(17, '10.0.0.1', 5000, '10.0.0.2', 53)]
+        self.assertEqual((flow.packets, flow.bytes, flow.first, flow.last), (3, 3 * 32, 1.0, 3.0))
+
+    def test_idle_expiry(self):
+        exporter = ListExporter()
+        table = FlowTable(exporter, idle_timeout=5, active_timeout=100)
+        table.add(udp_frame(10.0))
+        table.add(udp_frame(12.0))
+        table.add(udp_frame(16.5, sport=6000))
+        self.assertEqual(exporter.flows, [])
+        table.add(udp_frame(18.0, sport=6000))
+        self.assertEqual(exporter.flows, [((17, '10.0.0.1', 5000, '10.0.0.2', 53), 2, 64, IDLE)])
+        self.assertEqual(len(table.flows), 1)
+
+    def test_active_expiry_splits_long_flows(self):
+        exporter = ListExporter()
+        table = FlowTable(exporter, idle_timeout=5, active_timeout=10)
+        for timestamp in range(100, 115):
+            table.add(udp_frame(float(timestamp)))
+        self.assertEqual([(packets, reason) for _, packets, _, reason in exporter.flows], [(10, ACTIVE)])
+        table.close()
+        self.assertEqual([(packets, reason) for _, packets, _, reason in exporter.flows],
+                         [(10, ACTIVE), (5, END)])
+        self.assertTrue(exporter.closed)
+
+    def test_tick_expires_flows_without_packets(self):
+        exporter = ListExporter()
+        table = FlowTable(exporter, idle_timeout=5)
+        table.add(udp_frame(10.0))
+        # tick() advances with the clock, long after the flow went idle
+        table.tick()
+        self.assertEqual([reason for _, _, _, reason in exporter.flows], [IDLE])
+        self.assertEqual(table.flows, {})
+
+    def test_non_ip_packets_are_skipped(self):
+        table = FlowTable(ListExporter())
+        table.add(Frame(bytes(12) + b'\x08\x06' + bytes(28), 1.0))
+        self.assertEqual((table.skipped, table.flows), (1, {}))
+
+
+def sample_flows():
+    v4 = Flow((6, '10.0.0.1', 40000, '10.0.0.2', 443), 4, 1.5)
+    v4.last, v4.packets, v4.bytes, v4.tcp_flags = 2.25, 3, 180, 0x12
+    v6 = Flow((17, '2001:db8::1', 5000, '2001:db8::2', 53), 6, 3.0)
+    v6.packets, v6.bytes = 1, 60
+    return [(v4, IDLE), (v6, END)]
+
+
+class TestFlowExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def export(self, name):
+        exporter = open_exporter(os.path.join(self.directory, name))
+        for flow, reason in sample_flows():
+            exporter.export(flow, reason)
+        exporter.close()
+        return exporter
+
+    def test_exporter_by_extension(self):
+        self.assertIsInstance(self.export('flows.jsonl'), JsonLinesExporter)
+        self.assertIsInstance(self.export('flows.CSV'), CsvExporter)
+        self.assertIsInstance(self.export('flows.ipfix'), IpfixExporter)
+        with self.assertRaises(ValueError):
+            open_exporter(os.path.join(self.directory, 'flows.txt'))
+
+    def test_json_lines(self):
+        exporter = self.export('flows.jsonl')
+        with open(exporter.path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[0], {'first': 1.5, 'last': 2.25, 'proto': 6, 'src': '10.0.0.1', 'sport': 40000,
+                                      'dst': '10.0.0.2', 'dport': 443, 'packets': 3, 'bytes': 180,
+                                      'tcp_flags': 'SA', 'end_reason': 'idle'})
+        self.assertEqual(records[1]['src'], '2001:db8::1')
+
+    def test_csv(self):
+        exporter = self.export('flows.csv')
+        with open(exporter.path, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['end_reason'] for row in rows], ['idle', 'end'])
+        self.assertEqual((rows[0]['dport'], rows[0]['bytes'], rows[0]['tcp_flags']), ('443', '180', 'SA'))
+
+    def read_ipfix(self, path):
+        """[(sequence number, {set id: set body})] of the messages in an IPFIX file"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        messages = []
+        offset = 0
+        while offset < len(data):
+            version, length, _, sequence, _ = MESSAGE_HEADER.unpack_from(data, offset)
+            self.assertEqual(version, 10)
+            self.assertLessEqual(length, MAX_MESSAGE_SIZE)
+            sets = {}
+            position = offset + MESSAGE_HEADER.size
+            while position < offset + length:
+                set_id, set_length = SET_HEADER.unpack_from(data, position)
+                sets[set_id] = data[position + SET_HEADER.size:position + set_length]
+                position += set_length
+            self.assertEqual(position, offset + length)
+            messages.append((sequence, sets))
+            offset += length
+        return messages
+
+    def test_ipfix_records(self):
+        exporter = self.export('flows.ipfix')
+        [(sequence, sets)] = self.read_ipfix(exporter.path)
+        self.assertEqual(sequence, 0)
+        self.assertIn(2, sets)
+        template = sets[2]
+        self.assertEqual(struct.unpack_from('!HH', template), (256, len(TEMPLATES[4][1])))
+        record = TEMPLATES[4][2].unpack(sets[256])
+        self.assertEqual(record, (socket.inet_aton('10.0.0.1'), socket.inet_aton('10.0.0.2'), 40000, 443, 6,
+                                  0x12, 3, 180, 1500, 2250, 1))
+        record = TEMPLATES[6][2].unpack(sets[257])
+        self.assertEqual(record[2:], (5000, 53, 17, 0, 1, 60, 3000, 3000, 4))
+
+    def test_ipfix_batches_and_sequence_numbers(self):
+        exporter = IpfixExporter(os.path.join(self.directory, 'flows.ipfix'), batch_size=2)
+        flow, _ = sample_flows()[0]
+        for _ in range(5):
+            exporter.export(flow, IDLE)
+        exporter.close()
+        messages = self.read_ipfix(exporter.path)
+        self.assertEqual([sequence for sequence, _ in messages], [0, 2, 4])
+        # Templates are sent once, ahead of the first records
+        self.assertEqual([2 in sets for _, sets in messages], [True, False, False])
+
+    def test_ipfix_messages_stay_within_size_limit(self):
+        exporter = IpfixExporter(os.path.join(self.directory, 'flows.ipfix'), batch_size=100000)
+        flows = sample_flows()
+        for _ in range(2000):
+            for flow, reason in flows:
+                exporter.export(flow, reason)
+        exporter.close()
+        messages = self.read_ipfix(exporter.path)
+        self.assertGreater(len(messages), 1)
+        records = sum(len(sets.get(256, b'')) // TEMPLATES[4][2].size +
+                      len(sets.get(257, b'')) // TEMPLATES[6][2].size for _, sets in messages)
+        self.assertEqual(records, 4000)
+
+
+if __name__ == '__main__':
+    unittest.main()
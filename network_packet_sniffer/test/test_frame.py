@@ -0,0 +1,118 @@
+import socket
+import struct
+import unittest
+from packet_sniffer.frame import Frame, format_tcp_flags
+from packet_sniffer.raw_capture import vlan_status, insert_vlan_tag, TP_STATUS_VLAN_VALID, TP_STATUS_VLAN_TPID_VALID
+
+MACS = bytes.fromhex('ffffffffffff' '020000000001')
+
+
+def ethernet(eth_type, payload, vlans=()):
+    tags = b''.join(struct.pack('!HH', tpid, tci) for tpid, tci in vlans)
+    return MACS + tags + struct.pack('!H', eth_type) + payload
+
+
+def ipv4(proto, payload, src='10.0.0.1', dst='10.0.0.2', fragment_offset=0, more_fragments=False):
+    flags = (0x2000 if more_fragments else 0) | fragment_offset
+    return struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(payload), 1, flags, 64, proto, 0,
+                       socket.inet_aton(src), socket.inet_aton(dst)) + payload
+
+
+def ipv6(next_header, payload, src='2001:db8::1', dst='2001:db8::2'):
+    return struct.pack('!IHBB16s16s', 6 << 28, len(payload), next_header, 64,
+                       socket.inet_pton(socket.AF_INET6, src), socket.inet_pton(socket.AF_INET6, dst)) + payload
+
+
+def tcp(sport, dport, flags):
+    return struct.pack('!HHIIBBHHH', sport, dport, 0, 0, 5 << 4, flags, 65535, 0, 0)
+
+
+def udp(sport, dport, payload=b''):
+    return struct.pack('!HHHH', sport, dport, 8 + len(payload), 0) + payload
+
+
+class TestFrame(unittest.TestCase):
+    def test_ipv4_tcp(self):
+        frame = Frame(ethernet(0x0800, ipv4(6, tcp(40000, 443, 0x12))), 1.0)
+        self.assertEqual(frame.dst_mac, 'ff:ff:ff:ff:ff:ff')
+        self.assertEqual(frame.src_mac, '02:00:00:00:00:01')
+        self.assertEqual((frame.ip_version, frame.proto), (4, 6))
+        self.assertEqual((frame.src, frame.sport, frame.dst, frame.dport), ('10.0.0.1', 40000, '10.0.0.2', 443))
+        self.assertEqual(frame.tcp_flags, 'SA')
+
+    def test_ip_length_ignores_ethernet_padding(self):
+        data = ethernet(0x0800, ipv4(6, tcp(1, 2, 0x10)))
+        frame = Frame(data + bytes(60 - len(data)), 1.0)
+        self.assertEqual(len(frame), 60)
+        self.assertEqual(frame.ip_length, 40)
+
+    def test_ip_length_ipv6(self):
+        frame = Frame(ethernet(0x86DD, ipv6(17, udp(53, 53, b'abcd'))), 1.0)
+        self.assertEqual(frame.ip_length, 40 + 12)
+
+    def test_vlan_tags_are_skipped(self):
+        payload = ipv4(17, udp(5000, 53))
+        for vlans in ([(0x8100, 10)], [(0x88A8, 100), (0x8100, 10)]):
+            frame = Frame(ethernet(0x0800, payload, vlans), 1.0)
+            self.assertEqual(frame.eth_type, 0x0800)
+            self.assertEqual((frame.proto, frame.dport, frame.ip_length), (17, 53, len(payload)))
+
+    def test_ipv6_extension_headers(self):
+        hop_by_hop = struct.pack('!BB6x', 60, 0)
+        destination = struct.pack('!BB14x', 6, 1)
+        frame = Frame(ethernet(0x86DD, ipv6(0, hop_by_hop + destination + tcp(1234, 80, 0x02))), 1.0)
+        self.assertEqual((frame.ip_version, frame.proto), (6, 6))
+        self.assertEqual((frame.src, frame.dst), ('2001:db8::1', '2001:db8::2'))
+        self.assertEqual((frame.sport, frame.dport, frame.tcp_flags), (1234, 80, 'S'))
+
+    def test_ipv4_fragments(self):
+        first = Frame(ethernet(0x0800, ipv4(17, udp(5000, 53), more_fragments=True)), 1.0)
+        self.assertEqual((first.sport, first.dport), (5000, 53))
+        later = Frame(ethernet(0x0800, ipv4(17, b'\0' * 8, fragment_offset=1)), 1.0)
+        # Only the first fragment carries the transport header
+        self.assertEqual((later.proto, later.sport, later.dport), (17, None, None))
+
+    def test_ipv6_fragments(self):
+        first = struct.pack('!BBHI', 17, 0, 0x0001, 7) + udp(5000, 53)
+        frame = Frame(ethernet(0x86DD, ipv6(44, first)), 1.0)
+        self.assertEqual((frame.proto, frame.sport, frame.dport), (17, 5000, 53))
+        later = struct.pack('!BBHI', 17, 0, 1 << 3, 7) + b'\0' * 8
+        frame = Frame(ethernet(0x86DD, ipv6(44, later)), 1.0)
+        self.assertEqual((frame.proto, frame.sport, frame.dport), (17, None, None))
+
+    def test_non_ip_and_truncated_frames(self):
+        arp = Frame(ethernet(0x0806, bytes(28)), 1.0)
+        self.assertEqual((arp.eth_type, arp.ip_version, arp.ip_length, arp.src), (0x0806, None, None, None))
+        short = Frame(MACS, 1.0)
+        self.assertEqual((short.eth_type, short.ip_version, short.sport), (None, None, None))
+        cut = Frame(ethernet(0x0800, ipv4(6, tcp(1, 2, 0x02)))[:14 + 22], 1.0)
+        self.assertEqual((cut.proto, cut.sport, cut.tcp_flags), (6, None, None))
+
+    def test_detach_copies_ring_view(self):
+        buffer = bytearray(ethernet(0x0800, ipv4(17, udp(1, 2))))
+        frame = Frame(memoryview(buffer), 1.0, wirelen=100)
+        copy = frame.detach()
+        buffer[:] = bytes(len(buffer))
+        self.assertEqual((copy.dport, copy.wirelen, copy.time), (2, 100, 1.0))
+
+    def test_format_tcp_flags(self):
+        self.assertEqual(format_tcp_flags(0x02 | 0x10 | 0x01), 'FSA')
+        self.assertEqual(format_tcp_flags(0), '')
+
+
+class TestVlanReinsertion(unittest.TestCase):
+    def test_tag_is_put_back_after_the_mac_addresses(self):
+        stripped = ethernet(0x0800, ipv4(17, udp(1, 2)))
+        tag = vlan_status(TP_STATUS_VLAN_VALID, 42, 0)
+        self.assertEqual(tag, (0x8100, 42))
+        frame = Frame(insert_vlan_tag(memoryview(stripped), tag), 1.0)
+        self.assertEqual(bytes(frame.data), ethernet(0x0800, ipv4(17, udp(1, 2)), [(0x8100, 42)]))
+        self.assertEqual((frame.eth_type, frame.dport), (0x0800, 2))
+
+    def test_tpid_only_when_valid(self):
+        self.assertIsNone(vlan_status(0, 42, 0x88A8))
+        self.assertEqual(vlan_status(TP_STATUS_VLAN_VALID | TP_STATUS_VLAN_TPID_VALID, 42, 0x88A8), (0x88A8, 42))
+
+
+if __name__ == '__main__':
+    unittest.main()
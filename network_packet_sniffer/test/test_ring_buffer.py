@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+from packet_sniffer.ring_buffer import RingBuffer, DROP_OLDEST, SAMPLE, BLOCK
+from packet_sniffer.pipeline import CapturePipeline
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_rejects_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+        with self.assertRaises(ValueError):
+            RingBuffer(4, policy='drop-newest')
+
+    def test_drop_oldest_evicts_queued_packets(self):
+        buffer = RingBuffer(3, DROP_OLDEST)
+        for packet in range(5):
+            self.assertTrue(buffer.put(packet))
+        self.assertEqual(buffer.get_batch(), [2, 3, 4])
+        stats = buffer.stats()
+        self.assertEqual((stats['received'], stats['delivered'], stats['dropped']), (5, 3, 2))
+        self.assertEqual(stats['high_water'], 3)
+
+    def test_sample_keeps_one_in_rate_once_half_full(self):
+        buffer = RingBuffer(8, SAMPLE, sample_rate=2)
+        kept = [packet for packet in range(8) if buffer.put(packet)]
+        # 0-3 fill half the buffer, then every second packet is kept
+        self.assertEqual(kept, [0, 1, 2, 3, 5, 7])
+        self.assertEqual(buffer.stats()['dropped'], 2)
+
+    def test_sample_drops_new_packets_while_full(self):
+        buffer = RingBuffer(2, SAMPLE, sample_rate=1)
+        self.assertEqual([buffer.put(packet) for packet in range(4)], [True, True, False, False])
+        self.assertEqual(buffer.get_batch(), [0, 1])
+        self.assertEqual(buffer.stats()['dropped'], 2)
+
+    def test_block_waits_for_room(self):
+        buffer = RingBuffer(1, BLOCK)
+        buffer.put('first')
+        producer = threading.Thread(target=buffer.put, args=('second',))
+        producer.start()
+        time.sleep(0.05)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(buffer.get_batch(), ['first'])
+        producer.join(1)
+        self.assertEqual(buffer.get_batch(), ['second'])
+        stats = buffer.stats()
+        self.assertEqual(stats['dropped'], 0)
+        self.assertGreater(stats['blocked_seconds'], 0)
+
+    def test_close_releases_blocked_producer(self):
+        buffer = RingBuffer(1, BLOCK)
+        buffer.put('first')
+        results = []
+        producer = threading.Thread(target=lambda: results.append(buffer.put('second')))
+        producer.start()
+        time.sleep(0.05)
+        buffer.close()
+        producer.join(1)
+        self.assertEqual(results, [False])
+        self.assertFalse(buffer.put('late'))
+        # Queued packets can still be drained after close
+        self.assertEqual(buffer.get_batch(), ['first'])
+        self.assertEqual(buffer.get_batch(), [])
+        self.assertEqual(buffer.stats()['dropped'], 1)
+
+    def test_get_batch_times_out_when_empty(self):
+        self.assertEqual(RingBuffer(4).get_batch(timeout=0.01), [])
+
+
+class TestCapturePipeline(unittest.TestCase):
+    def test_every_consumer_sees_every_packet(self):
+        seen = {'a': [], 'b': []}
+        pipeline = CapturePipeline([('a', seen['a'].append), ('b', seen['b'].append)], capacity=16).start()
+        for packet in range(10):
+            pipeline.submit(packet)
+        pipeline.close()
+        self.assertEqual(seen, {'a': list(range(10)), 'b': list(range(10))})
+        self.assertEqual(pipeline.stats()['a']['delivered'], 10)
+
+    def test_handler_errors_are_counted(self):
+        def handler(packet):
+            if packet % 2:
+                raise RuntimeError('bad packet')
+        pipeline = CapturePipeline([('flaky', handler)]).start()
+        for packet in range(4):
+            pipeline.submit(packet)
+        pipeline.close()
+        self.assertEqual(pipeline.stats()['flaky']['errors'], 2)
+
+    def test_tick_runs_while_idle(self):
+        ticked = threading.Event()
+        pipeline = CapturePipeline([('idle', lambda packet: None, ticked.set)]).start()
+        self.assertTrue(ticked.wait(3))
+        pipeline.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Port Scanner Benchmark
+
+Starts a fleet of local listeners on 127.0.0.0/8 (accepting, refusing and
+black-holed ports), runs the scan engines against it and reports ports/sec,
+p50/p99 probe latency and accuracy.
+"""
+
+import sys
+import os
+import argparse
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scanner.benchmark import ENGINES, run_benchmark, save_report, load_report, format_report
+from config import DEFAULT_THREAD_COUNT, DEFAULT_CONCURRENCY
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the scan engines against local listeners",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 benchmark.py                                # All engines, default fleet
+  python3 benchmark.py --engines async sweep -o new.json
+  python3 benchmark.py --baseline old.json            # Compare throughput with an earlier run
+        """
+    )
+
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES,
+                        help='Engines to run (default: all)')
+    parser.add_argument('--hosts', type=int, default=4,
+                        help='Loopback addresses in the fleet (default: 4)')
+    parser.add_argument('-s', '--start-port', type=int, default=20000,
+                        help='First fleet port (default: 20000)')
+    parser.add_argument('-e', '--end-port', type=int, default=20999,
+                        help='Last fleet port (default: 20999)')
+    parser.add_argument('--open-ratio', type=float, default=0.1,
+                        help='Share of ports that accept (default: 0.1)')
+    parser.add_argument('--blackhole-ratio', type=float, default=0.05,
+                        help='Share of ports that drop SYNs (default: 0.05)')
+    parser.add_argument('--timeout', type=float, default=0.5,
+                        help='Connect timeout for every engine (default: 0.5)')
+    parser.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Connects in flight for the async engines (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREAD_COUNT,
+                        help=f'Threads for the threaded engine (default: {DEFAULT_THREAD_COUNT})')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Processes for the multiprocess engine (default: one per CPU core)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for the fleet layout (default: 0)')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='Save the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='Earlier JSON results to compare against')
+
+    args = parser.parse_args()
+
+    if not 1 <= args.start_port <= args.end_port <= 65535:
+        parser.error("invalid port range")
+
+    baseline = load_report(args.baseline) if args.baseline else None
+
+    print(f"Benchmarking {', '.join(args.engines)} against {args.hosts} loopback hosts, "
+          f"ports {args.start_port}-{args.end_port}...")
+    report = run_benchmark(args.engines, args.hosts, range(args.start_port, args.end_port + 1),
+                           args.open_ratio, args.blackhole_ratio, seed=args.seed,
+                           timeout=args.timeout, concurrency=args.concurrency,
+                           threads=args.threads, workers=args.workers)
+    print(format_report(report, baseline))
+
+    if args.output:
+        save_report(report, args.output)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
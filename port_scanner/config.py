@@ -7,9 +7,88 @@ DEFAULT_END_PORT = 1024
 # Threading configuration
 DEFAULT_THREAD_COUNT = 100
 
+# Async engine configuration (maximum connects in flight)
+DEFAULT_CONCURRENCY = 1000
+
+# Worker processes for --workers (0 = one per CPU core)
+DEFAULT_WORKERS = 1
+
+# Connects in flight for quick scans (all selected ports at once, up to this cap)
+QUICK_SCAN_CONCURRENCY = 1000
+
+# Number of ports scanned by --top-ports when given without a value
+DEFAULT_TOP_PORTS = 100
+
+# Version detection (banner grabbing on open ports)
+VERSION_PROBE_TIMEOUT = 3        # Connect and read timeout per probe (seconds)
+VERSION_CONCURRENCY = 100        # Open ports probed at once
+VERSION_CACHE_TTL = 24 * 3600    # Seconds a cached result is reused
+
+# Scan engine used by the command line ("async" or "thread")
+DEFAULT_ENGINE = "async"
+
+# UDP scanning (-sU)
+UDP_CONCURRENCY = 256        # UDP probes in flight
+UDP_SOCKET_POOL = 8          # Sockets per address family shared by all probes
+UDP_MAX_RETRIES = 2          # Retransmissions for unanswered probes to answering hosts
+UDP_MIN_TIMEOUT = 0.2        # Lower bound for the adaptive UDP reply timeout
+UDP_MAX_HOST_RATE = 1000     # Probes per second to one host
+UDP_MIN_HOST_RATE = 20       # Floor when a host rate-limits its ICMP errors
+
+# Resource governor: file descriptors and ephemeral ports
+RAISE_FD_LIMIT = True        # Raise the soft RLIMIT_NOFILE up to the hard limit
+FD_RESERVE = 64              # Descriptors kept free for files, pipes and the event loop
+MIN_SOCKET_BUDGET = 16       # Sockets in flight never drop below this
+RESOURCE_BACKOFF_MIN = 0.01  # First pause after EMFILE/EADDRNOTAVAIL (seconds)
+RESOURCE_BACKOFF_MAX = 1.0   # Longest pause between retries (seconds)
+RESOURCE_RETRIES = 30        # Attempts before a probe gives up with an error
+
+# Hostname resolution for target lists
+RESOLVE_CONCURRENCY = 64     # getaddrinfo calls in flight
+RESOLVE_TTL = 300            # Seconds a resolved name is reused (getaddrinfo reports no TTL)
+RESOLVE_NEGATIVE_TTL = 60    # Seconds a failed lookup is remembered
+
+# Host discovery before sweeps (skipped with -Pn/--no-discovery)
+DISCOVERY_PORTS = [80, 443, 22, 445, 3389]  # TCP ports probed; open or refused means alive
+DISCOVERY_TIMEOUT = 1        # Seconds to wait for any sign of life
+DISCOVERY_CONCURRENCY = 500  # Hosts probed at once
+DISCOVERY_ICMP = True        # Also send ICMP echo where unprivileged ICMP sockets work
+
+# Streaming output files (--jsonl, --csv, -oX)
+OUTPUT_BUFFER_BYTES = 65536  # Write buffer per output file
+OUTPUT_FLUSH_INTERVAL = 1.0  # Longest time a finding stays buffered (seconds)
+
+# Continuous monitoring (--monitor)
+MONITOR_RATE = 1000               # Probes per second
+MONITOR_INTERVAL = 60             # Seconds per cycle; each cycle spends rate * interval probes
+MONITOR_COLD_SHARE = 0.2          # Share of each cycle kept for the rotation through all ports
+MONITOR_VOLATILITY_DECAY = 0.8    # Score kept per unchanged rescan of a port that once changed
+MONITOR_VOLATILE_THRESHOLD = 0.1  # Score above which a changed port is rescanned every cycle
+
+# Probe-rate ceilings (--max-rate, --host-rate); None means unlimited
+MAX_RATE = None             # Probes per second across all targets
+MAX_HOST_RATE = None        # Probes per second to one target
+RATE_BURST_SECONDS = 0.05   # Default burst size, in seconds' worth of probes
+
+# Scan metrics (--metrics-port, --metrics-log)
+METRICS_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+METRICS_BIND_ADDRESS = '127.0.0.1'  # Address the Prometheus endpoint listens on
+METRICS_LOG_INTERVAL = 10           # Seconds between metrics log lines
+
+# Seconds between periodic checkpoint saves (--checkpoint)
+CHECKPOINT_INTERVAL = 30
+
 # Timeout settings (in seconds)
 SOCKET_TIMEOUT = 1
 
+# Adaptive timing: per-host RTT-based timeouts and in-flight windows
+ADAPTIVE_TIMING = True
+MIN_RTT_TIMEOUT = 0.05       # Lower bound for the adaptive timeout
+MAX_RTT_TIMEOUT = 3          # Upper bound for the adaptive timeout
+MAX_RETRIES = 1              # Retransmissions for timed-out probes to answering hosts
+MIN_HOST_WINDOW = 4          # Smallest per-host in-flight window
+TIMEOUT_SPIKE_THRESHOLD = 0.25  # Recent minus long-run timeout rate that shrinks the window
+
 # Common service ports mapping
 COMMON_SERVICES = {
     21: "FTP",
@@ -14,13 +14,42 @@ import signal
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from scanner import PortScanner, quick_scan, validate_ip, validate_port_range
+from scanner import PortScanner, AsyncPortScanner, MultiSink, quick_scan, validate_ip, validate_port_range
 from scanner.utils import get_user_input, resolve_hostname
-from config import DEFAULT_START_PORT, DEFAULT_END_PORT, DEFAULT_THREAD_COUNT
+from scanner.sweep import (SweepScanner, ResolvingSweepScanner, parse_targets, read_target_list,
+                           split_targets, merge_networks)
+from scanner.resolver import Resolver, DnsCache, default_resolver
+from scanner.port_frequency import top_ports
+from scanner.version_detection import detect_services, format_service_matches
+from scanner.checkpoint import Checkpoint
+from scanner.discovery import discover_hosts
+from scanner.multiprocess import MultiProcessScanner, worker_count
+from scanner.result_store import ResultStore, StoreSink, format_changes
+from scanner.writers import open_writers
+from scanner.monitor import Monitor, MonitorState, ConsoleMonitorSink, ChangeLog
+from scanner.work import PortSpace, PortRange, ranges_from_ports
+from scanner.metrics import MetricsServer, MetricsReporter
+from scanner.rate_limit import RateLimiter
+from config import (DEFAULT_START_PORT, DEFAULT_END_PORT, DEFAULT_THREAD_COUNT,
+                    DEFAULT_CONCURRENCY, DEFAULT_ENGINE, SOCKET_TIMEOUT, DEFAULT_TOP_PORTS,
+                    UDP_CONCURRENCY, DEFAULT_WORKERS, MONITOR_RATE, MONITOR_INTERVAL,
+                    METRICS_BIND_ADDRESS, METRICS_LOG_INTERVAL, MAX_RATE, MAX_HOST_RATE)
+
+
+# Scanner currently running, stopped gracefully on the first Ctrl+C
+active_scanner = None
 
 
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
+    global active_scanner
+    if active_scanner is not None:
+        # Let in-flight probes finish so the checkpoint is consistent
+        print("\n\nStopping scan (press Ctrl+C again to exit immediately)...")
+        active_scanner.stop()
+        active_scanner = None
+        return
+
     print("\n\nScan interrupted by user. Exiting...")
     sys.exit(0)
 
@@ -74,8 +103,345 @@ def interactive_mode():
         print(f"\n❌ Error during scan: {e}")
 
 
+def run_version_detection(args, open_targets):
+    """Run the optional version-detection stage on open (host, port) pairs"""
+    if not args.service_version or not open_targets:
+        return
+    if args.udp:
+        print("\nℹ️  Version detection probes TCP services; skipped for the UDP scan")
+        return
+
+    print(f"\n🔎 Detecting service versions on {len(open_targets)} open ports...")
+    matches = detect_services(open_targets, cache_path=args.version_cache, rate_limiter=args.limiter)
+    print(format_service_matches(matches))
+
+
+def attach_checkpoint(args, scanner):
+    """Create or resume the scanner's checkpoint when --checkpoint is given"""
+    if not args.checkpoint:
+        return
+
+    if args.resume:
+        try:
+            checkpoint = Checkpoint.load(args.checkpoint, scanner.job())
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if checkpoint.complete:
+            print(f"ℹ️  Checkpoint {args.checkpoint} is for a finished scan; showing its results")
+        elif checkpoint.done:
+            print(f"↩️  Resuming: {len(checkpoint.done)}/{scanner.total_ports} probes already done")
+    else:
+        checkpoint = Checkpoint(args.checkpoint, scanner.job())
+
+    scanner.checkpoint = checkpoint
+
+
+def rate_limiter(args):
+    """Build the probe-rate limiter asked for on the command line, if any"""
+    if not (args.max_rate or args.host_rate):
+        return None
+    return RateLimiter(args.max_rate, args.max_rate_burst, args.host_rate, args.host_burst)
+
+
+def attach_rate_limit(args, scanner):
+    """Cap the probe rate; must run before with_workers so the limits are split across processes"""
+    scanner.rate_limiter = args.limiter
+
+
+def with_workers(args, scanner):
+    """Split the scan across worker processes when --workers asks for more than one"""
+    if worker_count(args.workers) <= 1:
+        return scanner
+    if args.checkpoint:
+        print("❌ --checkpoint is not supported with --workers")
+        sys.exit(1)
+    return MultiProcessScanner(scanner, args.workers)
+
+
+def attach_store(args, scanner, scope=None):
+    """Record findings in a bitmap result store when saving or comparing results"""
+    if not (args.save_results or args.compare):
+        return None
+
+    store_sink = StoreSink(scope=scope)
+    scanner.sink = MultiSink(scanner.sink, store_sink)
+    return store_sink
+
+
+def output_writers(args):
+    """Open the streaming output files requested on the command line"""
+    try:
+        return open_writers({'jsonl': args.jsonl, 'csv': args.csv, 'xml': args.xml})
+    except OSError as e:
+        print(f"❌ Cannot open output file: {e}")
+        sys.exit(1)
+
+
+def attach_writers(args, scanner):
+    """Stream findings to JSON Lines, CSV or XML files as they are found"""
+    writers = output_writers(args)
+    if writers is not None:
+        scanner.sink = MultiSink(scanner.sink, writers)
+
+
+def report_store(args, store_sink):
+    """Compare the scan with an earlier one and save its results, as requested"""
+    if store_sink is None or store_sink.store is None:
+        return
+
+    if args.compare:
+        try:
+            previous = ResultStore.load(args.compare)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot compare results: {e}")
+        else:
+            print(format_changes(previous.diff(store_sink.store)))
+
+    if args.save_results:
+        store_sink.store.save(args.save_results)
+        print(f"💾 Results saved to {args.save_results}")
+
+
+def start_metrics(args, metrics):
+    """Serve or log scan metrics when --metrics-port or --metrics-log is given"""
+    services = []
+    if args.metrics_port is not None:
+        try:
+            server = MetricsServer(metrics, args.metrics_port)
+        except OSError as e:
+            print(f"❌ Cannot serve metrics: {e}")
+            sys.exit(1)
+        server.start()
+        print(f"📈 Metrics at http://{METRICS_BIND_ADDRESS}:{server.port}/metrics")
+        services.append(server)
+    if args.metrics_log:
+        reporter = MetricsReporter(metrics, args.metrics_log)
+        reporter.start()
+        services.append(reporter)
+    return services
+
+
+def stop_metrics(services):
+    """Stop the metrics endpoint and log started by start_metrics()"""
+    for service in services:
+        service.stop()
+
+
+def run_scan(scanner, args):
+    """Run a scanner so that the first Ctrl+C stops it gracefully"""
+    global active_scanner
+    active_scanner = scanner
+    metrics = start_metrics(args, scanner.metrics)
+    try:
+        return scanner.scan()
+    finally:
+        active_scanner = None
+        stop_metrics(metrics)
+        # Flushes and completes output files, even after an error
+        scanner.sink.close()
+        if scanner.checkpoint is not None and not scanner.checkpoint.complete:
+            print(f"\n💾 Progress saved; resume with --checkpoint {scanner.checkpoint.path} --resume")
+
+
+def protocol(args):
+    """Get the transport protocol selected on the command line"""
+    return 'udp' if args.udp else 'tcp'
+
+
+def is_sweep(args):
+    """Check whether the arguments describe more than one target"""
+    if args.target_list:
+        return True
+    return any(sep in args.target for sep in ('/', ',', ' '))
+
+
+def quick_scan_conflicts(args):
+    """List the options a single-host quick scan (-q or --top-ports) cannot honour"""
+    if args.monitor or not args.target or is_sweep(args) or args.udp or not (args.quick or args.top_ports):
+        return []
+    conflicts = []
+    if args.engine == 'thread':
+        conflicts.append('--engine thread')
+    if worker_count(args.workers) > 1:
+        conflicts.append('--workers')
+    for name in ('checkpoint', 'save_results', 'compare', 'metrics_port', 'metrics_log'):
+        if getattr(args, name) is not None:
+            conflicts.append(f"--{name.replace('_', '-')}")
+    return conflicts
+
+
+def target_specs(args):
+    """Collect the target specifications from -t and -iL"""
+    specs = [args.target] if args.target else []
+    if args.target_list:
+        try:
+            specs.extend(read_target_list(args.target_list))
+        except OSError as e:
+            print(f"❌ Cannot read target list: {e}")
+            sys.exit(1)
+    return specs
+
+
+def monitor_mode(args):
+    """Watch the targets continuously, reporting only ports that open or close"""
+    resolver = Resolver(cache=DnsCache(args.dns_cache)) if args.dns_cache else default_resolver()
+    try:
+        targets = parse_targets(target_specs(args), resolver)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        resolver.save()
+
+    if not validate_port_range(args.start_port, args.end_port):
+        print("❌ Invalid port range")
+        sys.exit(1)
+    if args.top_ports:
+        ports = PortSpace(ranges_from_ports(top_ports(args.top_ports, protocol(args))))
+    else:
+        ports = PortSpace([PortRange(args.start_port, args.end_port)])
+
+    job = Monitor.job(targets, ports, protocol(args))
+    try:
+        state = MonitorState.load(args.monitor_state, job) if args.monitor_state else None
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    sinks = [ConsoleMonitorSink()]
+    if args.events:
+        try:
+            sinks.append(ChangeLog(args.events))
+        except OSError as e:
+            print(f"❌ Cannot open events file: {e}")
+            sys.exit(1)
+
+    # --max-rate caps the monitoring rate as well
+    rate = min(args.rate, args.max_rate) if args.max_rate else args.rate
+    limiter = RateLimiter(rate, args.max_rate_burst, args.host_rate, args.host_burst)
+    monitor = Monitor(targets, ports, rate, args.interval, state, sinks, args.concurrency,
+                      timeout=args.timeout, adaptive=not args.no_adaptive, protocol=protocol(args),
+                      rate_limiter=limiter)
+    total = len(monitor.space)
+    hours = total / rate / 3600
+    rotation = f"{hours:.1f} hours" if hours >= 1 else f"{hours * 60:.1f} minutes"
+    print(f"\n📡 Monitoring: {targets} ({len(targets)} hosts), ports {ports}")
+    print(f"⏱️  {limiter.describe()}, {monitor.budget()} probes per {args.interval:g}s cycle; "
+          f"a full rotation of {total} probes takes about {rotation}")
+    if monitor.state.cycle:
+        print(f"↩️  Continuing from cycle {monitor.state.cycle} with {monitor.state.open_count()} known open ports")
+
+    global active_scanner
+    active_scanner = monitor
+    metrics = start_metrics(args, monitor.metrics)
+    try:
+        monitor.run(args.cycles)
+    finally:
+        active_scanner = None
+        stop_metrics(metrics)
+    print(f"\n💾 Stopped after cycle {monitor.state.cycle}")
+
+
+def sweep_mode(args):
+    """Run scanner in multi-host sweep mode"""
+    specs = target_specs(args)
+
+    resolver = Resolver(cache=DnsCache(args.dns_cache)) if args.dns_cache else default_resolver()
+    networks, names = split_targets(specs)
+    # Hostnames resolve while the scan runs, unless the probe order has to
+    # be fixed up front for a checkpoint or for sharding across processes
+    streaming = bool(names) and not args.checkpoint and worker_count(args.workers) <= 1
+
+    try:
+        if streaming:
+            targets = merge_networks(networks)
+        else:
+            targets = parse_targets(specs, resolver)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        resolver.save()
+
+    if not validate_port_range(args.start_port, args.end_port):
+        print("❌ Invalid port range")
+        sys.exit(1)
+
+    ports = None
+    if args.top_ports:
+        ports = top_ports(args.top_ports, protocol(args))
+
+    if streaming:
+        print(f"\n📡 Targets: {len(names)} hostnames, resolved while scanning")
+        if len(targets):
+            print(f"📡 Addresses: {targets} ({len(targets)} hosts)")
+    else:
+        print(f"\n📡 Targets: {targets} ({len(targets)} hosts)")
+    if ports:
+        print(f"🔢 Ports: top {len(ports)} most frequently open")
+    else:
+        print(f"🔢 Port Range: {args.start_port}-{args.end_port}")
+    print(f"⚡ Concurrency: {args.concurrency}")
+
+    # A resumed sweep must probe in the order the checkpoint recorded
+    saved_job = None
+    if args.checkpoint and args.resume:
+        saved_job = Checkpoint.saved_job(args.checkpoint)
+    seed = (saved_job or {}).get('seed')
+
+    # Results cover every requested host, including those discovery finds down
+    requested = targets
+    try:
+        if not args.no_discovery and len(targets) > 1:
+            if saved_job and saved_job.get('targets'):
+                # Keep the live hosts the interrupted run discovered
+                targets = parse_targets([saved_job['targets']])
+                print(f"\n🛰️  Resuming with the {len(targets)} live hosts recorded in the checkpoint")
+            else:
+                print("\n🛰️  Discovering live hosts...")
+                total = len(targets)
+                targets = discover_hosts(targets, rate_limiter=args.limiter)
+                print(f"🛰️  {len(targets)}/{total} hosts are up")
+            if not targets and not streaming:
+                print("\n❌ No live hosts found (use -Pn to scan all targets anyway)")
+                return
+
+        if streaming:
+            scanner = ResolvingSweepScanner(names, targets, args.start_port, args.end_port,
+                                            args.concurrency, timeout=args.timeout,
+                                            adaptive=not args.no_adaptive, ports=ports,
+                                            protocol=protocol(args), resolver=resolver)
+        else:
+            scanner = SweepScanner(targets, args.start_port, args.end_port, args.concurrency,
+                                   timeout=args.timeout, seed=seed, adaptive=not args.no_adaptive,
+                                   ports=ports, protocol=protocol(args))
+        attach_rate_limit(args, scanner)
+        scanner = with_workers(args, scanner)
+        attach_checkpoint(args, scanner)
+        store_sink = attach_store(args, scanner, requested.networks)
+        attach_writers(args, scanner)
+        run_scan(scanner, args)
+        resolver.save()
+        print(scanner.get_scan_summary())
+        report_store(args, store_sink)
+        run_version_detection(args, [(host, port) for host, port, _, _ in scanner.open_ports])
+    except KeyboardInterrupt:
+        print("\n\nScan interrupted by user.")
+    except Exception as e:
+        print(f"\n❌ Error during scan: {e}")
+
+
 def command_line_mode(args):
     """Run scanner in command line mode"""
+    if args.monitor:
+        monitor_mode(args)
+        return
+
+    if is_sweep(args):
+        sweep_mode(args)
+        return
+
     target = args.target
 
     # Validate/resolve target
@@ -95,14 +461,34 @@ def command_line_mode(args):
         print("❌ Invalid port range")
         sys.exit(1)
 
+    if args.udp and args.engine != 'async':
+        print("ℹ️  UDP scans run on the async engine")
+        args.engine = 'async'
+    if worker_count(args.workers) > 1 and args.engine != 'async':
+        print("ℹ️  Worker processes run the async engine")
+        args.engine = 'async'
+
     print(f"\n📡 Target: {target_ip}")
-    print(f"🔢 Port Range: {args.start_port}-{args.end_port}")
-    print(f"🧵 Threads: {args.threads}")
+    if args.udp and args.top_ports:
+        print(f"🔢 UDP Ports: top {args.top_ports} most frequently open")
+    else:
+        print(f"🔢 Port Range: {args.start_port}-{args.end_port}")
+    if args.engine == 'async':
+        print(f"⚡ Concurrency: {args.concurrency}")
+    else:
+        print(f"🧵 Threads: {args.threads}")
 
     try:
-        if args.quick:
+        if (args.quick or args.top_ports) and not args.udp:
             print("\n🚀 Quick scan mode")
-            open_ports = quick_scan(target_ip, True)
+            writers = output_writers(args)
+            try:
+                open_ports = quick_scan(target_ip, True, top_ports=args.top_ports,
+                                        timeout=args.timeout, sink=writers,
+                                        rate_limiter=args.limiter)
+            finally:
+                if writers is not None:
+                    writers.close()
 
             if open_ports:
                 print("\n--- Quick Scan Results ---")
@@ -110,15 +496,36 @@ def command_line_mode(args):
                     print(f"Port {port}: Open ({service})")
             else:
                 print("\n❌ No open ports found in quick scan")
+
+            run_version_detection(args, [(target_ip, port) for port, _ in open_ports])
         else:
             # Create scanner instance
-            scanner = PortScanner(target_ip, args.start_port, args.end_port, args.threads)
+            if args.udp:
+                ports = top_ports(args.top_ports, 'udp') if args.top_ports else None
+                scanner = AsyncPortScanner(target_ip, args.start_port, args.end_port, args.concurrency,
+                                           timeout=args.timeout, adaptive=not args.no_adaptive,
+                                           ports=ports, protocol='udp')
+            elif args.engine == 'async':
+                scanner = AsyncPortScanner(target_ip, args.start_port, args.end_port, args.concurrency,
+                                           timeout=args.timeout, adaptive=not args.no_adaptive)
+            else:
+                scanner = PortScanner(target_ip, args.start_port, args.end_port, args.threads,
+                                      adaptive=not args.no_adaptive, timeout=args.timeout)
+
+            attach_rate_limit(args, scanner)
+            scanner = with_workers(args, scanner)
+            attach_checkpoint(args, scanner)
+            store_sink = attach_store(args, scanner)
+            attach_writers(args, scanner)
 
             # Perform scan
-            open_ports = scanner.scan()
+            open_ports = run_scan(scanner, args)
 
             # Display results
             print(scanner.get_scan_summary())
+            report_store(args, store_sink)
+
+            run_version_detection(args, [(target_ip, port) for port, _, _ in open_ports])
 
     except KeyboardInterrupt:
         print("\n\nScan interrupted by user.")
@@ -144,11 +551,29 @@ Examples:
   python main.py -t 192.168.1.1           # Scan default ports
   python main.py -t google.com -s 80 -e 443  # Scan specific range
   python main.py -t 127.0.0.1 --quick     # Quick scan common ports
+  python main.py -t 127.0.0.1 --top-ports 500  # Quick scan the 500 most frequently open ports
+  python main.py -t 192.168.1.1 -sV            # Detect service versions on open ports
+  python main.py -t 10.0.0.5 -s 1 -e 65535 -c 5000  # Full range, 5000 connects in flight
+  python main.py -t 10.0.0.0/16 -e 1024 --workers 0   # Sweep using every CPU core
+  python main.py -t 10.0.0.0/16 -s 22 -e 443   # Sweep a CIDR block
+  python main.py -iL targets.txt -e 1024       # Sweep hosts listed in a file
+  python main.py -iL hostnames.txt --dns-cache dns.json  # Reuse resolved names across scans
+  python main.py -t 10.0.0.0/24 -Pn            # Sweep without the host-discovery pass
+  python main.py -t 192.168.1.1 -sU --top-ports 50  # UDP scan of the 50 most common UDP ports
+  python main.py -t 10.0.0.0/16 --checkpoint scan.json           # Save progress periodically
+  python main.py -t 10.0.0.0/16 --checkpoint scan.json --resume  # Continue an interrupted scan
+  python main.py -t 10.0.0.0/24 --compare monday.psr --save-results tuesday.psr  # Report changes
+  python main.py -t 10.0.0.0/16 --jsonl findings.jsonl -oX scan.xml  # Stream machine-readable output
+  python main.py -t 10.0.0.0/16 --max-rate 5000 --host-rate 100  # Cap probes overall and per host
+  python main.py -t 10.0.0.0/16 --metrics-port 9464 --metrics-log  # Prometheus endpoint and log lines
+  python main.py -t 10.0.0.0/16 --monitor --monitor-state watch.json --events changes.jsonl  # Watch for changes
         """
     )
 
     parser.add_argument('-t', '--target', 
-                       help='Target IP address or hostname')
+                       help='Target IP address, hostname, CIDR block or comma-separated list')
+    parser.add_argument('-iL', '--target-list',
+                       help='File with targets (IPs, CIDR blocks, hostnames) to sweep')
     parser.add_argument('-s', '--start-port', 
                        type=int, default=DEFAULT_START_PORT,
                        help=f'Start port (default: {DEFAULT_START_PORT})')
@@ -158,16 +583,124 @@ Examples:
     parser.add_argument('--threads', 
                        type=int, default=DEFAULT_THREAD_COUNT,
                        help=f'Number of threads (default: {DEFAULT_THREAD_COUNT})')
+    parser.add_argument('--engine',
+                       choices=['async', 'thread'], default=DEFAULT_ENGINE,
+                       help=f'Scan engine (default: {DEFAULT_ENGINE})')
+    parser.add_argument('-c', '--concurrency',
+                       type=int,
+                       help=f'Connects in flight for the async engine (default: {DEFAULT_CONCURRENCY}, '
+                            f'{UDP_CONCURRENCY} for UDP)')
+    parser.add_argument('--workers',
+                       type=int, default=DEFAULT_WORKERS, metavar='N',
+                       help=f'Split the scan across N processes, 0 for one per CPU core (default: {DEFAULT_WORKERS})')
+    parser.add_argument('-sU', '--udp',
+                       action='store_true',
+                       help='UDP scan with protocol-specific probes (async engine)')
+    parser.add_argument('--timeout',
+                       type=float, default=SOCKET_TIMEOUT,
+                       help=f'Connect timeout in seconds, used until a host has answered (default: {SOCKET_TIMEOUT})')
+    parser.add_argument('-Pn', '--no-discovery',
+                       action='store_true',
+                       help='Skip host discovery and scan every target in a sweep')
+    parser.add_argument('--no-adaptive',
+                       action='store_true',
+                       help='Disable per-host RTT-based timeouts and windows')
     parser.add_argument('-q', '--quick', 
                        action='store_true',
                        help='Quick scan of common ports only')
+    parser.add_argument('--top-ports',
+                       type=int, nargs='?', const=DEFAULT_TOP_PORTS, metavar='N',
+                       help=f'Quick scan of the N most frequently open ports (default N: {DEFAULT_TOP_PORTS})')
+    parser.add_argument('-sV', '--service-version',
+                       action='store_true',
+                       help='Probe open ports to detect service names and versions')
+    parser.add_argument('--version-cache',
+                       metavar='FILE',
+                       help='JSON file caching version-detection results between scans')
+    parser.add_argument('--checkpoint',
+                       metavar='FILE',
+                       help='Save scan progress to FILE periodically and on Ctrl+C')
+    parser.add_argument('--resume',
+                       action='store_true',
+                       help='Continue the scan recorded in the --checkpoint file')
+    parser.add_argument('--dns-cache',
+                       metavar='FILE',
+                       help='Cache resolved hostnames in FILE between scans')
+    parser.add_argument('--jsonl',
+                       metavar='FILE',
+                       help='Stream findings to FILE as JSON Lines')
+    parser.add_argument('--csv',
+                       metavar='FILE',
+                       help='Stream findings to FILE as CSV')
+    parser.add_argument('-oX', '--xml',
+                       metavar='FILE',
+                       help='Stream findings to FILE as nmap-style XML')
+    parser.add_argument('--save-results',
+                       metavar='FILE',
+                       help='Save open ports to a compact bitmap result store')
+    parser.add_argument('--compare',
+                       metavar='FILE',
+                       help='Report ports opened or closed since the scan saved in FILE')
+    parser.add_argument('--max-rate',
+                       type=float, default=MAX_RATE, metavar='PPS',
+                       help='Send at most PPS probes per second in total (default: unlimited)')
+    parser.add_argument('--max-rate-burst',
+                       type=float, metavar='N',
+                       help='Probes that may go out at once before --max-rate applies (default: 50ms worth)')
+    parser.add_argument('--host-rate',
+                       type=float, default=MAX_HOST_RATE, metavar='PPS',
+                       help='Send at most PPS probes per second to any one host (default: unlimited)')
+    parser.add_argument('--host-burst',
+                       type=float, metavar='N',
+                       help='Probes that may go out to one host at once before --host-rate applies')
+    parser.add_argument('--metrics-port',
+                       type=int, metavar='PORT',
+                       help=f'Serve live scan metrics for Prometheus on {METRICS_BIND_ADDRESS}:PORT/metrics')
+    parser.add_argument('--metrics-log',
+                       type=float, nargs='?', const=METRICS_LOG_INTERVAL, metavar='SECONDS',
+                       help=f'Print a metrics line to stderr every SECONDS (default: {METRICS_LOG_INTERVAL})')
+    parser.add_argument('--monitor',
+                       action='store_true',
+                       help='Keep watching the targets and report only ports that open or close')
+    parser.add_argument('--monitor-state',
+                       metavar='FILE',
+                       help='Keep monitor state (open and volatile ports, rotation position) in FILE')
+    parser.add_argument('--events',
+                       metavar='FILE',
+                       help='Append monitor change events to FILE as JSON Lines')
+    parser.add_argument('--rate',
+                       type=float, default=MONITOR_RATE, metavar='PPS',
+                       help=f'Probes per second for --monitor (default: {MONITOR_RATE})')
+    parser.add_argument('--interval',
+                       type=float, default=MONITOR_INTERVAL, metavar='SECONDS',
+                       help=f'Length of a monitoring cycle (default: {MONITOR_INTERVAL})')
+    parser.add_argument('--cycles',
+                       type=int, metavar='N',
+                       help='Stop monitoring after N cycles (default: run until Ctrl+C)')
     parser.add_argument('--version', 
                        action='version', version='Port Scanner 1.0.0')
 
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint FILE')
+    if args.monitor and not (args.target or args.target_list):
+        parser.error('--monitor requires targets (-t or -iL)')
+    if args.rate <= 0 or args.interval <= 0:
+        parser.error('--rate and --interval must be positive')
+    for name in ('max_rate', 'max_rate_burst', 'host_rate', 'host_burst'):
+        if getattr(args, name) is not None and getattr(args, name) <= 0:
+            parser.error(f"--{name.replace('_', '-')} must be positive")
+    conflicts = quick_scan_conflicts(args)
+    if conflicts:
+        parser.error(f"{', '.join(conflicts)} cannot be combined with a quick scan (-q/--top-ports) "
+                     f"of a single host")
+    # One limiter for every stage: discovery, the scan and version detection
+    args.limiter = rate_limiter(args)
+    if args.concurrency is None:
+        args.concurrency = UDP_CONCURRENCY if args.udp else DEFAULT_CONCURRENCY
 
     # Run in appropriate mode
-    if args.target:
+    if args.target or args.target_list:
         command_line_mode(args)
     else:
         interactive_mode()
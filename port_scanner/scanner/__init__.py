@@ -5,16 +5,93 @@ A multi-threaded port scanner with service identification capabilities.
 """
 
 from .port_scanner import PortScanner, quick_scan, run_scanner
+from .async_scanner import AsyncPortScanner
+from .benchmark import ListenerFleet, run_benchmark
+from .checkpoint import Checkpoint, IntervalSet
+from .discovery import HostDiscovery, discover_hosts
+from .metrics import ScanMetrics, MetricsServer, MetricsReporter
+from .rate_limit import RateLimiter, TokenBucket
+from .monitor import Monitor, MonitorState, PairScanner
+from .multiprocess import MultiProcessScanner
+from .port_frequency import top_ports, port_rank
+from .resources import ResourceGovernor, raise_fd_limit
+from .resolver import Resolver, DnsCache
+from .result_store import PortBitmap, ResultStore, StoreSink, PortChange
+from .sinks import ScanResult, ScanSink, ConsoleSink, NullSink, MultiSink
+from .sweep import (SweepScanner, ResolvingSweepScanner, TargetSet, InterleavedSpace, parse_targets,
+                    interleaved_pairs)
+from .version_detection import ServiceDetector, ServiceMatch, ProbeCache, detect_services, match_banner
+from .work import PortRange, RangeSpace, PortSpace, WorkSource, ranges_from_ports
+from .service_registry import ServiceRegistry, ServiceEntry, default_registry
 from .service_identifier import identify_service, get_service_description, is_common_service, get_security_info
-from .utils import validate_ip, validate_port_range, get_user_input, format_scan_results, resolve_hostname
+from .udp_probe import UdpProber, UdpPacer, udp_payload
+from .writers import JsonLinesWriter, CsvWriter, XmlWriter, open_writers
+from .utils import validate_ip, validate_port_range, get_user_input, format_scan_results, format_scan_summary, resolve_hostname
 
 __version__ = "1.0.0"
 __author__ = "Port Scanner Team"
 
 __all__ = [
     'PortScanner',
+    'AsyncPortScanner',
+    'SweepScanner',
+    'ResolvingSweepScanner',
+    'Resolver',
+    'DnsCache',
+    'MultiProcessScanner',
+    'RateLimiter',
+    'TokenBucket',
+    'ScanMetrics',
+    'MetricsServer',
+    'MetricsReporter',
+    'Monitor',
+    'MonitorState',
+    'PairScanner',
+    'HostDiscovery',
+    'discover_hosts',
+    'Checkpoint',
+    'IntervalSet',
+    'ScanResult',
+    'ScanSink',
+    'ConsoleSink',
+    'NullSink',
+    'MultiSink',
+    'StoreSink',
+    'JsonLinesWriter',
+    'CsvWriter',
+    'XmlWriter',
+    'open_writers',
+    'PortBitmap',
+    'ResultStore',
+    'PortChange',
+    'ListenerFleet',
+    'run_benchmark',
+    'ResourceGovernor',
+    'raise_fd_limit',
+    'TargetSet',
+    'parse_targets',
+    'InterleavedSpace',
+    'interleaved_pairs',
+    'UdpProber',
+    'UdpPacer',
+    'udp_payload',
+    'ServiceDetector',
+    'ServiceMatch',
+    'ProbeCache',
+    'detect_services',
+    'match_banner',
+    'PortRange',
+    'RangeSpace',
+    'PortSpace',
+    'WorkSource',
+    'ranges_from_ports',
     'quick_scan',
     'run_scanner',
+    'top_ports',
+    'port_rank',
+    'ServiceRegistry',
+    'ServiceEntry',
+    'default_registry',
     'identify_service',
     'get_service_description',
     'get_security_info',
@@ -23,5 +100,6 @@ __all__ = [
     'validate_port_range',
     'get_user_input',
     'format_scan_results',
+    'format_scan_summary',
     'resolve_hostname'
 ]
@@ -0,0 +1,598 @@
+"""
+Asynchronous connect-scan engine
+"""
+
+import asyncio
+import ipaddress
+import queue
+import socket
+import threading
+import time
+from config import DEFAULT_CONCURRENCY, SOCKET_TIMEOUT, ADAPTIVE_TIMING, MAX_RETRIES
+from .service_identifier import identify_service, get_security_info
+from .metrics import ScanMetrics
+from .sinks import ScanResult, ConsoleSink
+from .resources import ResourceGovernor, abortive_close
+from .timing import HostTiming, OPEN, CLOSED, TIMEOUT, ERROR, OPEN_FILTERED, RESOURCE, RESOURCE_ERRNOS
+from .udp_probe import UdpProber
+from .utils import format_scan_summary
+from .work import PortRange, PortSpace, WorkSource, ranges_from_ports
+
+
+def address_family(ip):
+    """
+    Get the socket address family for an IP address
+
+    Args:
+        ip (str): IPv4 or IPv6 address
+
+    Returns:
+        int: socket.AF_INET or socket.AF_INET6
+    """
+    if ipaddress.ip_address(ip).version == 6:
+        return socket.AF_INET6
+    return socket.AF_INET
+
+
+async def tcp_connect(host, port, timeout, metrics=None):
+    """
+    Attempt one non-blocking connect on the running event loop
+
+    Args:
+        host (str): Target IP address
+        port (int): Port number
+        timeout (float): Connect timeout in seconds
+        metrics (ScanMetrics): Records the attempt's outcome, latency and errno (optional)
+
+    Returns:
+        str: OPEN, CLOSED, TIMEOUT, RESOURCE or ERROR
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        sock = socket.socket(address_family(host), socket.SOCK_STREAM)
+    except OSError as e:
+        state = RESOURCE if e.errno in RESOURCE_ERRNOS else ERROR
+        if metrics is not None:
+            metrics.probe_failed(state, e.errno)
+        return state
+
+    sock.setblocking(False)
+    if metrics is not None:
+        metrics.probe_started()
+    start = time.monotonic()
+    state = code = None
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (host, port)), timeout)
+        state = OPEN
+    except asyncio.TimeoutError:
+        state = TIMEOUT
+    except ConnectionRefusedError as e:
+        state, code = CLOSED, e.errno
+    except OSError as e:
+        state, code = (RESOURCE if e.errno in RESOURCE_ERRNOS else ERROR), e.errno
+    finally:
+        # Skip TIME_WAIT so scans do not run out of ephemeral ports
+        abortive_close(sock)
+        if metrics is not None:
+            metrics.probe_finished(state, time.monotonic() - start, code)
+    return state
+
+
+class AsyncPortScanner:
+    """
+    Asyncio-based port scanner class
+
+    Runs non-blocking connects on a single event loop. Up to ``concurrency``
+    connects are kept in flight at once, with no thread per connection.
+    With adaptive timing, every host gets its own RTT-based timeout and
+    in-flight window (see HostTiming). With ``protocol="udp"``, ports are
+    probed with UDP datagrams instead (see UdpProber).
+    """
+
+    def __init__(self, target_ip, start_port=None, end_port=None,
+                 concurrency=DEFAULT_CONCURRENCY, timeout=SOCKET_TIMEOUT,
+                 adaptive=ADAPTIVE_TIMING, sink=None, ports=None, checkpoint=None,
+                 protocol='tcp'):
+        """
+        Initialize async port scanner
+
+        Args:
+            target_ip (str): Target IP address
+            start_port (int): Starting port number
+            end_port (int): Ending port number
+            concurrency (int): Maximum number of connects in flight
+            timeout (float): Connect timeout in seconds (initial timeout when adaptive)
+            adaptive (bool): Use per-host RTT-based timeouts and windows
+            sink (ScanSink): Receives progress and findings (defaults to ConsoleSink)
+            ports (iterable): Explicit ports to scan instead of start_port-end_port
+            checkpoint (Checkpoint): Records progress and resumes from it (optional)
+            protocol (str): "tcp" for connect scans, "udp" for UDP probes
+        """
+        if protocol not in ('tcp', 'udp'):
+            raise ValueError(f"Unsupported protocol: {protocol}")
+        self.target_ip = target_ip
+        if ports is not None:
+            self.ports = PortSpace(ranges_from_ports(ports))
+        else:
+            self.ports = PortSpace([PortRange(start_port, end_port)])
+        if not len(self.ports):
+            raise ValueError("No ports to scan")
+        self.start_port = self.ports[0]
+        self.end_port = self.ports[-1]
+        self.total_ports = len(self.ports)
+        self.concurrency = max(1, min(concurrency, self.total_ports))
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.host_timing = {}
+        self._windows = {}
+        self.protocol = protocol
+        self.udp = None
+        self.open_ports = []
+        self.open_filtered = []
+        self.scanned_ports = 0
+        self.progress_step = 100
+        self.sink = sink if sink is not None else self.default_sink()
+        self.checkpoint = checkpoint
+        self.shard_index = 0
+        self.shards = 1
+        self.governor = ResourceGovernor()
+        self.metrics = ScanMetrics()
+        self.rate_limiter = None
+        self._stopped = False
+
+    async def connect(self, host, port, timeout):
+        """
+        Attempt one non-blocking connect within the socket budget
+
+        Running out of local sockets or ports is retried (see
+        ResourceGovernor) instead of being reported as a closed port. With
+        a rate limiter, the attempt first waits for its send slot.
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+            timeout (float): Connect timeout in seconds
+
+        Returns:
+            str: OPEN, CLOSED, TIMEOUT or ERROR
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(host)
+        return await self.governor.run(tcp_connect, host, port, timeout, self.metrics)
+
+    def timing_for(self, host):
+        """
+        Get the timing state for a host, creating it on first use
+
+        Args:
+            host (str): Target IP address
+
+        Returns:
+            HostTiming: Timing state of the host
+        """
+        timing = self.host_timing.get(host)
+        if timing is None:
+            timing = HostTiming(self.concurrency, initial_timeout=self.timeout)
+            self.host_timing[host] = timing
+            self._windows[host] = asyncio.Condition()
+        return timing
+
+    async def probe(self, host, port):
+        """
+        Probe one (host, port) pair with a non-blocking connect
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number to scan
+
+        Returns:
+            bool: True if port is open, False otherwise
+        """
+        if not self.adaptive:
+            return await self.connect(host, port, self.timeout) == OPEN
+
+        timing = self.timing_for(host)
+        window = self._windows[host]
+        for attempt in range(MAX_RETRIES + 1):
+            async with window:
+                await window.wait_for(timing.can_send)
+                timing.in_flight += 1
+
+            start = time.monotonic()
+            try:
+                state = await self.connect(host, port, timing.timeout(attempt))
+            finally:
+                async with window:
+                    timing.in_flight -= 1
+                    window.notify(max(1, int(timing.window) - timing.in_flight))
+
+            if state == TIMEOUT:
+                timing.on_timeout()
+                # Retransmit only to hosts known to answer; a silent host
+                # would just double the cost of every filtered port.
+                if timing.has_samples and attempt < MAX_RETRIES:
+                    continue
+                return False
+
+            if state in (OPEN, CLOSED):
+                timing.on_reply(time.monotonic() - start)
+            return state == OPEN
+
+        return False
+
+    async def classify(self, host, port):
+        """
+        Probe one (host, port) pair and get its state
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+
+        Returns:
+            str: OPEN or CLOSED for TCP; for UDP also FILTERED, OPEN_FILTERED or ERROR
+        """
+        if self.udp is not None:
+            self.metrics.probe_started()
+            start = time.monotonic()
+            state = None
+            try:
+                state = await self.udp.probe(host, port)
+            finally:
+                self.metrics.probe_finished(state, time.monotonic() - start)
+            return state
+        return OPEN if await self.probe(host, port) else CLOSED
+
+    async def scan_port(self, port):
+        """
+        Scan a single port on the target
+
+        Args:
+            port (int): Port number to scan
+
+        Returns:
+            bool: True if port is open, False otherwise
+        """
+        return await self.probe(self.target_ip, port)
+
+    def describe_target(self):
+        """
+        Describe the scan target for progress output
+
+        Returns:
+            str: Target description
+        """
+        return self.target_ip
+
+    def describe(self):
+        """
+        Describe the scan for the sink's start banner
+
+        Returns:
+            list: Lines of text
+        """
+        if self.protocol == 'udp':
+            lines = [
+                f"Starting async UDP scan on {self.describe_target()}",
+                f"Scanning UDP ports {self.ports}",
+                f"Up to {self.concurrency} probes in flight",
+            ]
+            if self.rate_limiter:
+                lines.append(f"Rate limit: {self.rate_limiter.describe()}")
+            return lines
+        lines = [
+            f"Starting async port scan on {self.describe_target()}",
+            f"Scanning ports {self.ports}",
+            f"Up to {self.concurrency} connects in flight",
+        ]
+        if self.governor.limit < self.concurrency:
+            lines.append(f"Socket budget limits this to {self.governor.limit} "
+                         f"(descriptor limit / ephemeral ports)")
+        if self.rate_limiter:
+            lines.append(f"Rate limit: {self.rate_limiter.describe()}")
+        return lines
+
+    def default_sink(self):
+        """
+        Get the sink used when none is passed in
+
+        Returns:
+            ScanSink: Console output sink
+        """
+        return ConsoleSink()
+
+    def scope(self):
+        """
+        Get the targets this scan covers, for result stores
+
+        Returns:
+            list: Target addresses or networks
+        """
+        return [self.target_ip]
+
+    def job(self):
+        """
+        Describe the scan for checkpoint matching
+
+        Returns:
+            dict: JSON-serializable job description
+        """
+        job = {'kind': 'host', 'target': self.target_ip, 'ports': str(self.ports)}
+        if self.protocol != 'tcp':
+            job['protocol'] = self.protocol
+        return job
+
+    def pair_at(self, index):
+        """
+        Map a work index to the (host, port) pair it stands for
+
+        Args:
+            index (int): Work index in [0, total_ports)
+
+        Returns:
+            tuple: (host, port)
+        """
+        return self.target_ip, self.ports[index]
+
+    def use_shard(self, index, count):
+        """
+        Restrict the scan to one shard of the work space
+
+        Shard ``index`` of ``count`` gets every ``count``-th work index, so
+        ``count`` scanners with different indices cover the space exactly
+        once between them.
+
+        Args:
+            index (int): Shard index in [0, count)
+            count (int): Number of shards
+        """
+        if not 0 <= index < count:
+            raise ValueError("shard must be in [0, shards)")
+        self.shard_index = index
+        self.shards = count
+
+    def work(self):
+        """
+        Get the work items still to probe
+
+        With a checkpoint, indices that were already completed are skipped
+        without being enumerated. With a shard, only its indices are probed.
+
+        Returns:
+            iterator: Iterator of (index, host, port) tuples
+        """
+        remaining = None
+        size = self.total_ports
+        if self.checkpoint is not None:
+            remaining = self.checkpoint.done.gaps(self.total_ports)
+            size = len(remaining)
+
+        self.work_source = WorkSource(size, shard=self.shard_index, shards=self.shards)
+        for position in self.work_source:
+            index = remaining[position] if remaining is not None else position
+            host, port = self.pair_at(index)
+            yield index, host, port
+
+    def make_result(self, host, port, state=OPEN):
+        """
+        Build the result event for an open port
+
+        Args:
+            host (str): Target IP address
+            port (int): Open port number
+            state (str): OPEN, or OPEN_FILTERED for unanswered UDP probes
+
+        Returns:
+            ScanResult: The finding
+        """
+        return ScanResult(host, port, state, identify_service(port, self.protocol),
+                          get_security_info(port, self.protocol))
+
+    def stop(self):
+        """
+        Ask the scan to stop after the probes already in flight
+
+        Safe to call from a signal handler. The scan then ends normally and
+        saves its checkpoint, if it has one.
+        """
+        self._stopped = True
+
+    def record_open(self, result):
+        """
+        Record an open port in open_ports
+
+        Args:
+            result (ScanResult): The finding
+        """
+        self.open_ports.append((result.port, result.service, result.security_info))
+
+    def record(self, result):
+        """
+        Record a finding: open ports in open_ports, the rest in open_filtered
+
+        Args:
+            result (ScanResult): The finding
+        """
+        if result.state == OPEN:
+            self.record_open(result)
+        else:
+            self.open_filtered.append((result.host, result.port))
+
+    async def worker(self, pairs, results):
+        """
+        Worker coroutine
+
+        Args:
+            pairs (iterator): (index, host, port) iterator shared by all workers
+            results (asyncio.Queue): Queue receiving ScanResult events and
+                progress counts
+        """
+        # Every worker runs on the same event loop, so pulling from a
+        # shared iterator needs no locking.
+        for index, host, port in pairs:
+            if self._stopped:
+                break
+            await self.probe_item(index, host, port, results)
+
+    async def probe_item(self, index, host, port, results):
+        """
+        Probe one work item and report its outcome
+
+        Args:
+            index (int): Work index
+            host (str): Target IP address
+            port (int): Port number
+            results (asyncio.Queue): Queue receiving ScanResult events and
+                progress counts
+        """
+        state = await self.classify(host, port)
+        if state in (OPEN, OPEN_FILTERED):
+            if self.checkpoint is not None:
+                self.checkpoint.add_finding(host, port, state)
+            results.put_nowait(self.make_result(host, port, state))
+
+        if self.checkpoint is not None:
+            self.checkpoint.mark_done(index)
+            self.checkpoint.maybe_save()
+
+        self.scanned_ports += 1
+        self.metrics.item_done()
+        if self.scanned_ports % self.progress_step == 0 or self.scanned_ports == self.total_ports:
+            results.put_nowait(self.scanned_ports)
+
+    async def aiter_results(self):
+        """
+        Run the scan and yield open ports as they are found
+
+        When resuming from a checkpoint, the findings it already holds are
+        yielded first.
+
+        Yields:
+            ScanResult: One event per open (or, for UDP, open|filtered) port
+        """
+        self._stopped = False
+        self.governor.reset()
+        self.sink.start(self)
+        start_time = time.time()
+
+        if self.checkpoint is not None:
+            self.scanned_ports = len(self.checkpoint.done)
+            for host, port, state in self.checkpoint.findings:
+                result = self.make_result(host, port, state)
+                self.record(result)
+                self.sink.result(result)
+                yield result
+
+        if self.protocol == 'udp':
+            self.udp = UdpProber(self.timeout, adaptive=self.adaptive, rate_limiter=self.rate_limiter)
+            self.udp.open()
+
+        results = asyncio.Queue()
+        self.metrics.start(self.total_ports, self.scanned_ports, results)
+        pairs = self.work()
+        workers = asyncio.gather(*(self.worker(pairs, results) for _ in range(self.concurrency)))
+        workers.add_done_callback(lambda _: results.put_nowait(None))
+
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                if isinstance(result, int):
+                    self.sink.progress(result, self.total_ports)
+                    continue
+                self.record(result)
+                self.sink.result(result)
+                yield result
+            # Re-raise any worker failure
+            await workers
+        finally:
+            if not workers.done():
+                self._stopped = True
+                workers.cancel()
+            if self.udp is not None:
+                self.udp.close()
+                self.udp = None
+            if self.checkpoint is not None:
+                self.checkpoint.save(complete=not self._stopped)
+
+        self.metrics.finish()
+        self.sink.finish(self, time.time() - start_time)
+
+    def iter_results(self):
+        """
+        Run the scan on a background event loop and yield open ports
+
+        For callers that are not async themselves. Each finding is yielded
+        as soon as it is found, while the scan keeps running.
+
+        Yields:
+            ScanResult: One event per open port
+        """
+        events = queue.Queue()
+
+        async def pump():
+            async for result in self.aiter_results():
+                events.put(result)
+
+        def run():
+            try:
+                asyncio.run(pump())
+            except BaseException as e:
+                events.put(e)
+            finally:
+                events.put(None)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                if isinstance(event, BaseException):
+                    raise event
+                yield event
+        finally:
+            self._stopped = True
+            thread.join()
+
+    async def scan_async(self):
+        """
+        Perform the port scan on the running event loop
+
+        Returns:
+            list: List of tuples (port, service, security_info)
+        """
+        async for _ in self.aiter_results():
+            pass
+        return self.open_ports
+
+    def scan(self):
+        """
+        Perform the port scan on a new event loop
+
+        Returns:
+            list: List of tuples (port, service, security_info)
+        """
+        asyncio.run(self.scan_async())
+        return self.open_ports
+
+    def get_scan_summary(self):
+        """
+        Get formatted scan summary
+
+        Returns:
+            str: Formatted summary
+        """
+        return format_scan_summary(self.open_ports) + self.open_filtered_summary()
+
+    def open_filtered_summary(self):
+        """
+        Summarize UDP ports that never answered
+
+        Returns:
+            str: Summary line, or an empty string if there are none
+        """
+        if not self.open_filtered:
+            return ""
+        return f"\n{len(self.open_filtered)} ports open|filtered (no reply)"
@@ -0,0 +1,442 @@
+"""
+Loopback benchmark: a fleet of local listeners and throughput/accuracy runs
+"""
+
+import contextlib
+import io
+import ipaddress
+import json
+import os
+import platform
+import random
+import selectors
+import socket
+import threading
+import time
+from config import SOCKET_TIMEOUT, DEFAULT_THREAD_COUNT, DEFAULT_CONCURRENCY
+from .async_scanner import AsyncPortScanner
+from .metrics import Histogram, ScanMetrics
+from .multiprocess import MultiProcessScanner
+from .port_frequency import top_ports
+from .port_scanner import PortScanner, quick_scan
+from .resources import raise_fd_limit
+from .sinks import ScanSink
+from .sweep import SweepScanner, TargetSet
+
+# Latency buckets from 10 us to 10 s, 25% apart, so loopback probes do not
+# all land in the first bucket of METRICS_LATENCY_BUCKETS
+LATENCY_BUCKETS = tuple(0.00001 * 1.25 ** step for step in range(62))
+
+# How a fleet port answers a connect
+ACCEPT = 'accept'        # Listening: the connect succeeds
+REFUSE = 'refuse'        # Bound but not listening: the connect gets a RST
+BLACKHOLE = 'blackhole'  # Accept queue full: SYNs are dropped until the timeout
+
+# Connections that fill a black-holed listener's accept queue (backlog 0)
+BLACKHOLE_FILL = 2
+
+ENGINES = ['threaded', 'quick_scan', 'async', 'sweep', 'multiprocess']
+
+
+class ListenerFleet:
+    """
+    Local TCP listeners spread over several 127.0.0.0/8 addresses
+
+    Every fleet port is bound, so no other service can answer on it and the
+    expected state of each port is known. Ports that cannot be bound
+    (in use, or below 1024 without privileges) are left out of the fleet
+    and out of the accuracy figures.
+    """
+
+    def __init__(self, hosts=4, ports=range(20000, 20500), open_ratio=0.1, blackhole_ratio=0.05,
+                 first_address='127.0.1.1', seed=0):
+        """
+        Initialize listener fleet
+
+        Args:
+            hosts (int): Number of loopback addresses
+            ports (iterable): Ports bound on every address
+            open_ratio (float): Share of ports that accept
+            blackhole_ratio (float): Share of ports that drop SYNs
+            first_address (str): First loopback address; the others follow it
+            seed (int): Seed for assigning ports to kinds
+        """
+        first = ipaddress.ip_address(first_address)
+        self.hosts = [str(first + offset) for offset in range(hosts)]
+        self.ports = sorted(set(ports))
+        self.open_ratio = open_ratio
+        self.blackhole_ratio = blackhole_ratio
+        self.seed = seed
+        self.kinds = {}
+        self.skipped = 0
+        self._sockets = []
+        self._selector = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def pick_kind(self, rng):
+        value = rng.random()
+        if value < self.open_ratio:
+            return ACCEPT
+        if value < self.open_ratio + self.blackhole_ratio:
+            return BLACKHOLE
+        return REFUSE
+
+    def start(self):
+        """Bind all listeners and start draining accepted connections"""
+        raise_fd_limit()
+        rng = random.Random(self.seed)
+        self._selector = selectors.DefaultSelector()
+        for host in self.hosts:
+            for port in self.ports:
+                kind = self.pick_kind(rng)
+                if self.bind(host, port, kind):
+                    self.kinds[(host, port)] = kind
+                else:
+                    self.skipped += 1
+
+        self._thread = threading.Thread(target=self.drain, daemon=True)
+        self._thread.start()
+
+    def bind(self, host, port, kind):
+        """
+        Bind one fleet port
+
+        Args:
+            host (str): Loopback address
+            port (int): Port number
+            kind (str): ACCEPT, REFUSE or BLACKHOLE
+
+        Returns:
+            bool: True if the port is now part of the fleet
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind((host, port))
+            if kind == ACCEPT:
+                sock.listen(socket.SOMAXCONN)
+                sock.setblocking(False)
+                self._selector.register(sock, selectors.EVENT_READ)
+            elif kind == BLACKHOLE:
+                sock.listen(0)
+                for _ in range(BLACKHOLE_FILL):
+                    filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    filler.setblocking(False)
+                    filler.connect_ex((host, port))
+                    self._sockets.append(filler)
+        except OSError:
+            sock.close()
+            return False
+        self._sockets.append(sock)
+        return True
+
+    def drain(self):
+        """Accept and close connections so accept queues never fill up"""
+        while not self._stop.is_set():
+            for key, _ in self._selector.select(0.1):
+                try:
+                    while True:
+                        conn, _ = key.fileobj.accept()
+                        conn.close()
+                except OSError:
+                    pass
+
+    def close(self):
+        """Stop draining and close every listener"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        for sock in self._sockets:
+            sock.close()
+        self._sockets = []
+
+    def count(self, kind):
+        """
+        Count fleet ports of one kind
+
+        Args:
+            kind (str): ACCEPT, REFUSE or BLACKHOLE
+
+        Returns:
+            int: Number of ports
+        """
+        return sum(1 for value in self.kinds.values() if value == kind)
+
+    def describe(self):
+        """
+        Describe the fleet for benchmark reports
+
+        Returns:
+            dict: Fleet layout
+        """
+        return {
+            'hosts': self.hosts,
+            'ports': [self.ports[0], self.ports[-1]] if self.ports else [],
+            'port_count': len(self.ports),
+            ACCEPT: self.count(ACCEPT),
+            REFUSE: self.count(REFUSE),
+            BLACKHOLE: self.count(BLACKHOLE),
+            'skipped': self.skipped,
+        }
+
+
+class FindingsSink(ScanSink):
+    """
+    Sink that collects the (host, port) of every open port
+    """
+
+    def __init__(self):
+        self.found = set()
+
+    def result(self, result):
+        self.found.add((result.host, result.port))
+
+
+def probe_latency(metrics):
+    """
+    Merge the latency histograms of a finished scan across outcomes
+
+    Args:
+        metrics (ScanMetrics): The scan's metrics, worker processes included
+
+    Returns:
+        Histogram: Duration of every connect attempt
+    """
+    histogram = Histogram(metrics.buckets)
+    for outcome in metrics.combined()['latency'].values():
+        histogram.merge(outcome.state())
+    return histogram
+
+
+def accuracy(fleet, probed, found):
+    """
+    Compare findings with the fleet's known port states
+
+    Only fleet ports among the probed (host, port) pairs are counted.
+
+    Args:
+        fleet (ListenerFleet): The fleet that was scanned
+        probed (iterable): (host, port) pairs the engine scanned
+        found (set): (host, port) pairs the engine reported open
+
+    Returns:
+        dict: Counts of true/false positives and negatives, and accuracy
+    """
+    true_positives = false_positives = false_negatives = true_negatives = 0
+    for pair in probed:
+        kind = fleet.kinds.get(pair)
+        if kind is None:
+            continue
+        if kind == ACCEPT:
+            if pair in found:
+                true_positives += 1
+            else:
+                false_negatives += 1
+        elif pair in found:
+            false_positives += 1
+        else:
+            true_negatives += 1
+
+    total = true_positives + false_positives + false_negatives + true_negatives
+    return {
+        'true_positives': true_positives,
+        'false_positives': false_positives,
+        'false_negatives': false_negatives,
+        'true_negatives': true_negatives,
+        'accuracy': (true_positives + true_negatives) / total if total else None,
+    }
+
+
+def run_engine(name, fleet, ports=None, timeout=SOCKET_TIMEOUT, concurrency=DEFAULT_CONCURRENCY,
+               threads=DEFAULT_THREAD_COUNT, workers=0, quick_top_ports=100):
+    """
+    Run one scan engine against the fleet
+
+    Single-host engines scan the first fleet address; the sweep engines
+    scan every address.
+
+    Args:
+        name (str): Engine name (one of ENGINES)
+        fleet (ListenerFleet): Running listener fleet
+        ports (iterable): Contiguous port range to scan (defaults to all fleet ports)
+        timeout (float): Connect timeout (initial timeout with adaptive timing)
+        concurrency (int): Connects in flight for the async engines
+        threads (int): Threads for the threaded engine
+        workers (int): Processes for the multiprocess engine (0 means one per CPU core)
+        quick_top_ports (int): Ports scanned by quick_scan (the N most common)
+
+    Returns:
+        dict: Throughput, latency and accuracy figures
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    host = fleet.hosts[0]
+    ports = sorted(ports) if ports is not None else fleet.ports
+    sink = FindingsSink()
+    # Every engine records its connect attempts in these metrics
+    metrics = ScanMetrics(LATENCY_BUCKETS)
+
+    if name == 'threaded':
+        scanner = PortScanner(host, ports[0], ports[-1], thread_count=threads, sink=sink, timeout=timeout)
+        scanner.metrics = metrics
+        probed = [(host, port) for port in range(ports[0], ports[-1] + 1)]
+        run = scanner.scan
+    elif name == 'quick_scan':
+        quick_ports = top_ports(quick_top_ports)
+        probed = [(host, port) for port in quick_ports]
+
+        def run():
+            # quick_scan prints every open port
+            with contextlib.redirect_stdout(io.StringIO()):
+                for port, _ in quick_scan(host, top_ports=quick_top_ports, timeout=timeout,
+                                          metrics=metrics):
+                    sink.found.add((host, port))
+    elif name == 'async':
+        scanner = AsyncPortScanner(host, ports=ports, concurrency=concurrency, timeout=timeout,
+                                   sink=sink)
+        scanner.metrics = metrics
+        probed = [(host, port) for port in ports]
+        run = scanner.scan
+    elif name in ('sweep', 'multiprocess'):
+        targets = TargetSet(ipaddress.ip_network(address) for address in fleet.hosts)
+        scanner = SweepScanner(targets, ports=ports, concurrency=concurrency, timeout=timeout,
+                               sink=sink)
+        if name == 'multiprocess':
+            # Worker processes report with the same buckets and are merged in
+            scanner.metrics = ScanMetrics(LATENCY_BUCKETS)
+            scanner = MultiProcessScanner(scanner, workers)
+        scanner.metrics = metrics
+        probed = [(address, port) for address in fleet.hosts for port in ports]
+        run = scanner.scan
+    else:
+        raise ValueError(f"Unknown engine: {name}")
+
+    start = time.perf_counter()
+    run()
+    duration = time.perf_counter() - start
+    latency = probe_latency(metrics)
+
+    result = {
+        'engine': name,
+        'probes': len(probed),
+        'duration': duration,
+        'ports_per_sec': len(probed) / duration if duration else None,
+        'latency_p50': latency.quantile(0.50) if latency.count else None,
+        'latency_p99': latency.quantile(0.99) if latency.count else None,
+        'latency_samples': latency.count,
+    }
+    result.update(accuracy(fleet, probed, sink.found))
+    return result
+
+
+def run_benchmark(engines=None, hosts=4, ports=range(20000, 20500), open_ratio=0.1,
+                  blackhole_ratio=0.05, quick_top_ports=100, seed=0, **options):
+    """
+    Start a listener fleet and run the scan engines against it
+
+    Args:
+        engines (list): Engine names (defaults to all of ENGINES)
+        hosts (int): Loopback addresses in the fleet
+        ports (iterable): Fleet ports on every address
+        open_ratio (float): Share of fleet ports that accept
+        blackhole_ratio (float): Share of fleet ports that drop SYNs
+        quick_top_ports (int): Ports scanned by quick_scan (also bound on the fleet)
+        seed (int): Seed for the fleet layout
+        **options: Passed on to run_engine (timeout, concurrency, threads, workers)
+
+    Returns:
+        dict: Benchmark report (environment, fleet and one entry per engine)
+    """
+    engines = engines or ENGINES
+    ports = sorted(set(ports))
+    fleet_ports = set(ports)
+    if 'quick_scan' in engines:
+        fleet_ports.update(top_ports(quick_top_ports))
+
+    with ListenerFleet(hosts, fleet_ports, open_ratio, blackhole_ratio, seed=seed) as fleet:
+        results = [run_engine(name, fleet, ports, quick_top_ports=quick_top_ports, **options)
+                   for name in engines]
+        layout = fleet.describe()
+
+    return {
+        'timestamp': time.time(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'options': dict(options),
+        'fleet': layout,
+        'results': results,
+    }
+
+
+def save_report(report, path):
+    """
+    Write a benchmark report as JSON
+
+    Args:
+        report (dict): Report from run_benchmark()
+        path (str): Output file
+    """
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2)
+
+
+def load_report(path):
+    """
+    Read a benchmark report written by save_report()
+
+    Args:
+        path (str): Report file
+
+    Returns:
+        dict: The report
+    """
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _ms(value):
+    return f"{value * 1000:8.2f}" if value is not None else "       -"
+
+
+def format_report(report, baseline=None):
+    """
+    Format a benchmark report for display
+
+    Args:
+        report (dict): Report from run_benchmark()
+        baseline (dict): Earlier report to compare throughput against (optional)
+
+    Returns:
+        str: Formatted report string
+    """
+    fleet = report['fleet']
+    result = "\n--- Benchmark Results ---\n"
+    result += (f"Fleet: {len(fleet['hosts'])} hosts, {fleet[ACCEPT]} accepting, "
+               f"{fleet[REFUSE]} refusing, {fleet[BLACKHOLE]} black-holed ports\n\n")
+    result += f"{'Engine':<14}{'Probes':>8}{'Ports/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'Accuracy':>10}\n"
+
+    previous = {entry['engine']: entry for entry in (baseline or {}).get('results', [])}
+    for entry in report['results']:
+        score = f"{entry['accuracy'] * 100:9.1f}%" if entry['accuracy'] is not None else "        -"
+        result += (f"{entry['engine']:<14}{entry['probes']:>8}{entry['ports_per_sec']:>11.0f}"
+                   f"{_ms(entry['latency_p50']):>9}{_ms(entry['latency_p99']):>9}{score}")
+        old = previous.get(entry['engine'])
+        if old and old.get('ports_per_sec'):
+            change = (entry['ports_per_sec'] / old['ports_per_sec'] - 1) * 100
+            result += f"  ({change:+.1f}% vs baseline)"
+        result += "\n"
+
+    return result
@@ -0,0 +1,217 @@
+"""
+Checkpoint and resume support for long scans
+"""
+
+import bisect
+import json
+import os
+import time
+from config import CHECKPOINT_INTERVAL
+from .timing import OPEN
+from .work import PortRange, RangeSpace
+
+
+class IntervalSet:
+    """
+    Set of integers stored as sorted, merged half-open intervals
+
+    Work indices finish out of order, but they finish close to each other.
+    The set therefore stays a handful of intervals even after millions of
+    additions.
+    """
+
+    def __init__(self, intervals=()):
+        """
+        Initialize interval set
+
+        Args:
+            intervals (iterable): (start, stop) pairs, stop exclusive
+        """
+        self.starts = []
+        self.stops = []
+        for start, stop in intervals:
+            self.add(start, stop)
+
+    def add(self, start, stop=None):
+        """
+        Add the interval [start, stop), or the single value ``start``
+
+        Args:
+            start (int): First value
+            stop (int): One past the last value (defaults to start + 1)
+        """
+        if stop is None:
+            stop = start + 1
+        if stop <= start:
+            return
+
+        # Find every interval that overlaps or touches [start, stop)
+        first = bisect.bisect_left(self.stops, start)
+        last = bisect.bisect_right(self.starts, stop)
+        if first < last:
+            start = min(start, self.starts[first])
+            stop = max(stop, self.stops[last - 1])
+        self.starts[first:last] = [start]
+        self.stops[first:last] = [stop]
+
+    def __contains__(self, value):
+        position = bisect.bisect_right(self.starts, value) - 1
+        return position >= 0 and value < self.stops[position]
+
+    def __len__(self):
+        """Number of values in the set"""
+        return sum(stop - start for start, stop in zip(self.starts, self.stops))
+
+    def __iter__(self):
+        """Yield (start, stop) intervals"""
+        return zip(self.starts, self.stops)
+
+    def gaps(self, size):
+        """
+        Get the values in [0, size) that are not in the set
+
+        Args:
+            size (int): Size of the full index space
+
+        Returns:
+            RangeSpace: Missing values as a lazily indexed sequence
+        """
+        ranges = []
+        position = 0
+        for start, stop in self:
+            if start >= size:
+                break
+            if start > position:
+                ranges.append(PortRange(position, start - 1))
+            position = max(position, stop)
+        if position < size:
+            ranges.append(PortRange(position, size - 1))
+        return RangeSpace(ranges)
+
+
+class Checkpoint:
+    """
+    Periodically saved record of a scan's completed work and findings
+
+    The job description identifies the scan (targets, ports, probe order),
+    so a checkpoint is only resumed by the same scan. Completed work is
+    kept as merged index intervals and findings as (host, port, state),
+    which keeps the file small even for multi-hour sweeps.
+    """
+
+    def __init__(self, path, job, interval=CHECKPOINT_INTERVAL):
+        """
+        Initialize checkpoint
+
+        Args:
+            path (str): File the checkpoint is written to
+            job (dict): JSON-serializable description of the scan
+            interval (float): Minimum seconds between periodic saves
+        """
+        self.path = path
+        self.job = job
+        self.interval = interval
+        self.done = IntervalSet()
+        self.findings = []
+        self.complete = False
+        self._last_save = time.monotonic()
+
+    @classmethod
+    def load(cls, path, job, interval=CHECKPOINT_INTERVAL):
+        """
+        Load a checkpoint written for the same job
+
+        Args:
+            path (str): Checkpoint file
+            job (dict): Description of the scan being resumed
+            interval (float): Minimum seconds between periodic saves
+
+        Returns:
+            Checkpoint: Restored checkpoint, or an empty one if the file does not exist
+
+        Raises:
+            ValueError: If the file is corrupt or belongs to a different scan
+        """
+        checkpoint = cls(path, job, interval)
+        if not os.path.exists(path):
+            return checkpoint
+
+        try:
+            with open(path) as handle:
+                data = json.load(handle)
+        except ValueError:
+            raise ValueError(f"Corrupt checkpoint file: {path}")
+        if not isinstance(data, dict):
+            raise ValueError(f"Corrupt checkpoint file: {path}")
+
+        if data.get('job') != job:
+            raise ValueError(f"Checkpoint {path} was written for a different scan")
+
+        checkpoint.done = IntervalSet(data.get('done', []))
+        checkpoint.findings = [tuple(finding) for finding in data.get('findings', [])]
+        checkpoint.complete = data.get('complete', False)
+        return checkpoint
+
+    @staticmethod
+    def saved_job(path):
+        """
+        Read the job description stored in a checkpoint file
+
+        Args:
+            path (str): Checkpoint file
+
+        Returns:
+            dict: Stored job, or None if the file is missing or corrupt
+        """
+        try:
+            with open(path) as handle:
+                return json.load(handle).get('job')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def mark_done(self, index):
+        """
+        Record one finished work index
+
+        Args:
+            index (int): Work index
+        """
+        self.done.add(index)
+
+    def add_finding(self, host, port, state=OPEN):
+        """
+        Record an open port
+
+        Args:
+            host (str): Target IP address
+            port (int): Open port number
+            state (str): Reported state (OPEN, or OPEN_FILTERED for UDP)
+        """
+        self.findings.append((host, port, state))
+
+    def maybe_save(self):
+        """Save if at least ``interval`` seconds passed since the last save"""
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def save(self, complete=None):
+        """
+        Write the checkpoint atomically
+
+        Args:
+            complete (bool): Mark the job as finished (unchanged if None)
+        """
+        if complete is not None:
+            self.complete = complete
+
+        data = {
+            'job': self.job,
+            'done': [[start, stop] for start, stop in self.done],
+            'findings': [list(finding) for finding in self.findings],
+            'complete': self.complete,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as handle:
+            json.dump(data, handle, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+        self._last_save = time.monotonic()
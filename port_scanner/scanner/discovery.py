@@ -0,0 +1,263 @@
+"""
+Host discovery: find live hosts before enumerating their ports
+"""
+
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+from config import DISCOVERY_PORTS, DISCOVERY_TIMEOUT, DISCOVERY_CONCURRENCY, DISCOVERY_ICMP
+from .async_scanner import address_family, tcp_connect
+from .resources import ResourceGovernor
+from .sweep import TargetSet, host_sort_key
+from .timing import OPEN, CLOSED
+
+# ICMP echo request/reply types for IPv4 and IPv6
+ICMP_ECHO_REQUEST = {socket.AF_INET: 8, socket.AF_INET6: 128}
+ICMP_ECHO_REPLY = {socket.AF_INET: 0, socket.AF_INET6: 129}
+ICMP_PROTOCOL = {socket.AF_INET: socket.IPPROTO_ICMP,
+                 socket.AF_INET6: getattr(socket, 'IPPROTO_ICMPV6', 58)}
+
+_ICMP_HEADER = struct.Struct('!BBHHH')
+
+
+def icmp_checksum(data):
+    """
+    Compute the Internet checksum (RFC 1071) of an ICMP message
+
+    Args:
+        data (bytes): Message with a zero checksum field
+
+    Returns:
+        int: 16-bit checksum
+    """
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def icmp_echo_request(family, sequence, payload=b'port-scanner'):
+    """
+    Build an ICMP echo request
+
+    The identifier is left at zero: unprivileged ICMP sockets replace it
+    with their own and route replies by it.
+
+    Args:
+        family (int): socket.AF_INET or socket.AF_INET6
+        sequence (int): Sequence number
+        payload (bytes): Echo data
+
+    Returns:
+        bytes: ICMP message
+    """
+    message_type = ICMP_ECHO_REQUEST[family]
+    header = _ICMP_HEADER.pack(message_type, 0, 0, 0, sequence & 0xffff)
+    checksum = icmp_checksum(header + payload) if family == socket.AF_INET else 0
+    return _ICMP_HEADER.pack(message_type, 0, checksum, 0, sequence & 0xffff) + payload
+
+
+class HostDiscovery:
+    """
+    Concurrent host discovery
+
+    A host counts as alive as soon as any probe gets an answer: a TCP
+    connect to one of the probe ports that succeeds or is refused, or an
+    ICMP echo reply. ICMP uses unprivileged datagram ICMP sockets, so it
+    needs no root; where the OS does not allow them (e.g. Linux outside
+    net.ipv4.ping_group_range), only the TCP probes are sent.
+    """
+
+    def __init__(self, ports=DISCOVERY_PORTS, timeout=DISCOVERY_TIMEOUT,
+                 concurrency=DISCOVERY_CONCURRENCY, icmp=DISCOVERY_ICMP, rate_limiter=None):
+        """
+        Initialize host discovery
+
+        Args:
+            ports (list): TCP ports to probe on every host
+            timeout (float): Seconds to wait for any sign of life
+            concurrency (int): Hosts probed at once
+            icmp (bool): Also send ICMP echo requests where possible
+            rate_limiter (RateLimiter): Probe-rate ceiling for every connect and echo request (optional)
+        """
+        self.ports = list(ports)
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.icmp = icmp
+        self.rate_limiter = rate_limiter
+        self.live_hosts = []
+        self.governor = ResourceGovernor()
+        self._icmp_available = {}
+        self._sequence = os.getpid() & 0xffff
+
+    def icmp_available(self, family):
+        """
+        Check whether unprivileged ICMP sockets work for an address family
+
+        Args:
+            family (int): socket.AF_INET or socket.AF_INET6
+
+        Returns:
+            bool: True if ICMP echo probes can be sent
+        """
+        available = self._icmp_available.get(family)
+        if available is None:
+            try:
+                socket.socket(family, socket.SOCK_DGRAM, ICMP_PROTOCOL[family]).close()
+                available = True
+            except OSError:
+                available = False
+            self._icmp_available[family] = available
+        return available
+
+    async def tcp_alive(self, host, port):
+        """
+        Probe one TCP port for a sign of life
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+
+        Returns:
+            bool: True if the connect succeeded or was refused
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(host)
+        return await self.governor.run(tcp_connect, host, port, self.timeout) in (OPEN, CLOSED)
+
+    async def icmp_alive(self, host):
+        """
+        Send one ICMP echo request and wait for the reply
+
+        Args:
+            host (str): Target IP address
+
+        Returns:
+            bool: True if an echo reply arrived in time
+        """
+        family = address_family(host)
+        loop = asyncio.get_running_loop()
+        self._sequence += 1
+        try:
+            sock = socket.socket(family, socket.SOCK_DGRAM, ICMP_PROTOCOL[family])
+        except OSError:
+            return False
+
+        sock.setblocking(False)
+        try:
+            # Connecting filters out replies from other hosts
+            sock.connect((host, 0))
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(host)
+            await loop.sock_sendall(sock, icmp_echo_request(family, self._sequence))
+            while True:
+                reply = await asyncio.wait_for(loop.sock_recv(sock, 1024), self.timeout)
+                # Some platforms hand over the IPv4 header as well
+                if family == socket.AF_INET and reply and reply[0] >> 4 == 4:
+                    reply = reply[(reply[0] & 0x0f) * 4:]
+                if reply and reply[0] == ICMP_ECHO_REPLY[family]:
+                    return True
+        except (OSError, asyncio.TimeoutError):
+            return False
+        finally:
+            sock.close()
+
+    async def alive(self, host):
+        """
+        Check whether a host is alive, stopping at the first answer
+
+        Args:
+            host (str): Target IP address
+
+        Returns:
+            bool: True if any probe was answered
+        """
+        probes = [asyncio.ensure_future(self.tcp_alive(host, port)) for port in self.ports]
+        if self.icmp and self.icmp_available(address_family(host)):
+            probes.append(asyncio.ensure_future(self.icmp_alive(host)))
+
+        try:
+            for probe in asyncio.as_completed(probes):
+                if await probe:
+                    return True
+            return False
+        finally:
+            for probe in probes:
+                probe.cancel()
+
+    async def worker(self, hosts):
+        """
+        Worker coroutine
+
+        Args:
+            hosts (iterator): Host iterator shared by all workers
+        """
+        for host in hosts:
+            if await self.alive(host):
+                self.live_hosts.append(host)
+
+    async def discover_async(self, targets):
+        """
+        Find the live hosts among the targets
+
+        Args:
+            targets (iterable): Host addresses (e.g. a TargetSet)
+
+        Returns:
+            list: Live host addresses, sorted
+        """
+        self.live_hosts = []
+        self.governor.reset()
+        hosts = iter(targets)
+        await asyncio.gather(*(self.worker(hosts) for _ in range(self.concurrency)))
+        self.live_hosts.sort(key=host_sort_key)
+        return self.live_hosts
+
+    def discover(self, targets):
+        """
+        Find the live hosts among the targets
+
+        Args:
+            targets (iterable): Host addresses (e.g. a TargetSet)
+
+        Returns:
+            list: Live host addresses, sorted
+        """
+        return asyncio.run(self.discover_async(targets))
+
+
+def live_targets(hosts):
+    """
+    Build a TargetSet from individual host addresses
+
+    Args:
+        hosts (list): Host addresses
+
+    Returns:
+        TargetSet: One single-address network per host
+    """
+    return TargetSet(ipaddress.ip_network(host) for host in hosts)
+
+
+def discover_hosts(targets, ports=DISCOVERY_PORTS, timeout=DISCOVERY_TIMEOUT,
+                   concurrency=DISCOVERY_CONCURRENCY, icmp=DISCOVERY_ICMP, rate_limiter=None):
+    """
+    Run host discovery and return the live hosts as a target set
+
+    Args:
+        targets (TargetSet): Hosts to check
+        ports (list): TCP ports to probe on every host
+        timeout (float): Seconds to wait for any sign of life
+        concurrency (int): Hosts probed at once
+        icmp (bool): Also send ICMP echo requests where possible
+        rate_limiter (RateLimiter): Probe-rate ceiling (optional)
+
+    Returns:
+        TargetSet: Live hosts
+    """
+    discovery = HostDiscovery(ports, timeout, min(concurrency, max(1, len(targets))), icmp, rate_limiter)
+    return live_targets(discovery.discover(targets))
@@ -0,0 +1,488 @@
+"""
+Probe-level scan metrics: latency histograms, outcome and errno counters,
+concurrency gauges, a Prometheus endpoint and a periodic log line
+"""
+
+import bisect
+import errno
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import METRICS_LATENCY_BUCKETS, METRICS_BIND_ADDRESS
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def errno_name(code):
+    """
+    Get the symbolic name of an errno value
+
+    Args:
+        code (int): errno value
+
+    Returns:
+        str: Name such as ECONNREFUSED, or the number if it has no name
+    """
+    return errno.errorcode.get(code, str(code))
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram in the Prometheus layout
+
+    ``counts[i]`` holds the observations in ``(bounds[i-1], bounds[i]]``;
+    the last slot holds everything above the highest bound.
+    """
+
+    __slots__ = ('bounds', 'counts', 'count', 'total')
+
+    def __init__(self, bounds=METRICS_LATENCY_BUCKETS):
+        """
+        Initialize histogram
+
+        Args:
+            bounds (sequence): Ascending bucket upper bounds
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, state):
+        """
+        Add the observations of another histogram
+
+        Args:
+            state (list): Bucket counts followed by the sum, as returned by state()
+        """
+        for index, count in enumerate(state[:-1]):
+            self.counts[index] += count
+        self.count += sum(state[:-1])
+        self.total += state[-1]
+
+    def state(self):
+        """
+        Get the histogram as plain data
+
+        Returns:
+            list: Bucket counts followed by the sum of all observations
+        """
+        return self.counts + [self.total]
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by interpolating within its bucket
+
+        Args:
+            q (float): Quantile in [0, 1]
+
+        Returns:
+            float: Estimated value (0.0 if the histogram is empty)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    return low
+                return low + (self.bounds[index] - low) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class ScanMetrics:
+    """
+    Live instrumentation of one scan
+
+    Engines report every connect attempt: probe_started() when the socket
+    starts connecting and probe_finished() with its outcome, latency and
+    errno. The metrics also track finished work items, the work still
+    waiting and the findings waiting for the sink. Together they show
+    where a slow scan is limited:
+
+    - in flight close to the concurrency and high latencies or many
+      timeouts: the network or the target
+    - in flight well below the concurrency while work is pending: the
+      scanner itself (per-host windows, the socket budget or the CPU)
+    - a growing result queue: the output sinks
+
+    Updates take a lock, so the threaded engine can share one instance
+    across its threads. Metrics of worker processes are merged in with
+    update_shard().
+    """
+
+    def __init__(self, buckets=METRICS_LATENCY_BUCKETS):
+        """
+        Initialize scan metrics
+
+        Args:
+            buckets (sequence): Latency histogram bucket bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.start(0)
+
+    def start(self, total, completed=0, queue=None):
+        """
+        Reset the metrics at the start of a scan
+
+        Args:
+            total (int): Work items in the scan
+            completed (int): Work items already done (when resuming)
+            queue: Result queue whose depth is reported (anything with qsize())
+        """
+        with self.lock:
+            self.started = time.monotonic()
+            self.finished = None
+            self.total = total
+            self.completed = completed
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.outcomes = Counter()
+            self.errnos = Counter()
+            self.latency = {}
+            self.queue = queue
+            self._shards = {}
+
+    def __getstate__(self):
+        # Scanners are copied into worker processes; locks and queues stay behind
+        state = self.__dict__.copy()
+        del state['lock']
+        state['queue'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def probe_started(self):
+        """Count a connect attempt that is now in flight"""
+        with self.lock:
+            self.in_flight += 1
+            if self.in_flight > self.peak_in_flight:
+                self.peak_in_flight = self.in_flight
+
+    def probe_finished(self, outcome, latency, code=None):
+        """
+        Record the end of a connect attempt started with probe_started()
+
+        Args:
+            outcome (str): Probe outcome (None if the attempt was cancelled)
+            latency (float): Seconds the attempt took
+            code (int): errno of a failed attempt (optional)
+        """
+        with self.lock:
+            self.in_flight -= 1
+            if outcome is None:
+                return
+            self.outcomes[outcome] += 1
+            histogram = self.latency.get(outcome)
+            if histogram is None:
+                histogram = self.latency[outcome] = Histogram(self.buckets)
+            histogram.observe(latency)
+            if code:
+                self.errnos[errno_name(code)] += 1
+
+    def probe_failed(self, outcome, code=None):
+        """
+        Record an attempt that failed before connecting (e.g. socket() failed)
+
+        Args:
+            outcome (str): Probe outcome
+            code (int): errno of the failure (optional)
+        """
+        with self.lock:
+            self.outcomes[outcome] += 1
+            if code:
+                self.errnos[errno_name(code)] += 1
+
+    def finish(self):
+        """Stop the clock: rates and elapsed time refer to the finished scan"""
+        self.finished = time.monotonic()
+
+    def elapsed(self):
+        """
+        Get the scan's running time
+
+        Returns:
+            float: Seconds since start(), up to finish() once the scan is done
+        """
+        return (self.finished or time.monotonic()) - self.started
+
+    def item_done(self):
+        """Count a finished work item (one port on one host, retries included)"""
+        with self.lock:
+            self.completed += 1
+
+    def queue_depth(self):
+        try:
+            return self.queue.qsize() if self.queue is not None else 0
+        except (AttributeError, NotImplementedError):
+            return 0
+
+    def state(self):
+        """
+        Get the metrics as plain data, for sending to another process
+
+        Returns:
+            dict: Counters, gauges and histogram buckets
+        """
+        with self.lock:
+            return {
+                'total': self.total,
+                'completed': self.completed,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'queue': self.queue_depth(),
+                'outcomes': dict(self.outcomes),
+                'errnos': dict(self.errnos),
+                'latency': {outcome: histogram.state() for outcome, histogram in self.latency.items()},
+            }
+
+    def update_shard(self, index, state):
+        """
+        Store the latest metrics of a worker process
+
+        Args:
+            index (int): Worker index
+            state (dict): The worker's state()
+        """
+        with self.lock:
+            self._shards[index] = state
+
+    def combined(self):
+        """
+        Merge these metrics with those of the worker processes
+
+        Returns:
+            dict: state() layout, with Histogram objects for latencies
+        """
+        states = [self.state()]
+        with self.lock:
+            states.extend(self._shards.values())
+
+        merged = {'total': states[0]['total'], 'completed': 0, 'in_flight': 0, 'peak_in_flight': 0,
+                  'queue': 0, 'outcomes': Counter(), 'errnos': Counter(), 'latency': {}}
+        for state in states:
+            for key in ('completed', 'in_flight', 'peak_in_flight', 'queue'):
+                merged[key] += state[key]
+            merged['outcomes'].update(state['outcomes'])
+            merged['errnos'].update(state['errnos'])
+            for outcome, buckets in state['latency'].items():
+                histogram = merged['latency'].get(outcome)
+                if histogram is None:
+                    histogram = merged['latency'][outcome] = Histogram(self.buckets)
+                histogram.merge(buckets)
+        return merged
+
+    def snapshot(self):
+        """
+        Get a summary of the scan so far
+
+        Returns:
+            dict: elapsed, probes, rate, outcomes, errnos, work and
+                concurrency gauges, and p50/p90/p99 latency per outcome
+        """
+        state = self.combined()
+        elapsed = self.elapsed()
+        probes = sum(state['outcomes'].values())
+        return {
+            'elapsed': elapsed,
+            'probes': probes,
+            'rate': probes / elapsed if elapsed > 0 else 0.0,
+            'outcomes': dict(state['outcomes']),
+            'errnos': dict(state['errnos']),
+            'total': state['total'],
+            'completed': state['completed'],
+            'pending': max(0, state['total'] - state['completed'] - state['in_flight']),
+            'in_flight': state['in_flight'],
+            'peak_in_flight': state['peak_in_flight'],
+            'queue_depth': state['queue'],
+            'latency': {outcome: {'count': histogram.count,
+                                  'mean': histogram.total / histogram.count if histogram.count else 0.0,
+                                  'p50': histogram.quantile(0.5),
+                                  'p90': histogram.quantile(0.9),
+                                  'p99': histogram.quantile(0.99)}
+                        for outcome, histogram in sorted(state['latency'].items())},
+        }
+
+    def prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        state = self.combined()
+        lines = [
+            "# HELP portscan_probes_total Connect attempts by outcome.",
+            "# TYPE portscan_probes_total counter",
+        ]
+        for outcome, count in sorted(state['outcomes'].items()):
+            lines.append(f'portscan_probes_total{{outcome="{outcome}"}} {count}')
+
+        lines += [
+            "# HELP portscan_probe_errors_total Failed connect attempts by errno.",
+            "# TYPE portscan_probe_errors_total counter",
+        ]
+        for name, count in sorted(state['errnos'].items()):
+            lines.append(f'portscan_probe_errors_total{{errno="{name}"}} {count}')
+
+        lines += [
+            "# HELP portscan_probe_latency_seconds Connect attempt duration by outcome.",
+            "# TYPE portscan_probe_latency_seconds histogram",
+        ]
+        for outcome, histogram in sorted(state['latency'].items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'portscan_probe_latency_seconds_bucket{{outcome="{outcome}",le="{bound:g}"}} '
+                             f'{cumulative}')
+            lines.append(f'portscan_probe_latency_seconds_bucket{{outcome="{outcome}",le="+Inf"}} '
+                         f'{histogram.count}')
+            lines.append(f'portscan_probe_latency_seconds_sum{{outcome="{outcome}"}} {histogram.total:.6f}')
+            lines.append(f'portscan_probe_latency_seconds_count{{outcome="{outcome}"}} {histogram.count}')
+
+        pending = max(0, state['total'] - state['completed'] - state['in_flight'])
+        for name, kind, help_text, value in (
+                ('portscan_in_flight', 'gauge', 'Connect attempts in flight.', state['in_flight']),
+                ('portscan_in_flight_peak', 'gauge', 'Most connect attempts in flight at once.',
+                 state['peak_in_flight']),
+                ('portscan_work_items', 'gauge', 'Work items (host, port pairs) in the scan.', state['total']),
+                ('portscan_work_completed_total', 'counter', 'Work items finished.', state['completed']),
+                ('portscan_work_pending', 'gauge', 'Work items not yet started.', pending),
+                ('portscan_result_queue_depth', 'gauge', 'Findings waiting for the output sinks.',
+                 state['queue']),
+                ('portscan_elapsed_seconds', 'gauge', 'Seconds since the scan started.',
+                 round(self.elapsed(), 3))):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def log_line(self):
+        """
+        Summarize the metrics in one line
+
+        Returns:
+            str: Log line
+        """
+        snapshot = self.snapshot()
+        outcomes = snapshot['outcomes']
+        latency = snapshot['latency']
+        answered = [latency[outcome] for outcome in ('open', 'closed') if outcome in latency]
+        p50 = max((entry['p50'] for entry in answered), default=0.0)
+        p99 = max((entry['p99'] for entry in answered), default=0.0)
+        errors = ", ".join(f"{name}={count}" for name, count in sorted(snapshot['errnos'].items()))
+        return (f"[metrics] {snapshot['completed']}/{snapshot['total']} done, "
+                f"{snapshot['rate']:.0f} probes/s, in flight {snapshot['in_flight']} "
+                f"(peak {snapshot['peak_in_flight']}), pending {snapshot['pending']}, "
+                f"queue {snapshot['queue_depth']}, open {outcomes.get('open', 0)} "
+                f"closed {outcomes.get('closed', 0)} timeout {outcomes.get('timeout', 0)} "
+                f"error {outcomes.get('error', 0)}, reply p50 {p50 * 1000:.1f}ms p99 {p99 * 1000:.1f}ms"
+                + (f", errno {errors}" if errors else ""))
+
+
+class MetricsReporter:
+    """
+    Background thread that prints the metrics log line periodically
+    """
+
+    def __init__(self, metrics, interval, stream=None):
+        """
+        Initialize metrics reporter
+
+        Args:
+            metrics (ScanMetrics): Metrics to report
+            interval (float): Seconds between log lines
+            stream: File to write to (defaults to sys.stderr)
+        """
+        self.metrics = metrics
+        self.interval = interval
+        self.stream = stream
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.report()
+
+    def report(self):
+        """Write one log line"""
+        print(self.metrics.log_line(), file=self.stream or sys.stderr, flush=True)
+
+    def stop(self):
+        """Stop the thread and write a final line"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.report()
+
+
+class MetricsServer:
+    """
+    HTTP endpoint serving the metrics while a scan runs
+
+    ``/metrics`` returns the Prometheus text format and ``/metrics.json``
+    the snapshot() dictionary.
+    """
+
+    def __init__(self, metrics, port, address=METRICS_BIND_ADDRESS):
+        """
+        Initialize metrics server
+
+        Args:
+            metrics (ScanMetrics): Metrics to serve (may be replaced while running)
+            port (int): TCP port to listen on (0 picks a free port)
+            address (str): Address to bind to
+        """
+        self.metrics = metrics
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body, content_type = server.metrics.prometheus(), PROMETHEUS_CONTENT_TYPE
+                elif path == '/metrics.json':
+                    body, content_type = json.dumps(server.metrics.snapshot()), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((address, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,482 @@
+"""
+Continuous monitoring: incremental rescans that report only changes
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from collections import namedtuple
+from config import (DEFAULT_CONCURRENCY, SOCKET_TIMEOUT, ADAPTIVE_TIMING, MONITOR_RATE,
+                    MONITOR_INTERVAL, MONITOR_COLD_SHARE, MONITOR_VOLATILITY_DECAY,
+                    MONITOR_VOLATILE_THRESHOLD)
+from .async_scanner import AsyncPortScanner
+from .metrics import ScanMetrics
+from .rate_limit import RateLimiter
+from .result_store import PortChange
+from .service_identifier import identify_service
+from .sinks import NullSink
+from .sweep import SweepScanner, InterleavedSpace, host_sort_key
+from .writers import timestamp
+
+# Summary of one monitoring cycle
+CycleReport = namedtuple('CycleReport', ['cycle', 'hot', 'cold', 'changes', 'duration',
+                                         'coverage', 'sweeps', 'open'])
+
+
+class PairScanner(SweepScanner):
+    """
+    Async scanner for an explicit list of (host, port) pairs
+
+    Every probed pair is recorded in ``probed``, so a stopped scan tells
+    which pairs it actually covered.
+    """
+
+    def __init__(self, pairs, concurrency=DEFAULT_CONCURRENCY, timeout=SOCKET_TIMEOUT,
+                 adaptive=ADAPTIVE_TIMING, sink=None, protocol='tcp', rate_limiter=None):
+        """
+        Initialize pair scanner
+
+        Args:
+            pairs (list): (host, port) tuples in probe order
+            concurrency (int): Maximum number of connects in flight
+            timeout (float): Connect timeout in seconds
+            adaptive (bool): Use per-host RTT-based timeouts and windows
+            sink (ScanSink): Receives progress and findings (defaults to NullSink)
+            protocol (str): "tcp" for connect scans, "udp" for UDP probes
+            rate_limiter (RateLimiter): Probe-rate ceiling (optional)
+        """
+        AsyncPortScanner.__init__(self, None, concurrency=concurrency, timeout=timeout,
+                                  adaptive=adaptive, sink=sink if sink is not None else NullSink(),
+                                  ports=sorted({port for _, port in pairs}) or [1], protocol=protocol)
+        self.pairs = list(pairs)
+        self.seed = None
+        self.rate_limiter = rate_limiter
+        self.probed = []
+        self.total_ports = len(self.pairs)
+        self.concurrency = max(1, min(concurrency, self.total_ports))
+        self.progress_step = max(100, self.total_ports // 100)
+
+    def describe_target(self):
+        hosts = len({host for host, _ in self.pairs})
+        return f"{len(self.pairs)} ports on {hosts} hosts"
+
+    def scope(self):
+        return sorted({host for host, _ in self.pairs}, key=host_sort_key)
+
+    def job(self):
+        raise ValueError("Monitoring cycles cannot be checkpointed")
+
+    def pair_at(self, index):
+        return self.pairs[index]
+
+    async def probe_item(self, index, host, port, results):
+        await super().probe_item(index, host, port, results)
+        self.probed.append(index)
+
+
+class MonitorState:
+    """
+    What the monitor knows between cycles
+
+    Holds the open ports, a volatility score for every port that changed
+    state, the position of the cold rotation in the (host, port) space and
+    the number of completed rotations. A port's score grows by one each
+    time it changes and decays by ``MONITOR_VOLATILITY_DECAY`` each time it
+    is rescanned unchanged; ports above ``MONITOR_VOLATILE_THRESHOLD`` are
+    rescanned every cycle with the open ones.
+    """
+
+    def __init__(self, path=None, job=None, seed=None):
+        """
+        Initialize monitor state
+
+        Args:
+            path (str): JSON file the state is saved to (memory only if None)
+            job (dict): Description of the monitored targets and ports
+            seed (int): Seed of the cold rotation order (random if None)
+        """
+        self.path = path
+        self.job = job
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.cycle = 0
+        self.cursor = 0
+        self.sweeps = 0
+        self.open = {}
+        self.volatility = {}
+
+    @classmethod
+    def load(cls, path, job):
+        """
+        Load the state of an earlier run over the same targets
+
+        Args:
+            path (str): State file
+            job (dict): Description of the monitored targets and ports
+
+        Returns:
+            MonitorState: Restored state, or a new one if the file does not exist
+
+        Raises:
+            ValueError: If the file is corrupt or belongs to different targets
+        """
+        state = cls(path, job)
+        if not os.path.exists(path):
+            return state
+
+        try:
+            with open(path) as handle:
+                data = json.load(handle)
+        except ValueError:
+            raise ValueError(f"Corrupt monitor state file: {path}")
+        if not isinstance(data, dict):
+            raise ValueError(f"Corrupt monitor state file: {path}")
+        if data.get('job') != job:
+            raise ValueError(f"Monitor state {path} was written for different targets or ports")
+
+        state.seed = data['seed']
+        state.cycle = data.get('cycle', 0)
+        state.cursor = data.get('cursor', 0)
+        state.sweeps = data.get('sweeps', 0)
+        state.open = {host: set(ports) for host, ports in data.get('open', {}).items()}
+        state.volatility = {host: {int(port): score for port, score in ports.items()}
+                            for host, ports in data.get('volatility', {}).items()}
+        return state
+
+    def save(self):
+        """Write the state atomically, if it has a file"""
+        if not self.path:
+            return
+        data = {
+            'job': self.job,
+            'seed': self.seed,
+            'cycle': self.cycle,
+            'cursor': self.cursor,
+            'sweeps': self.sweeps,
+            'open': {host: sorted(ports) for host, ports in self.open.items() if ports},
+            'volatility': {host: {str(port): round(score, 4) for port, score in ports.items()}
+                           for host, ports in self.volatility.items() if ports},
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as handle:
+            json.dump(data, handle, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def is_open(self, host, port):
+        return port in self.open.get(host, ())
+
+    def open_count(self):
+        """
+        Count the known open ports
+
+        Returns:
+            int: Open (host, port) pairs
+        """
+        return sum(len(ports) for ports in self.open.values())
+
+    def hot_pairs(self):
+        """
+        Get the pairs to rescan every cycle
+
+        Returns:
+            list: (host, port) tuples, most volatile first, then the other open ports
+        """
+        volatile = [(score, host, port) for host, ports in self.volatility.items()
+                    for port, score in ports.items() if score >= MONITOR_VOLATILE_THRESHOLD]
+        volatile.sort(key=lambda item: -item[0])
+        pairs = [(host, port) for _, host, port in volatile]
+        seen = set(pairs)
+        for host in sorted(self.open, key=host_sort_key):
+            for port in sorted(self.open[host]):
+                if (host, port) not in seen:
+                    pairs.append((host, port))
+        return pairs
+
+    def update(self, host, port, is_open):
+        """
+        Record the outcome of one probe
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+            is_open (bool): Whether the port answered as open
+
+        Returns:
+            str: "opened" or "closed" if the port changed state, else None
+        """
+        was_open = self.is_open(host, port)
+        scores = self.volatility.get(host)
+        score = scores.get(port, 0.0) if scores else 0.0
+        if is_open == was_open:
+            if score:
+                score *= MONITOR_VOLATILITY_DECAY
+                if score < MONITOR_VOLATILE_THRESHOLD:
+                    del scores[port]
+                else:
+                    scores[port] = score
+            return None
+
+        if is_open:
+            self.open.setdefault(host, set()).add(port)
+        else:
+            self.open[host].discard(port)
+        # A port found open in the first rotation was never seen closed
+        if self.sweeps == 0 and is_open and not score:
+            return None
+        self.volatility.setdefault(host, {})[port] = score + 1.0
+        return 'opened' if is_open else 'closed'
+
+
+class MonitorSink:
+    """
+    Base class for monitor output: change events and cycle reports
+    """
+
+    def change(self, change, when):
+        """
+        Called for every port that opened or closed
+
+        Args:
+            change (PortChange): The change
+            when (float): Time the change was seen (seconds since the epoch)
+        """
+
+    def cycle(self, report):
+        """
+        Called after every cycle
+
+        Args:
+            report (CycleReport): What the cycle did
+        """
+
+    def close(self):
+        """Release any resources held by the sink"""
+
+
+class ConsoleMonitorSink(MonitorSink):
+    """
+    Prints changes and a one-line report per cycle
+    """
+
+    def change(self, change, when):
+        marker = '+' if change.change == 'opened' else '-'
+        print(f"{timestamp(when)} {marker} {change.host}:{change.port} {change.change} ({change.service})")
+
+    def cycle(self, report):
+        print(f"{timestamp()} cycle {report.cycle}: {report.hot} hot + {report.cold} cold probes "
+              f"in {report.duration:.1f}s, {report.changes} changes, {report.open} open, "
+              f"rotation {report.coverage:.1%} (completed {report.sweeps})")
+
+
+class ChangeLog(MonitorSink):
+    """
+    Appends change events to a JSON Lines file
+    """
+
+    def __init__(self, path):
+        """
+        Initialize change log
+
+        Args:
+            path (str): Output file (appended to, so it spans restarts)
+        """
+        self.path = path
+        self.handle = open(path, 'a', encoding='utf-8')
+
+    def change(self, change, when):
+        self.handle.write(json.dumps({'time': timestamp(when), **change._asdict()}) + '\n')
+
+    def cycle(self, report):
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+
+class Monitor:
+    """
+    Daemon that keeps a target range under continuous watch
+
+    Every cycle spends a probe budget of ``rate * interval``. Known-open
+    and volatile ports (see MonitorState) are rescanned first; the rest of
+    the budget, and at least ``MONITOR_COLD_SHARE`` of it, continues a slow
+    rotation through the full (host, port) space in interleaved order.
+    Only changes are reported. The state is saved after every cycle, so a
+    restarted monitor continues where it stopped.
+    """
+
+    def __init__(self, targets, ports, rate=MONITOR_RATE, interval=MONITOR_INTERVAL, state=None,
+                 sinks=None, concurrency=DEFAULT_CONCURRENCY, timeout=SOCKET_TIMEOUT,
+                 adaptive=ADAPTIVE_TIMING, protocol='tcp', rate_limiter=None):
+        """
+        Initialize monitor
+
+        Args:
+            targets (TargetSet): Hosts to watch
+            ports (PortSpace): Ports to watch on every host
+            rate (float): Probes per second
+            interval (float): Seconds per cycle
+            state (MonitorState): State to continue from (a new in-memory one if None)
+            sinks (list): MonitorSink objects receiving changes and reports
+            concurrency (int): Maximum number of connects in flight
+            timeout (float): Connect timeout in seconds
+            adaptive (bool): Use per-host RTT-based timeouts and windows
+            protocol (str): "tcp" for connect scans, "udp" for UDP probes
+            rate_limiter (RateLimiter): Pacing of the probes (defaults to a global limit of ``rate``)
+        """
+        self.targets = targets
+        self.ports = ports
+        self.rate = rate
+        self.interval = interval
+        self.state = state if state is not None else MonitorState(job=self.job(targets, ports, protocol))
+        self.sinks = list(sinks or [])
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.protocol = protocol
+        self.space = InterleavedSpace(targets, ports, self.state.seed)
+        # Shared by all cycles, so the pace carries over from one to the next
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(rate)
+        # Shared by every cycle's scanner; reset at the start of each cycle
+        self.metrics = ScanMetrics()
+        self.scanner = None
+        self._stopped = False
+
+    @staticmethod
+    def job(targets, ports, protocol='tcp'):
+        """
+        Describe what is monitored, for matching saved state
+
+        Args:
+            targets (TargetSet): Hosts to watch
+            ports (PortSpace): Ports to watch
+            protocol (str): "tcp" or "udp"
+
+        Returns:
+            dict: JSON-serializable description
+        """
+        return {'kind': 'monitor', 'targets': str(targets), 'ports': str(ports), 'protocol': protocol}
+
+    def budget(self):
+        """
+        Get the number of probes per cycle
+
+        Returns:
+            int: Probe budget
+        """
+        return max(1, int(self.rate * self.interval))
+
+    def plan(self):
+        """
+        Choose the pairs for the next cycle
+
+        Returns:
+            tuple: (hot pairs, cold pairs); cold pairs start at the rotation cursor
+        """
+        budget = self.budget()
+        hot = self.state.hot_pairs()
+        room = budget - min(budget, max(1, int(budget * MONITOR_COLD_SHARE)))
+        if len(hot) > room:
+            # Rotate through the hot set when it does not fit in one cycle
+            start = self.state.cycle * room % len(hot)
+            hot = (hot[start:] + hot[:start])[:room]
+
+        size = len(self.space)
+        cold = [self.space[(self.state.cursor + step) % size]
+                for step in range(min(budget - len(hot), size))]
+        return hot, cold
+
+    def stop(self):
+        """
+        Stop after the probes in flight; the partial cycle is still recorded
+
+        Safe to call from a signal handler.
+        """
+        self._stopped = True
+        if self.scanner is not None:
+            self.scanner.stop()
+
+    def emit_change(self, change, when):
+        for sink in self.sinks:
+            sink.change(change, when)
+
+    async def run_cycle(self):
+        """
+        Run one cycle and update the state
+
+        Returns:
+            CycleReport: What the cycle did
+        """
+        start = time.monotonic()
+        hot, cold = self.plan()
+        pairs = hot + cold
+        self.scanner = PairScanner(pairs, self.concurrency, self.timeout, self.adaptive,
+                                   protocol=self.protocol, rate_limiter=self.rate_limiter)
+        self.scanner.metrics = self.metrics
+        if self._stopped:
+            self.scanner.stop()
+        await self.scanner.scan_async()
+        found = {(host, port) for host, port, _, _ in self.scanner.open_ports}
+        probed = sorted(self.scanner.probed)
+        self.scanner = None
+
+        now = time.time()
+        changes = 0
+        for index in probed:
+            host, port = pairs[index]
+            change = self.state.update(host, port, (host, port) in found)
+            if change is not None:
+                changes += 1
+                self.emit_change(PortChange(host, port, change, identify_service(port, self.protocol)), now)
+
+        # The cursor moves past the cold pairs probed without a gap, so
+        # pairs skipped by a stopped cycle are probed next time
+        done = set(probed)
+        advanced = 0
+        while advanced < len(cold) and len(hot) + advanced in done:
+            advanced += 1
+        size = len(self.space)
+        if size:
+            self.state.sweeps += (self.state.cursor + advanced) // size
+            self.state.cursor = (self.state.cursor + advanced) % size
+        self.state.cycle += 1
+        self.state.save()
+
+        report = CycleReport(self.state.cycle, len(hot), advanced, changes, time.monotonic() - start,
+                             self.state.cursor / size if size else 1.0, self.state.sweeps,
+                             self.state.open_count())
+        for sink in self.sinks:
+            sink.cycle(report)
+        return report
+
+    async def run_async(self, cycles=None):
+        """
+        Run cycles back to back, each taking at least ``interval`` seconds
+
+        Args:
+            cycles (int): Number of cycles to run (until stopped if None)
+        """
+        self._stopped = False
+        count = 0
+        while not self._stopped and (cycles is None or count < cycles):
+            deadline = time.monotonic() + self.interval
+            await self.run_cycle()
+            count += 1
+            if cycles is not None and count >= cycles:
+                break
+            while not self._stopped and time.monotonic() < deadline:
+                await asyncio.sleep(min(1.0, deadline - time.monotonic()))
+
+    def run(self, cycles=None):
+        """
+        Run the monitor on a new event loop
+
+        Args:
+            cycles (int): Number of cycles to run (until stopped if None)
+        """
+        try:
+            asyncio.run(self.run_async(cycles))
+        finally:
+            for sink in self.sinks:
+                sink.close()
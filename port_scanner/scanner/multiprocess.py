@@ -0,0 +1,278 @@
+"""
+Multi-process sharded scanning
+"""
+
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from multiprocessing.connection import wait
+from config import DEFAULT_WORKERS
+from .metrics import ScanMetrics
+from .sinks import ScanResult, ScanSink, NullSink
+
+
+def worker_count(workers):
+    """
+    Resolve a --workers value to a process count
+
+    Args:
+        workers (int): Requested processes (0 or less means one per CPU core)
+
+    Returns:
+        int: Number of processes
+    """
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+class PipeSink(ScanSink):
+    """
+    Sink that forwards findings, progress and metrics to the parent process
+    """
+
+    def __init__(self, conn):
+        """
+        Initialize pipe sink
+
+        Args:
+            conn (Connection): Write end of the pipe to the parent
+        """
+        self.conn = conn
+        self.scanner = None
+
+    def start(self, scanner):
+        self.scanner = scanner
+
+    def result(self, result):
+        self.conn.send(('result', tuple(result)))
+
+    def progress(self, scanned, total):
+        self.conn.send(('metrics', self.scanner.metrics.state()))
+        self.conn.send(('progress', scanned))
+
+    def finish(self, scanner, duration):
+        self.conn.send(('metrics', scanner.metrics.state()))
+        self.conn.send(('done', scanner.scanned_ports))
+
+
+def _run_shard(scanner, index, count, conn, control):
+    """
+    Scan one shard in a worker process
+
+    Args:
+        scanner (AsyncPortScanner): Scanner to run (a copy of the parent's)
+        index (int): Shard index
+        count (int): Number of shards
+        conn (Connection): Write end of the pipe to the parent
+        control (Connection): Read end of the parent's stop pipe
+    """
+    # Ctrl+C reaches the whole process group; the parent decides what to do
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    def watch_stop():
+        # A stop message or the parent going away both end the scan
+        try:
+            control.recv()
+        except (EOFError, OSError):
+            pass
+        scanner.stop()
+
+    threading.Thread(target=watch_stop, daemon=True).start()
+
+    try:
+        scanner.sink = PipeSink(conn)
+        scanner.use_shard(index, count)
+        scanner.scan()
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class MultiProcessScanner:
+    """
+    Runs an async scanner split across several processes
+
+    The (host, port) work space is split into interleaved shards, one per
+    process. Every process runs its own event loop with its share of the
+    concurrency. Findings and progress stream back over a pipe and are
+    merged into the wrapped scanner, so summaries look the same as for a
+    single-process scan.
+    """
+
+    def __init__(self, scanner, workers=DEFAULT_WORKERS):
+        """
+        Initialize multi-process scanner
+
+        Args:
+            scanner (AsyncPortScanner): Configured scanner (AsyncPortScanner or SweepScanner)
+            workers (int): Worker processes (0 or less means one per CPU core)
+        """
+        self.scanner = scanner
+        self.workers = max(1, min(worker_count(workers), scanner.total_ports))
+        self.concurrency = scanner.concurrency
+        # Output happens in the parent; workers get a pipe sink instead
+        self.sink = scanner.sink
+        scanner.sink = NullSink()
+        scanner.concurrency = max(1, math.ceil(scanner.concurrency / self.workers))
+        # Every process gets an equal share of the rate limits
+        self.rate_limiter = scanner.rate_limiter
+        if scanner.rate_limiter is not None:
+            scanner.rate_limiter = scanner.rate_limiter.split(self.workers)
+        self.checkpoint = None
+        self.progress_step = scanner.progress_step
+        self.metrics = ScanMetrics()
+        self._controls = []
+
+    @property
+    def ports(self):
+        return self.scanner.ports
+
+    @property
+    def protocol(self):
+        return self.scanner.protocol
+
+    @property
+    def total_ports(self):
+        return self.scanner.total_ports
+
+    @property
+    def open_ports(self):
+        return self.scanner.open_ports
+
+    @property
+    def scanned_ports(self):
+        return self.scanner.scanned_ports
+
+    def scope(self):
+        """
+        Get the targets this scan covers, for result stores
+
+        Returns:
+            list: Target addresses or networks
+        """
+        return self.scanner.scope()
+
+    def describe(self):
+        """
+        Describe the scan for the sink's start banner
+
+        Returns:
+            list: Lines of text
+        """
+        lines = [line for line in self.scanner.describe() if not line.startswith("Rate limit:")]
+        lines.append(f"Split across {self.workers} worker processes "
+                     f"({self.scanner.concurrency} in flight each)")
+        if self.rate_limiter:
+            lines.append(f"Rate limit: {self.rate_limiter.describe()}, shared evenly by the workers")
+        return lines
+
+    def stop(self):
+        """
+        Ask all worker processes to stop after their in-flight probes
+
+        Safe to call from a signal handler.
+        """
+        for control in self._controls:
+            try:
+                control.send('stop')
+            except OSError:
+                # The worker has already finished
+                pass
+
+    def iter_results(self):
+        """
+        Run the scan in worker processes and yield open ports as they arrive
+
+        Yields:
+            ScanResult: One event per open (or, for UDP, open|filtered) port
+
+        Raises:
+            RuntimeError: If a worker process fails
+        """
+        self.sink.start(self)
+        start_time = time.time()
+        self.metrics.start(self.total_ports)
+
+        processes = []
+        readers = {}
+        self._controls = []
+        for index in range(self.workers):
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            control_reader, control_writer = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_run_shard, args=(self.scanner, index, self.workers, writer, control_reader),
+                daemon=True)
+            process.start()
+            writer.close()
+            control_reader.close()
+            processes.append(process)
+            readers[reader] = index
+            self._controls.append(control_writer)
+
+        scanned = [0] * self.workers
+        reported = 0
+        try:
+            while readers:
+                for reader in wait(list(readers)):
+                    index = readers[reader]
+                    try:
+                        kind, payload = reader.recv()
+                    except EOFError:
+                        del readers[reader]
+                        continue
+
+                    if kind == 'result':
+                        result = ScanResult(*payload)
+                        self.scanner.record(result)
+                        self.sink.result(result)
+                        yield result
+                    elif kind == 'metrics':
+                        self.metrics.update_shard(index, payload)
+                    elif kind == 'error':
+                        raise RuntimeError(f"Worker {index} failed: {payload}")
+                    else:
+                        scanned[index] = payload
+                        self.scanner.scanned_ports = sum(scanned)
+                        total = self.scanner.scanned_ports
+                        if total - reported >= self.progress_step or total == self.total_ports:
+                            reported = total
+                            self.sink.progress(total, self.total_ports)
+        finally:
+            # Stops the workers early if the caller abandons the iterator
+            self.stop()
+            for process in processes:
+                process.join()
+            for reader in readers:
+                reader.close()
+            for control in self._controls:
+                control.close()
+            self._controls = []
+
+        self.metrics.finish()
+        self.sink.finish(self, time.time() - start_time)
+
+    def scan(self):
+        """
+        Perform the scan across the worker processes
+
+        Returns:
+            list: Open ports, in the wrapped scanner's format
+        """
+        for _ in self.iter_results():
+            pass
+
+        return self.open_ports
+
+    def get_scan_summary(self):
+        """
+        Get formatted scan summary
+
+        Returns:
+            str: Formatted summary
+        """
+        return self.scanner.get_scan_summary()
@@ -0,0 +1,98 @@
+"""
+Open-port frequency ranking used by top-N quick scans
+"""
+
+# TCP ports ordered by how often they are found open (most frequent first).
+# The first 100 entries follow the public nmap-services open-frequency
+# ranking; the rest are commonly exposed services in rough order of
+# prevalence on enterprise networks.
+TOP_TCP_PORTS = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139,
+    143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001,
+    10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554,
+    26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646,
+    5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106,
+    2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543,
+    544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051,
+    6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+    1000, 3001, 5001, 82, 10010, 1030, 9090, 2107, 1024, 2103,
+    6004, 1801, 5050, 19, 8031, 1041, 255, 1049, 1048, 2967,
+    1053, 3703, 1056, 1065, 1064, 1054, 17, 808, 3689, 1031,
+    1044, 1071, 5901, 100, 9102, 8010, 2869, 1039, 5120, 4001,
+    9000, 2105, 636, 1038, 2601, 1, 7000, 1066, 1069, 625,
+    311, 280, 254, 4000, 1761, 5003, 2002, 2005, 1998, 1032,
+    1050, 6112, 3690, 1521, 2161, 6002, 1080, 2401, 4045, 902,
+    7937, 787, 1058, 2383, 32771, 1033, 1040, 1059, 50000, 5555,
+    10001, 1494, 593, 2301, 3, 3268, 7938, 1234, 1022, 1074,
+    8002, 1036, 1035, 9001, 1037, 464, 497, 1935, 6666, 2003,
+    6543, 1352, 24, 3269, 1111, 407, 500, 20, 2006, 3260,
+    15000, 1218, 1034, 4444, 264, 2004, 33, 1042, 42510, 999,
+    3052, 1023, 1068, 222, 7100, 888, 563, 1717, 2008, 992,
+    32770, 32772, 7001, 8082, 2007, 5550, 2009, 5801, 1043, 512,
+    2701, 7019, 50001, 1700, 4662, 2065, 2010, 42, 9535, 2602,
+    3333, 161, 5100, 5002, 2604, 4002, 6059, 1047, 8192, 8193,
+    2702, 6789, 9595, 1051, 9594, 9593, 16993, 16992, 5226, 5225,
+    32769, 3283, 1052, 8194, 1055, 1062, 9415, 8701, 8652, 8651,
+    8089, 65389, 65000, 64680, 64623, 60020, 3869, 3826, 3827, 3828,
+    5985, 5986, 6379, 27017, 9200, 9300, 11211, 5984, 2222, 8181,
+    8880, 8883, 1883, 5672, 15672, 9092, 2181, 2375, 2376, 6443,
+    10250, 4243, 8500, 8600, 7474, 7687, 5601, 9042, 7199, 50070,
+    8020, 8088, 9870, 16010, 4848, 7002, 9443, 8090, 8983, 61616,
+    25565, 6667, 6697, 1194, 1701, 1812, 1813, 5353, 5355, 3478,
+)
+
+# UDP ports ordered by how often they are found open, following the
+# nmap-services UDP ranking
+TOP_UDP_PORTS = (
+    631, 161, 137, 123, 138, 1434, 445, 135, 67, 53,
+    139, 500, 68, 520, 1900, 4500, 514, 49152, 162, 69,
+    5353, 111, 49154, 1701, 998, 996, 997, 999, 3283, 49153,
+    1812, 136, 2222, 2049, 3278, 5060, 1025, 1433, 3456, 80,
+    20031, 1026, 1027, 1028, 1029, 1030, 1031, 1032, 1033, 1813,
+    177, 427, 1645, 1646, 1719, 5000, 5355, 11211, 3702, 27015,
+)
+
+
+def top_ports(count, protocol='tcp'):
+    """
+    Get the ``count`` most frequently open ports
+
+    Ranked ports come first; beyond the bundled ranking, the remaining
+    ports follow in ascending order.
+
+    Args:
+        count (int): Number of ports (1-65535)
+        protocol (str): "tcp" or "udp"
+
+    Returns:
+        list: Port numbers, most frequently open first
+    """
+    ranking = TOP_UDP_PORTS if protocol == 'udp' else TOP_TCP_PORTS
+    count = max(0, min(count, 65535))
+    ports = list(ranking[:count])
+    if len(ports) < count:
+        ranked = set(ranking)
+        for port in range(1, 65536):
+            if port not in ranked:
+                ports.append(port)
+                if len(ports) == count:
+                    break
+    return ports
+
+
+def port_rank(port):
+    """
+    Get the frequency rank of a TCP port
+
+    Args:
+        port (int): Port number
+
+    Returns:
+        int: 1-based rank, or None if the port is not in the bundled ranking
+    """
+    try:
+        return TOP_TCP_PORTS.index(port) + 1
+    except ValueError:
+        return None
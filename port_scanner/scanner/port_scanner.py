@@ -6,8 +6,19 @@ import socket
 import threading
 from queue import Queue
 import time
-from config import DEFAULT_THREAD_COUNT, SOCKET_TIMEOUT
+from config import (DEFAULT_THREAD_COUNT, SOCKET_TIMEOUT, ADAPTIVE_TIMING, MAX_RETRIES,
+                    RESOURCE_BACKOFF_MIN, RESOURCE_BACKOFF_MAX, RESOURCE_RETRIES,
+                    QUICK_SCAN_CONCURRENCY)
+from .async_scanner import AsyncPortScanner
+from .port_frequency import top_ports as get_top_ports
 from .service_identifier import identify_service, get_security_info
+from .metrics import ScanMetrics
+from .sinks import ScanResult, ConsoleSink, NullSink
+from .resources import abortive_close
+from .timing import (HostTiming, classify_connect_result, OPEN, CLOSED, TIMEOUT, ERROR, RESOURCE,
+                     RESOURCE_ERRNOS)
+from .utils import format_scan_summary
+from .work import PortRange, PortSpace, WorkSource
 
 
 class PortScanner:
@@ -15,7 +26,8 @@ class PortScanner:
     Multi-threaded port scanner class
     """
 
-    def __init__(self, target_ip, start_port, end_port, thread_count=DEFAULT_THREAD_COUNT):
+    def __init__(self, target_ip, start_port, end_port, thread_count=DEFAULT_THREAD_COUNT,
+                 adaptive=ADAPTIVE_TIMING, sink=None, checkpoint=None, timeout=SOCKET_TIMEOUT):
         """
         Initialize port scanner
 
@@ -24,6 +36,10 @@ class PortScanner:
             start_port (int): Starting port number
             end_port (int): Ending port number
             thread_count (int): Number of threads to use
+            adaptive (bool): Use an RTT-based timeout instead of a fixed one
+            sink (ScanSink): Receives progress and findings (defaults to ConsoleSink)
+            checkpoint (Checkpoint): Records progress and resumes from it (optional)
+            timeout (float): Connect timeout in seconds (initial timeout when adaptive)
         """
         self.target_ip = target_ip
         self.start_port = start_port
@@ -33,11 +49,48 @@ class PortScanner:
         self.scanned_ports = 0
         self.total_ports = end_port - start_port + 1
         self.lock = threading.Lock()
+        self.adaptive = adaptive
+        self.timeout = timeout
+        self.timing = HostTiming(self.thread_count, initial_timeout=timeout)
+        self.sink = sink if sink is not None else ConsoleSink()
+        self.progress_step = 100
+        self.checkpoint = checkpoint
+        self.metrics = ScanMetrics()
+        self.rate_limiter = None
+        self._events = Queue()
+        self._stop = threading.Event()
+
+        # Ports are handed out lazily from the range descriptor
+        self.ports = PortSpace([PortRange(start_port, end_port)])
+        self.remaining = None
+        self.work_source = WorkSource(len(self.ports))
+
+    def scope(self):
+        """
+        Get the targets this scan covers, for result stores
+
+        Returns:
+            list: Target addresses or networks
+        """
+        return [self.target_ip]
+
+    def job(self):
+        """
+        Describe the scan for checkpoint matching
+
+        Returns:
+            dict: JSON-serializable job description
+        """
+        return {'kind': 'host', 'target': self.target_ip, 'ports': str(self.ports)}
+
+    def stop(self):
+        """
+        Ask the scan to stop after the probes already in flight
 
-        # Create queue for ports to scan
-        self.port_queue = Queue()
-        for port in range(start_port, end_port + 1):
-            self.port_queue.put(port)
+        Safe to call from a signal handler. The scan then ends normally and
+        saves its checkpoint, if it has one.
+        """
+        self._stop.set()
 
     def scan_port(self, port):
         """
@@ -49,59 +102,144 @@ class PortScanner:
         Returns:
             bool: True if port is open, False otherwise
         """
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(SOCKET_TIMEOUT)
+        retries = MAX_RETRIES if self.adaptive else 0
+        backoff = RESOURCE_BACKOFF_MIN
+        resource_errors = 0
+        attempt = 0
+        while attempt <= retries:
+            with self.lock:
+                timeout = self.timing.timeout(attempt) if self.adaptive else self.timeout
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait(self.target_ip)
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            except socket.error as e:
+                state = RESOURCE if e.errno in RESOURCE_ERRNOS else ERROR
+                self.metrics.probe_failed(state, e.errno)
+            else:
+                sock.settimeout(timeout)
+                self.metrics.probe_started()
+                start = time.monotonic()
+                state = code = None
+                try:
+                    code = sock.connect_ex((self.target_ip, port))
+                    state = classify_connect_result(code)
+                except socket.timeout:
+                    state = TIMEOUT
+                except socket.error as e:
+                    state, code = ERROR, e.errno
+                finally:
+                    abortive_close(sock)
+                    rtt = time.monotonic() - start
+                    self.metrics.probe_finished(state, rtt, code if state != TIMEOUT else None)
+
+            if state == RESOURCE:
+                # Out of descriptors or local ports: wait and try again
+                # rather than report the port closed
+                resource_errors += 1
+                if resource_errors >= RESOURCE_RETRIES:
+                    return False
+                time.sleep(backoff)
+                backoff = min(RESOURCE_BACKOFF_MAX, backoff * 2)
+                continue
+            attempt += 1
 
-            result = sock.connect_ex((self.target_ip, port))
-            sock.close()
+            if self.adaptive:
+                with self.lock:
+                    if state == TIMEOUT:
+                        self.timing.on_timeout()
+                        # Retransmit only once the host is known to answer
+                        if self.timing.has_samples:
+                            continue
+                    elif state in (OPEN, CLOSED):
+                        self.timing.on_reply(rtt)
+
+            return state == OPEN
 
-            return result == 0
-        except socket.error:
-            return False
+        return False
 
     def worker(self):
         """
         Worker thread function
+
+        Findings and progress go to the event queue; the thread running
+        iter_results() hands them to the sink, so workers never print.
         """
-        while not self.port_queue.empty():
+        for position in self.work_source:
+            if self._stop.is_set():
+                break
+
             try:
-                port = self.port_queue.get(timeout=1)
+                index = self.remaining[position] if self.remaining is not None else position
+                port = self.ports[index]
 
-                if self.scan_port(port):
+                is_open = self.scan_port(port)
+                if is_open:
                     service = identify_service(port)
                     security_info = get_security_info(port)
-
-                    with self.lock:
-                        self.open_ports.append((port, service, security_info))
-                        print(f"Port {port}: Open ({service})")
-                        if security_info:
-                            print(f"  {security_info}")
+                    self._events.put(ScanResult(self.target_ip, port, OPEN, service, security_info))
 
                 with self.lock:
+                    if self.checkpoint is not None:
+                        if is_open:
+                            self.checkpoint.add_finding(self.target_ip, port)
+                        self.checkpoint.mark_done(index)
+                        self.checkpoint.maybe_save()
                     self.scanned_ports += 1
-                    if self.scanned_ports % 100 == 0 or self.scanned_ports == self.total_ports:
-                        progress = (self.scanned_ports / self.total_ports) * 100
-                        print(f"Progress: {progress:.1f}% ({self.scanned_ports}/{self.total_ports})")
+                    scanned = self.scanned_ports
+                self.metrics.item_done()
 
-                self.port_queue.task_done()
+                if scanned % self.progress_step == 0 or scanned == self.total_ports:
+                    self._events.put(scanned)
 
             except Exception as e:
                 continue
 
-    def scan(self):
+        self._events.put(None)
+
+    def describe(self):
         """
-        Perform the port scan using multiple threads
+        Describe the scan for the sink's start banner
 
         Returns:
-            list: List of tuples (port, service, security_info)
+            list: Lines of text
+        """
+        lines = [
+            f"Starting port scan on {self.target_ip}",
+            f"Scanning ports {self.start_port}-{self.end_port}",
+            f"Using {self.thread_count} threads",
+        ]
+        if self.rate_limiter:
+            lines.append(f"Rate limit: {self.rate_limiter.describe()}")
+        return lines
+
+    def iter_results(self):
         """
-        print(f"\nStarting port scan on {self.target_ip}")
-        print(f"Scanning ports {self.start_port}-{self.end_port}")
-        print(f"Using {self.thread_count} threads\n")
+        Run the scan and yield open ports as they are found
 
+        When resuming from a checkpoint, the findings it already holds are
+        yielded first.
+
+        Yields:
+            ScanResult: One event per open port
+        """
+        self.sink.start(self)
         start_time = time.time()
 
+        if self.checkpoint is not None:
+            # Only hand out the indices the checkpoint has not completed
+            self.remaining = self.checkpoint.done.gaps(self.total_ports)
+            self.work_source = WorkSource(len(self.remaining))
+            self.scanned_ports = len(self.checkpoint.done)
+            for host, port, _ in self.checkpoint.findings:
+                event = ScanResult(host, port, OPEN, identify_service(port), get_security_info(port))
+                self.open_ports.append((event.port, event.service, event.security_info))
+                self.sink.result(event)
+                yield event
+
+        self.metrics.start(self.total_ports, self.scanned_ports, self._events)
+
         # Create and start worker threads
         threads = []
         for i in range(self.thread_count):
@@ -110,16 +248,39 @@ class PortScanner:
             thread.start()
             threads.append(thread)
 
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        try:
+            running = len(threads)
+            while running:
+                event = self._events.get()
+                if event is None:
+                    running -= 1
+                elif isinstance(event, int):
+                    self.sink.progress(event, self.total_ports)
+                else:
+                    self.open_ports.append((event.port, event.service, event.security_info))
+                    self.sink.result(event)
+                    yield event
+        finally:
+            # Stops the workers early if the caller abandons the iterator
+            stopped = self._stop.is_set() or running
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            if self.checkpoint is not None:
+                self.checkpoint.save(complete=not stopped)
+
+        self.metrics.finish()
+        self.sink.finish(self, time.time() - start_time)
 
-        end_time = time.time()
-        scan_duration = end_time - start_time
+    def scan(self):
+        """
+        Perform the port scan using multiple threads
 
-        print(f"\nScan completed in {scan_duration:.2f} seconds")
-        print(f"Scanned {self.total_ports} ports")
-        print(f"Found {len(self.open_ports)} open ports")
+        Returns:
+            list: List of tuples (port, service, security_info)
+        """
+        for _ in self.iter_results():
+            pass
 
         return self.open_ports
 
@@ -130,25 +291,25 @@ class PortScanner:
         Returns:
             str: Formatted summary
         """
-        if not self.open_ports:
-            return "\n--- Scan Summary ---\nNo open ports found."
-
-        summary = "\n--- Scan Summary ---\n"
-        for port, service, security_info in sorted(self.open_ports):
-            summary += f"Port {port}: Open ({service})\n"
-            if security_info:
-                summary += f"  {security_info}\n"
-
-        return summary
+        return format_scan_summary(self.open_ports)
 
 
-def quick_scan(target_ip, common_ports_only=True):
+def quick_scan(target_ip, common_ports_only=True, top_ports=None, timeout=SOCKET_TIMEOUT, sink=None,
+               rate_limiter=None, metrics=None):
     """
     Perform a quick scan of common ports
 
+    All selected ports are probed at once on the async engine, so the scan
+    takes about one timeout period regardless of how many ports it covers.
+
     Args:
         target_ip (str): Target IP address  
         common_ports_only (bool): Scan only common ports
+        top_ports (int): Scan the N most frequently open ports instead
+        timeout (float): Connect timeout in seconds
+        sink (ScanSink): Also receives every finding, e.g. an output writer (optional)
+        rate_limiter (RateLimiter): Probe-rate ceiling (optional)
+        metrics (ScanMetrics): Records every probe, e.g. for a benchmark (optional)
 
     Returns:
         list: List of open ports
@@ -156,22 +317,27 @@ def quick_scan(target_ip, common_ports_only=True):
     common_ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 
                    135, 139, 445, 1433, 3389, 5900, 8080]
 
-    if common_ports_only:
+    if top_ports:
+        ports_to_scan = get_top_ports(top_ports)
+    elif common_ports_only:
         ports_to_scan = common_ports
     else:
         ports_to_scan = list(range(1, 1025))
 
     print(f"Quick scanning {len(ports_to_scan)} ports on {target_ip}...")
 
+    scanner = AsyncPortScanner(target_ip, ports=ports_to_scan,
+                               concurrency=min(len(ports_to_scan), QUICK_SCAN_CONCURRENCY),
+                               timeout=timeout, sink=sink if sink is not None else NullSink())
+    scanner.rate_limiter = rate_limiter
+    if metrics is not None:
+        scanner.metrics = metrics
     open_ports = []
-    for port in ports_to_scan:
-        scanner = PortScanner(target_ip, port, port, 1)
-        if scanner.scan_port(port):
-            service = identify_service(port)
-            open_ports.append((port, service))
-            print(f"Port {port}: Open ({service})")
-
-    return open_ports
+    for result in scanner.iter_results():
+        open_ports.append((result.port, result.service))
+        print(f"Port {result.port}: Open ({result.service})")
+
+    return sorted(open_ports)
 
 
 # Keep the old function for backward compatibility
@@ -0,0 +1,216 @@
+"""
+Token-bucket probe-rate limiting, globally and per target
+"""
+
+import asyncio
+import threading
+import time
+from config import RATE_BURST_SECONDS
+
+
+def default_burst(rate):
+    """
+    Get the burst size used when none is given
+
+    Args:
+        rate (float): Tokens per second
+
+    Returns:
+        float: RATE_BURST_SECONDS worth of tokens, at least one
+    """
+    return max(1.0, rate * RATE_BURST_SECONDS)
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out send times
+
+    The bucket holds up to ``burst`` tokens and refills at ``rate`` per
+    second. Taking a token from an empty bucket is allowed: the balance
+    goes negative and the caller is told how long to wait until the token
+    would have been there. Concurrent callers therefore get successive,
+    evenly spaced send times instead of all polling for the next token,
+    and a busy scan runs at exactly ``rate``.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst=None, now=None):
+        """
+        Initialize token bucket
+
+        Args:
+            rate (float): Tokens per second
+            burst (float): Bucket size (defaults to default_burst(rate))
+            now (float): Current monotonic time (defaults to time.monotonic())
+        """
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else default_burst(rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic() if now is None else now
+
+    def reserve(self, now):
+        """
+        Take one token
+
+        Args:
+            now (float): Current monotonic time
+
+        Returns:
+            float: Seconds to wait before using the token
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def full(self, now):
+        """
+        Check whether the bucket has refilled completely
+
+        Args:
+            now (float): Current monotonic time
+
+        Returns:
+            bool: True if the bucket is full
+        """
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RateLimiter:
+    """
+    Global and per-target probe-rate ceiling
+
+    Every probe takes a token from the global bucket and one from its
+    target's bucket, and is sent once both allow it. Either limit may be
+    left out. The scan engines, host discovery and version detection call
+    acquire() (async) or wait() (threads) right before every connect,
+    ICMP echo request and UDP datagram, retransmissions included.
+    """
+
+    # Per-target buckets are pruned once this many exist
+    PRUNE_THRESHOLD = 4096
+
+    def __init__(self, rate=None, burst=None, host_rate=None, host_burst=None):
+        """
+        Initialize rate limiter
+
+        Args:
+            rate (float): Highest probes per second overall (unlimited if None)
+            burst (float): Probes allowed at once above the global rate
+            host_rate (float): Highest probes per second to one target (unlimited if None)
+            host_burst (float): Probes allowed at once above the per-target rate
+        """
+        self.rate = rate
+        self.burst = burst
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.rate or self.host_rate)
+
+    def describe(self):
+        """
+        Describe the limits for start banners
+
+        Returns:
+            str: Description such as "5000 probes/s (burst 50), 100 probes/s per host"
+        """
+        parts = []
+        if self.rate:
+            parts.append(f"{self.rate:g} probes/s (burst {self.bucket.burst:g})")
+        if self.host_rate:
+            parts.append(f"{self.host_rate:g} probes/s per host (burst "
+                         f"{self.host_burst or default_burst(self.host_rate):g})")
+        return ", ".join(parts) or "unlimited"
+
+    def reserve(self, host, now=None):
+        """
+        Take the tokens for one probe
+
+        Args:
+            host (str): Target IP address
+            now (float): Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            float: Seconds to wait before sending the probe
+        """
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            delay = self.bucket.reserve(now) if self.bucket is not None else 0.0
+            if self.host_rate:
+                bucket = self.hosts.get(host)
+                if bucket is None:
+                    if len(self.hosts) >= self.PRUNE_THRESHOLD:
+                        self.prune(now)
+                    bucket = self.hosts[host] = TokenBucket(self.host_rate, self.host_burst, now)
+                delay = max(delay, bucket.reserve(now))
+        return delay
+
+    def prune(self, now):
+        """
+        Forget per-target buckets that have refilled; they start full anyway
+
+        Args:
+            now (float): Current monotonic time
+        """
+        self.hosts = {host: bucket for host, bucket in self.hosts.items() if not bucket.full(now)}
+
+    async def acquire(self, host):
+        """
+        Wait until a probe to a target may be sent, on the event loop
+
+        Args:
+            host (str): Target IP address
+        """
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self, host):
+        """
+        Wait until a probe to a target may be sent, blocking the thread
+
+        Args:
+            host (str): Target IP address
+        """
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    def split(self, parts):
+        """
+        Get the limiter for one of several processes sharing these limits
+
+        Each process sees every target (shards interleave hosts), so both
+        the global and the per-target rates and bursts are divided.
+
+        Args:
+            parts (int): Number of processes
+
+        Returns:
+            RateLimiter: Limiter with 1/parts of every limit
+        """
+        def share(value):
+            return value / parts if value else value
+
+        def share_burst(value, rate):
+            if not rate:
+                return value
+            return max(1.0, (value or default_burst(rate)) / parts)
+
+        return RateLimiter(share(self.rate), share_burst(self.burst, self.rate),
+                           share(self.host_rate), share_burst(self.host_burst, self.host_rate))
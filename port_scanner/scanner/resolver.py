@@ -0,0 +1,270 @@
+"""
+Concurrent hostname resolution with a TTL cache
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import RESOLVE_CONCURRENCY, RESOLVE_TTL, RESOLVE_NEGATIVE_TTL
+
+
+class DnsCache:
+    """
+    Cache of resolved addresses keyed by hostname
+
+    getaddrinfo() does not report record TTLs, so answers are kept for a
+    fixed ``ttl`` and failed lookups for ``negative_ttl``. With a path, the
+    cache is loaded from and saved to a JSON file so it survives between
+    scans.
+    """
+
+    def __init__(self, path=None, ttl=RESOLVE_TTL, negative_ttl=RESOLVE_NEGATIVE_TTL):
+        """
+        Initialize DNS cache
+
+        Args:
+            path (str): JSON file to persist the cache in (memory only if None)
+            ttl (float): Seconds a resolved name stays valid
+            negative_ttl (float): Seconds a failed lookup stays valid
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def _fresh(self, entry, now):
+        ttl = self.ttl if entry['addresses'] else self.negative_ttl
+        return now - entry['time'] <= ttl
+
+    def get(self, name, now=None):
+        """
+        Get fresh cached addresses
+
+        Args:
+            name (str): Hostname
+            now (float): Current time (defaults to time.time())
+
+        Returns:
+            list: Cached addresses (empty for a cached failure), or None if
+                missing or expired
+        """
+        entry = self.entries.get(name.lower())
+        if entry is None:
+            return None
+        if not self._fresh(entry, time.time() if now is None else now):
+            return None
+        return list(entry['addresses'])
+
+    def put(self, name, addresses, now=None):
+        """
+        Store the addresses of a hostname
+
+        Args:
+            name (str): Hostname
+            addresses (list): Resolved addresses (empty if the lookup failed)
+            now (float): Current time (defaults to time.time())
+        """
+        self.entries[name.lower()] = {
+            'time': time.time() if now is None else now,
+            'addresses': list(addresses),
+        }
+
+    def load(self):
+        """Load entries from the cache file, ignoring a corrupt file"""
+        try:
+            with open(self.path) as handle:
+                self.entries = json.load(handle)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write entries to the cache file, dropping expired ones"""
+        if not self.path:
+            return
+        now = time.time()
+        fresh = {name: entry for name, entry in self.entries.items() if self._fresh(entry, now)}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as handle:
+            json.dump(fresh, handle)
+        os.replace(temp_path, self.path)
+
+
+class Resolver:
+    """
+    Resolves many hostnames at once
+
+    getaddrinfo() blocks, so lookups run on a thread pool with up to
+    ``concurrency`` of them in flight. Every A and AAAA record is returned,
+    IPv4 addresses first, and answers are cached (see DnsCache). Concurrent
+    lookups of the same name share one getaddrinfo() call.
+    """
+
+    def __init__(self, concurrency=RESOLVE_CONCURRENCY, cache=None):
+        """
+        Initialize resolver
+
+        Args:
+            concurrency (int): Lookups in flight
+            cache (DnsCache): Answer cache (a new in-memory cache if None)
+        """
+        self.concurrency = max(1, concurrency)
+        self.cache = cache if cache is not None else DnsCache()
+        self.lookups = 0
+        self._executor = None
+        self._pending = {}
+
+    def getaddrinfo(self, name):
+        """
+        Look up a hostname, blocking
+
+        Args:
+            name (str): Hostname
+
+        Returns:
+            list: Unique addresses, IPv4 first (empty if the name does not resolve)
+        """
+        self.lookups += 1
+        try:
+            infos = socket.getaddrinfo(name, None, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            return []
+
+        addresses = []
+        for family, _, _, _, sockaddr in sorted(infos, key=lambda info: info[0] != socket.AF_INET):
+            if family in (socket.AF_INET, socket.AF_INET6) and sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        return addresses
+
+    def resolve(self, name):
+        """
+        Resolve one hostname, blocking
+
+        Args:
+            name (str): Hostname
+
+        Returns:
+            list: Addresses, IPv4 first (empty if the name does not resolve)
+        """
+        addresses = self.cache.get(name)
+        if addresses is None:
+            addresses = self.getaddrinfo(name)
+            self.cache.put(name, addresses)
+        return addresses
+
+    async def resolve_async(self, name):
+        """
+        Resolve one hostname on the thread pool
+
+        Args:
+            name (str): Hostname
+
+        Returns:
+            list: Addresses, IPv4 first (empty if the name does not resolve)
+        """
+        addresses = self.cache.get(name)
+        if addresses is not None:
+            return addresses
+
+        key = name.lower()
+        future = self._pending.get(key)
+        if future is None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self.getaddrinfo, name)
+            self._pending[key] = future
+            try:
+                addresses = await future
+            finally:
+                del self._pending[key]
+            self.cache.put(name, addresses)
+            return addresses
+        return list(await asyncio.shield(future))
+
+    async def worker(self, names, results):
+        """
+        Worker coroutine
+
+        Args:
+            names (iterator): Hostname iterator shared by all workers
+            results (asyncio.Queue): Queue receiving (name, addresses) tuples
+        """
+        for name in names:
+            results.put_nowait((name, await self.resolve_async(name)))
+
+    async def resolve_many(self, names):
+        """
+        Resolve hostnames concurrently, yielding each as soon as it resolves
+
+        Args:
+            names (iterable): Hostnames
+
+        Yields:
+            tuple: (name, addresses), in completion order
+        """
+        names = list(names)
+        results = asyncio.Queue()
+        pending = iter(names)
+        workers = asyncio.gather(*(self.worker(pending, results)
+                                   for _ in range(min(self.concurrency, len(names)))))
+        try:
+            for _ in names:
+                yield await results.get()
+            await workers
+        finally:
+            workers.cancel()
+
+    async def resolve_all_async(self, names):
+        """
+        Resolve hostnames concurrently
+
+        Args:
+            names (iterable): Hostnames
+
+        Returns:
+            dict: Hostname -> list of addresses
+        """
+        return {name: addresses async for name, addresses in self.resolve_many(names)}
+
+    def resolve_all(self, names):
+        """
+        Resolve hostnames concurrently, blocking until all are done
+
+        Args:
+            names (iterable): Hostnames
+
+        Returns:
+            dict: Hostname -> list of addresses
+        """
+        return asyncio.run(self.resolve_all_async(names))
+
+    def save(self):
+        """Persist the cache, if it has a file"""
+        self.cache.save()
+
+    def close(self):
+        """Shut down the lookup threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+_default_resolver = None
+
+
+def default_resolver():
+    """
+    Get the resolver shared by resolve_hostname() and parse_targets()
+
+    Returns:
+        Resolver: Process-wide resolver with an in-memory cache
+    """
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = Resolver()
+    return _default_resolver
@@ -0,0 +1,202 @@
+"""
+File-descriptor and ephemeral-port budget for high-concurrency scans
+"""
+
+import asyncio
+import collections
+import socket
+import struct
+import time
+from config import (RAISE_FD_LIMIT, FD_RESERVE, MIN_SOCKET_BUDGET, RESOURCE_BACKOFF_MIN,
+                    RESOURCE_BACKOFF_MAX, RESOURCE_RETRIES)
+from .timing import ERROR, RESOURCE
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Linux's ephemeral range; other systems use the IANA range by default
+EPHEMERAL_RANGE_FILE = '/proc/sys/net/ipv4/ip_local_port_range'
+IANA_EPHEMERAL_PORTS = 65535 - 49152 + 1
+
+# Fallback when the limit cannot be read (e.g. Windows sockets are not fds)
+DEFAULT_FD_LIMIT = 8192
+
+_LINGER_ABORT = struct.pack('ii', 1, 0)
+_raised_limit = None
+
+
+def raise_fd_limit():
+    """
+    Raise the soft RLIMIT_NOFILE as far as the hard limit allows
+
+    Only done once per process; later calls return the first result.
+
+    Returns:
+        int: Soft descriptor limit now in effect
+    """
+    global _raised_limit
+    if _raised_limit is not None:
+        return _raised_limit
+    if resource is None:
+        _raised_limit = DEFAULT_FD_LIMIT
+        return _raised_limit
+
+    infinity = resource.RLIM_INFINITY
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if RAISE_FD_LIMIT and soft != infinity:
+        # macOS reports an infinite hard limit but refuses values above
+        # OPEN_MAX, so fall back to smaller targets
+        targets = ([hard] if hard != infinity else []) + [1048576, 65536, 10240]
+        for target in targets:
+            if target <= soft or (hard != infinity and target > hard):
+                continue
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+                soft = target
+                break
+            except (ValueError, OSError):
+                continue
+
+    _raised_limit = soft if soft != infinity else 1048576
+    return _raised_limit
+
+
+def ephemeral_port_count():
+    """
+    Get the number of local ports available for outgoing connections
+
+    Returns:
+        int: Size of the ephemeral port range
+    """
+    try:
+        with open(EPHEMERAL_RANGE_FILE) as handle:
+            low, high = (int(value) for value in handle.read().split())
+        return high - low + 1
+    except (OSError, ValueError):
+        return IANA_EPHEMERAL_PORTS
+
+
+def abortive_close(sock):
+    """
+    Close a socket with a RST instead of a FIN
+
+    With SO_LINGER set to zero the connection skips TIME_WAIT, so its local
+    port can be reused at once instead of being held for a minute or more.
+
+    Args:
+        sock (socket.socket): Socket to close
+    """
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
+    except OSError:
+        pass
+    sock.close()
+
+
+class ResourceGovernor:
+    """
+    Budget for sockets in flight
+
+    The budget starts at what the process can afford: the (raised)
+    descriptor limit minus a reserve, and no more than the ephemeral port
+    range. When a connect fails with EMFILE, ENFILE, EADDRNOTAVAIL or
+    ENOBUFS, the probe is not reported: the budget is cut to half of the
+    sockets in flight and the probe is retried after an exponential
+    backoff. Each completed connect grows the budget by one again.
+    """
+
+    def __init__(self, limit=None, reserve=FD_RESERVE, min_budget=MIN_SOCKET_BUDGET):
+        """
+        Initialize resource governor
+
+        Args:
+            limit (int): Highest sockets in flight (defaults to what the fd limit and port range allow)
+            reserve (int): Descriptors kept free for other uses
+            min_budget (int): Budget floor after exhaustion
+        """
+        if limit is None:
+            limit = min(raise_fd_limit() - reserve, ephemeral_port_count())
+        self.limit = max(1, limit)
+        self.min_budget = min(min_budget, self.limit)
+        self.budget = self.limit
+        self.in_flight = 0
+        self.peak = 0
+        self.exhausted_count = 0
+        self.backoff = 0.0
+        self.last_decrease = float('-inf')
+        self._waiters = collections.deque()
+
+    def reset(self):
+        """Forget waiters from a previous event loop"""
+        self.in_flight = 0
+        self._waiters.clear()
+
+    async def acquire(self):
+        """Wait for a socket slot"""
+        while self.in_flight >= self.budget:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+
+    def release(self):
+        """Return a socket slot"""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = self.budget - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def succeeded(self):
+        """Grow the budget after a connect that did not hit a local limit"""
+        self.backoff = 0.0
+        if self.budget < self.limit:
+            self.budget += 1
+            self._wake()
+
+    def exhausted(self):
+        """
+        Shrink the budget after a local resource error
+
+        Returns:
+            float: Seconds to wait before retrying
+        """
+        self.exhausted_count += 1
+        now = time.monotonic()
+        # Many probes fail together; count them as one event per backoff
+        if now - self.last_decrease >= self.backoff:
+            self.budget = max(self.min_budget, min(self.budget, self.in_flight) // 2)
+            self.backoff = min(RESOURCE_BACKOFF_MAX, max(RESOURCE_BACKOFF_MIN, self.backoff * 2))
+            self.last_decrease = now
+        return self.backoff
+
+    async def run(self, connect, *args):
+        """
+        Run a connect attempt within the budget, retrying on local exhaustion
+
+        Args:
+            connect (callable): Coroutine function returning a probe outcome
+            *args: Arguments for ``connect``
+
+        Returns:
+            str: The probe outcome (ERROR if resources stayed exhausted)
+        """
+        for _ in range(RESOURCE_RETRIES):
+            await self.acquire()
+            try:
+                state = await connect(*args)
+            finally:
+                self.release()
+            if state != RESOURCE:
+                self.succeeded()
+                return state
+            await asyncio.sleep(self.exhausted())
+        return ERROR
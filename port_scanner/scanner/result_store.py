@@ -0,0 +1,440 @@
+"""
+Compact bitmap storage for scan results and scan-to-scan diffing
+"""
+
+import ipaddress
+import json
+import os
+import struct
+import time
+import zlib
+from collections import namedtuple
+from .service_identifier import identify_service, get_security_info
+from .sinks import ScanSink
+from .timing import OPEN
+
+# One bit per port number 0-65535
+BITMAP_BYTES = 65536 // 8
+
+# File layout: magic, header length, JSON header, zlib-compressed bitmaps
+STORE_MAGIC = b'PSRS1\n'
+_HEADER_LENGTH = struct.Struct('>I')
+
+# A port whose state changed between two scans ("opened" or "closed")
+PortChange = namedtuple('PortChange', ['host', 'port', 'change', 'service'])
+
+
+def _ports_in(value):
+    """
+    Yield the port numbers whose bits are set in an integer bitmap
+
+    Args:
+        value (int): Bitmap as returned by PortBitmap.to_int()
+
+    Yields:
+        int: Port numbers in ascending order
+    """
+    if not value:
+        return
+    data = value.to_bytes(BITMAP_BYTES, 'little')
+    for offset, byte in enumerate(data):
+        if byte:
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield offset * 8 + bit
+
+
+class PortBitmap:
+    """
+    Set of port numbers stored as a 65536-bit vector (8 KiB)
+    """
+
+    __slots__ = ('bits',)
+
+    def __init__(self, ports=(), bits=None):
+        """
+        Initialize port bitmap
+
+        Args:
+            ports (iterable): Ports to add
+            bits (bytes): Raw bitmap to start from (BITMAP_BYTES long)
+        """
+        self.bits = bytearray(bits) if bits is not None else bytearray(BITMAP_BYTES)
+        for port in ports:
+            self.add(port)
+
+    @classmethod
+    def from_int(cls, value):
+        """
+        Build a bitmap from its integer form
+
+        Args:
+            value (int): Bitmap as returned by to_int()
+
+        Returns:
+            PortBitmap: New bitmap
+        """
+        return cls(bits=value.to_bytes(BITMAP_BYTES, 'little'))
+
+    def add(self, port):
+        self.bits[port >> 3] |= 1 << (port & 7)
+
+    def discard(self, port):
+        self.bits[port >> 3] &= ~(1 << (port & 7)) & 0xff
+
+    def __contains__(self, port):
+        return 0 <= port < 65536 and bool(self.bits[port >> 3] >> (port & 7) & 1)
+
+    def __len__(self):
+        return bin(self.to_int()).count('1')
+
+    def __bool__(self):
+        return any(self.bits)
+
+    def __iter__(self):
+        return _ports_in(self.to_int())
+
+    def __eq__(self, other):
+        return isinstance(other, PortBitmap) and self.bits == other.bits
+
+    def to_int(self):
+        """
+        Get the bitmap as an integer, bit ``n`` standing for port ``n``
+
+        Whole-bitmap set operations on the integer form run in C, which is
+        what makes diffing cheap.
+
+        Returns:
+            int: Bitmap value
+        """
+        return int.from_bytes(self.bits, 'little')
+
+
+class ResultStore:
+    """
+    Scan results for many hosts, one port bitmap per host and state
+
+    Service names are interned: each distinct string is stored once and
+    ports refer to it by index, and only ports whose service differs from
+    the default port-number lookup keep an entry at all. Security notes
+    are derived from the port number when results are read back.
+
+    The store also records what was scanned (the port ranges and the target
+    networks), so a diff only reports ports both scans actually covered.
+    """
+
+    def __init__(self, ports=None, scope=None, timestamp=None):
+        """
+        Initialize result store
+
+        Args:
+            ports (iterable): Ports that were scanned (defaults to all)
+            scope (list): Target networks or addresses that were scanned
+            timestamp (float): Scan time (defaults to now)
+        """
+        self.scanned = PortBitmap(ports if ports is not None else range(65536))
+        self.scope = [str(network) for network in (scope or [])]
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.bitmaps = {}
+        self.services = []
+        self._service_ids = {}
+        self._host_services = {}
+        self._networks = None
+
+    def intern(self, service):
+        """
+        Get the index of a service name, adding it to the table if new
+
+        Args:
+            service (str): Service name
+
+        Returns:
+            int: Index into self.services
+        """
+        index = self._service_ids.get(service)
+        if index is None:
+            index = len(self.services)
+            self.services.append(service)
+            self._service_ids[service] = index
+        return index
+
+    def add(self, host, port, state=OPEN, service=None):
+        """
+        Record the state of one port
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+            state (str): Probe outcome (OPEN, CLOSED, TIMEOUT, ERROR)
+            service (str): Detected service name (optional)
+        """
+        states = self.bitmaps.setdefault(host, {})
+        for other_state, bitmap in states.items():
+            if other_state != state:
+                bitmap.discard(port)
+        states.setdefault(state, PortBitmap()).add(port)
+
+        if service is not None and service != identify_service(port):
+            self._host_services.setdefault(host, {})[port] = self.intern(service)
+
+    def add_result(self, result):
+        """
+        Record a ScanResult event
+
+        Args:
+            result (ScanResult): The finding
+        """
+        self.add(result.host, result.port, result.state, result.service)
+
+    def hosts(self):
+        """
+        Get the hosts that have at least one recorded port
+
+        Returns:
+            list: Host addresses
+        """
+        return list(self.bitmaps)
+
+    def ports_for(self, host, state=OPEN):
+        """
+        Get a host's ports in one state
+
+        Args:
+            host (str): Target IP address
+            state (str): Probe outcome
+
+        Returns:
+            PortBitmap: The ports (empty if none)
+        """
+        bitmap = self.bitmaps.get(host, {}).get(state)
+        return bitmap if bitmap is not None else PortBitmap()
+
+    def service(self, host, port):
+        """
+        Get the service name recorded for a port
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+
+        Returns:
+            str: Service name
+        """
+        index = self._host_services.get(host, {}).get(port)
+        return self.services[index] if index is not None else identify_service(port)
+
+    def results(self, host):
+        """
+        Get a host's open ports in the scanners' tuple format
+
+        Args:
+            host (str): Target IP address
+
+        Returns:
+            list: List of tuples (port, service, security_info)
+        """
+        return [(port, self.service(host, port), get_security_info(port))
+                for port in self.ports_for(host)]
+
+    def covers(self, host):
+        """
+        Check whether a host was within the scanned targets
+
+        Args:
+            host (str): Target IP address
+
+        Returns:
+            bool: True if the host was scanned
+        """
+        if host in self.bitmaps:
+            return True
+        if self._networks is None:
+            self._networks = [ipaddress.ip_network(entry, strict=False) for entry in self.scope]
+        address = ipaddress.ip_address(host)
+        return any(address in network for network in self._networks)
+
+    def diff(self, newer):
+        """
+        Compare this scan with a later scan
+
+        Only ports scanned by both scans, on hosts covered by both, are
+        compared.
+
+        Args:
+            newer (ResultStore): The later scan
+
+        Returns:
+            list: PortChange tuples, ordered by host and port
+        """
+        common = self.scanned.to_int() & newer.scanned.to_int()
+        changes = []
+        for host in sorted(set(self.bitmaps) | set(newer.bitmaps)):
+            if not (self.covers(host) and newer.covers(host)):
+                continue
+            before = self.ports_for(host)
+            after = newer.ports_for(host)
+            # Unchanged hosts are the common case; comparing the raw bytes
+            # skips the integer conversion for them
+            if before == after:
+                continue
+            before = before.to_int() & common
+            after = after.to_int() & common
+            for port in _ports_in(after & ~before):
+                changes.append(PortChange(host, port, 'opened', newer.service(host, port)))
+            for port in _ports_in(before & ~after):
+                changes.append(PortChange(host, port, 'closed', self.service(host, port)))
+        changes.sort(key=lambda change: (change.host, change.port))
+        return changes
+
+    def save(self, path):
+        """
+        Write the store to a file atomically
+
+        Args:
+            path (str): Output file
+        """
+        layout = []
+        chunks = [bytes(self.scanned.bits)]
+        for host, states in self.bitmaps.items():
+            layout.append([host, list(states)])
+            chunks.extend(bytes(bitmap.bits) for bitmap in states.values())
+
+        header = json.dumps({
+            'timestamp': self.timestamp,
+            'scope': self.scope,
+            'services': self.services,
+            'layout': layout,
+            'host_services': {host: {str(port): index for port, index in ports.items()}
+                              for host, ports in self._host_services.items()},
+        }, separators=(',', ':')).encode()
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as handle:
+            handle.write(STORE_MAGIC)
+            handle.write(_HEADER_LENGTH.pack(len(header)))
+            handle.write(header)
+            handle.write(zlib.compress(b''.join(chunks)))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a store written by save()
+
+        Args:
+            path (str): Store file
+
+        Returns:
+            ResultStore: The stored results
+
+        Raises:
+            ValueError: If the file is not a valid result store
+        """
+        with open(path, 'rb') as handle:
+            data = handle.read()
+
+        if not data.startswith(STORE_MAGIC):
+            raise ValueError(f"Not a result store: {path}")
+        try:
+            position = len(STORE_MAGIC)
+            (length,) = _HEADER_LENGTH.unpack_from(data, position)
+            position += _HEADER_LENGTH.size
+            header = json.loads(data[position:position + length])
+            bitmaps = zlib.decompress(data[position + length:])
+        except (struct.error, ValueError, zlib.error):
+            raise ValueError(f"Corrupt result store: {path}")
+
+        store = cls(ports=(), scope=header['scope'], timestamp=header['timestamp'])
+        views = [bitmaps[offset:offset + BITMAP_BYTES]
+                 for offset in range(0, len(bitmaps), BITMAP_BYTES)]
+        store.scanned = PortBitmap(bits=views[0])
+        index = 1
+        for host, states in header['layout']:
+            store.bitmaps[host] = {}
+            for state in states:
+                store.bitmaps[host][state] = PortBitmap(bits=views[index])
+                index += 1
+
+        for service in header['services']:
+            store.intern(service)
+        store._host_services = {host: {int(port): service for port, service in ports.items()}
+                                for host, ports in header['host_services'].items()}
+        return store
+
+
+class StoreSink(ScanSink):
+    """
+    Sink that records every finding in a ResultStore
+    """
+
+    def __init__(self, store=None, scope=None):
+        """
+        Initialize store sink
+
+        Args:
+            store (ResultStore): Store to fill (a new one is created at scan start if None)
+            scope (list): Networks the scan was asked to cover, when the scanner
+                only probes part of them, such as the hosts found up by discovery
+        """
+        self.store = store
+        self.scope = [str(network) for network in (scope or [])]
+        self._created = False
+
+    def start(self, scanner):
+        if self.store is None:
+            self.store = ResultStore(scanner.ports, self._scope(scanner))
+            self._created = True
+
+    def result(self, result):
+        self.store.add_result(result)
+
+    def finish(self, scanner, duration):
+        if self._created:
+            # Hostnames resolved during the scan widen its scope
+            self.store.scope = self._scope(scanner)
+            self.store._networks = None
+
+    def _scope(self, scanner):
+        """
+        Combine the requested networks with what the scanner covered
+
+        A host that was requested but found down stays in scope, so a later
+        diff reports its ports as closed instead of skipping the host.
+
+        Args:
+            scanner: Scanner providing scope()
+
+        Returns:
+            list: CIDR blocks and addresses as strings
+        """
+        if not self.scope:
+            return scanner.scope()
+        requested = [ipaddress.ip_network(entry, strict=False) for entry in self.scope]
+        extra = []
+        for entry in scanner.scope():
+            network = ipaddress.ip_network(entry, strict=False)
+            if not any(network.version == block.version and network.subnet_of(block)
+                       for block in requested):
+                extra.append(entry)
+        return self.scope + extra
+
+
+def format_changes(changes):
+    """
+    Format a scan diff for display
+
+    Args:
+        changes (list): PortChange tuples
+
+    Returns:
+        str: Formatted changes string
+    """
+    if not changes:
+        return "\n--- Changes Since Last Scan ---\nNo changes."
+
+    lines = ["", "--- Changes Since Last Scan ---"]
+    for change in changes:
+        marker = '+' if change.change == 'opened' else '-'
+        lines.append(f"{marker} {change.host}:{change.port} {change.change} ({change.service})")
+
+    return "\n".join(lines) + "\n"
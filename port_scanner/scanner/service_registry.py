@@ -0,0 +1,350 @@
+"""
+Compact port/service registry backed by a memory-mapped index
+"""
+
+import csv
+import mmap
+import os
+import struct
+import threading
+from collections import namedtuple
+from . import port_frequency
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SOURCE_FILE = os.path.join(DATA_DIR, 'services.txt')
+REGISTRY_FILE = os.path.join(DATA_DIR, 'iana-services.txt')
+INDEX_FILE = os.path.join(DATA_DIR, 'services.idx')
+
+PROTOCOLS = ('tcp', 'udp')
+PORT_SLOTS = 65536
+
+# Index layout: header, one slot per TCP port, one slot per UDP port, the
+# string offset table and the UTF-8 string data. A slot holds the string
+# ids of the name, description and risk note and the open-frequency rank;
+# string id 0 is the empty string and rank 0 means unranked.
+MAGIC = b'PSREG\x00\x01\x00'
+HEADER = struct.Struct('<8sI')
+SLOT = struct.Struct('<HHHH')
+OFFSET = struct.Struct('<I')
+TABLE_SIZE = PORT_SLOTS * SLOT.size
+
+ServiceEntry = namedtuple('ServiceEntry', ['name', 'description', 'risk', 'rank'])
+
+
+def parse_source(path=SOURCE_FILE):
+    """
+    Read the text registry
+
+    Args:
+        path (str): services.txt file
+
+    Returns:
+        dict: (port, protocol) -> (name, description, risk)
+    """
+    entries = {}
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split('\t') + ['', '']
+            port, protocol = fields[0].split('/')
+            entries[(int(port), protocol)] = (fields[1], fields[2], fields[3])
+    return entries
+
+
+def merge_entries(base, overlay):
+    """
+    Layer curated registry entries over the base registry
+
+    Fields the overlay leaves empty keep the base value, so a curated
+    display name does not drop the registered description.
+
+    Args:
+        base (dict): (port, protocol) -> (name, description, risk)
+        overlay (dict): Entries that take precedence
+
+    Returns:
+        dict: Merged entries
+    """
+    entries = dict(base)
+    for key, fields in overlay.items():
+        below = entries.get(key, ('', '', ''))
+        entries[key] = tuple(field or fallback for field, fallback in zip(fields, below))
+    return entries
+
+
+def parse_iana_csv(path):
+    """
+    Read the IANA service name and transport protocol port number registry
+
+    The CSV export lists one registration per row; port ranges are
+    expanded, rows without a service name or port (reserved and
+    unassigned ranges) are skipped, and the first name registered for a
+    port wins over later aliases.
+
+    Args:
+        path (str): service-names-port-numbers.csv
+
+    Returns:
+        dict: (port, protocol) -> (name, description, "")
+    """
+    entries = {}
+    with open(path, encoding='utf-8', newline='') as handle:
+        for row in csv.DictReader(handle):
+            name = (row.get('Service Name') or '').strip()
+            ports = (row.get('Port Number') or '').strip()
+            protocol = (row.get('Transport Protocol') or '').strip().lower()
+            if not name or not ports or protocol not in PROTOCOLS:
+                continue
+            description = ' '.join((row.get('Description') or '').split())
+            first, _, last = ports.partition('-')
+            for port in range(int(first), int(last or first) + 1):
+                entries.setdefault((port, protocol), (name, description, ''))
+    return entries
+
+
+def write_source(entries, path, header=''):
+    """
+    Write registry entries in the services.txt format
+
+    Args:
+        entries (dict): (port, protocol) -> (name, description, risk)
+        path (str): Output file
+        header (str): Comment lines written first (optional)
+    """
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(header)
+        for (port, protocol), fields in sorted(entries.items()):
+            fields = [field.replace('\t', ' ') for field in fields]
+            while fields and not fields[-1]:
+                fields.pop()
+            handle.write('\t'.join([f"{port}/{protocol}"] + fields) + '\n')
+
+
+def build_index(entries, rankings=None):
+    """
+    Compile registry entries into the binary index
+
+    Args:
+        entries (dict): (port, protocol) -> (name, description, risk)
+        rankings (dict): Protocol -> ports ordered by open frequency
+            (defaults to the port_frequency tables)
+
+    Returns:
+        bytes: The index
+    """
+    if rankings is None:
+        rankings = {'tcp': port_frequency.TOP_TCP_PORTS, 'udp': port_frequency.TOP_UDP_PORTS}
+
+    strings = ['']
+    string_ids = {'': 0}
+
+    def string_id(text):
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    tables = []
+    for protocol in PROTOCOLS:
+        table = bytearray(TABLE_SIZE)
+        ranks = {port: rank for rank, port in enumerate(rankings.get(protocol, ()), 1)}
+        for port in sorted({port for port, proto in entries if proto == protocol} | set(ranks)):
+            name, description, risk = entries.get((port, protocol), ('', '', ''))
+            SLOT.pack_into(table, port * SLOT.size, string_id(name), string_id(description),
+                           string_id(risk), ranks.get(port, 0))
+        tables.append(table)
+
+    if len(strings) > 0xFFFF:
+        raise ValueError("Too many distinct registry strings")
+
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = bytearray()
+    position = 0
+    for data in encoded:
+        offsets += OFFSET.pack(position)
+        position += len(data)
+    offsets += OFFSET.pack(position)
+
+    return b''.join([HEADER.pack(MAGIC, len(strings)), *tables, offsets, *encoded])
+
+
+class ServiceRegistry:
+    """
+    Name, description, risk note and open-frequency rank of every port
+
+    The registry is compiled from ``data/iana-services.txt`` (the IANA
+    port registry) with the curated names, descriptions and risk notes of
+    ``data/services.txt`` layered on top, into a binary index with one
+    fixed-size slot per TCP and UDP port, so a lookup is a single indexed
+    read. Nothing is loaded at import: the first lookup maps the
+    index file into memory (building it first if it is missing or older
+    than its sources), and pages are only read as ports are looked up.
+    """
+
+    def __init__(self, source=SOURCE_FILE, index=INDEX_FILE, base=REGISTRY_FILE):
+        """
+        Initialize service registry
+
+        Args:
+            source (str): Curated text registry the index is built from
+            index (str): Compiled index file
+            base (str): Full registry the curated entries are layered over (None for none)
+        """
+        self.source = source
+        self.index = index
+        self.base = base
+        self._buffer = None
+        self._map = None
+        self._strings = None
+        self._offsets = 0
+        self._text = 0
+        self._lock = threading.Lock()
+
+    def _stale(self):
+        try:
+            built = os.path.getmtime(self.index)
+        except OSError:
+            return True
+        sources = [self.source, self.base, port_frequency.__file__]
+        return any(os.path.getmtime(path) > built for path in sources if path and os.path.exists(path))
+
+    def _build(self):
+        base = parse_source(self.base) if self.base and os.path.exists(self.base) else {}
+        data = build_index(merge_entries(base, parse_source(self.source)))
+        temp_path = f"{self.index}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as handle:
+                handle.write(data)
+            os.replace(temp_path, self.index)
+        except OSError:
+            # Read-only install: keep the index in memory for this process
+            return data
+        return None
+
+    def _load(self):
+        with self._lock:
+            if self._buffer is not None:
+                return
+            data = self._build() if self._stale() else None
+            if data is None:
+                with open(self.index, 'rb') as handle:
+                    self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                data = self._map
+            magic, count = HEADER.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Not a service registry index: {self.index}")
+            self._strings = [None] * count
+            self._offsets = HEADER.size + len(PROTOCOLS) * TABLE_SIZE
+            self._text = self._offsets + (count + 1) * OFFSET.size
+            self._buffer = data
+
+    def _string(self, string_id):
+        text = self._strings[string_id]
+        if text is None:
+            start, end = struct.unpack_from('<II', self._buffer, self._offsets + string_id * OFFSET.size)
+            text = self._buffer[self._text + start:self._text + end].decode('utf-8')
+            self._strings[string_id] = text
+        return text
+
+    def _slot(self, port, protocol):
+        if self._buffer is None:
+            self._load()
+        if not 0 <= port < PORT_SLOTS:
+            return 0, 0, 0, 0
+        table = PROTOCOLS.index(protocol)
+        return SLOT.unpack_from(self._buffer, HEADER.size + table * TABLE_SIZE + port * SLOT.size)
+
+    def entry(self, port, protocol='tcp'):
+        """
+        Look up everything known about a port
+
+        Args:
+            port (int): Port number
+            protocol (str): "tcp" or "udp"
+
+        Returns:
+            ServiceEntry: Name, description and risk note ("" if unknown)
+                and rank (None if unranked)
+        """
+        name_id, description_id, risk_id, rank = self._slot(port, protocol)
+        return ServiceEntry(self._string(name_id), self._string(description_id),
+                            self._string(risk_id), rank or None)
+
+    def name(self, port, protocol='tcp'):
+        """
+        Get the service name of a port
+
+        Args:
+            port (int): Port number
+            protocol (str): "tcp" or "udp"
+
+        Returns:
+            str: Service name, or "" if the port is not registered
+        """
+        return self._string(self._slot(port, protocol)[0])
+
+    def description(self, port, protocol='tcp'):
+        """
+        Get the service description of a port
+
+        Args:
+            port (int): Port number
+            protocol (str): "tcp" or "udp"
+
+        Returns:
+            str: Description, or "" if there is none
+        """
+        return self._string(self._slot(port, protocol)[1])
+
+    def risk(self, port, protocol='tcp'):
+        """
+        Get the security note of a port
+
+        Args:
+            port (int): Port number
+            protocol (str): "tcp" or "udp"
+
+        Returns:
+            str: Risk note, or "" if the service is not considered risky
+        """
+        return self._string(self._slot(port, protocol)[2])
+
+    def rank(self, port, protocol='tcp'):
+        """
+        Get the open-frequency rank of a port
+
+        Args:
+            port (int): Port number
+            protocol (str): "tcp" or "udp"
+
+        Returns:
+            int: 1-based rank, or None if the port is not ranked
+        """
+        return self._slot(port, protocol)[3] or None
+
+    def close(self):
+        """Unmap the index; the next lookup maps it again"""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+            self._map = None
+            self._buffer = None
+            self._strings = None
+
+
+_default_registry = None
+
+
+def default_registry():
+    """
+    Get the registry shared by the service identification functions
+
+    Returns:
+        ServiceRegistry: Process-wide registry over the bundled data
+    """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ServiceRegistry()
+    return _default_registry
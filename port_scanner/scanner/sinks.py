@@ -0,0 +1,135 @@
+"""
+Scan result events and output sinks
+"""
+
+from collections import namedtuple
+from .timing import OPEN
+
+
+# One open-port finding, as yielded by iter_results()
+ScanResult = namedtuple('ScanResult', ['host', 'port', 'state', 'service', 'security_info'])
+
+
+class ScanSink:
+    """
+    Base class for scan output sinks
+
+    Scanners report the start of a scan, every open port, progress and the
+    end of the scan to their sink. The base class ignores everything, so
+    subclasses only override the events they care about.
+    """
+
+    def start(self, scanner):
+        """
+        Called once before the first probe
+
+        Args:
+            scanner: The scanner that is starting
+        """
+
+    def result(self, result):
+        """
+        Called for every open port, in the order it is found
+
+        Args:
+            result (ScanResult): The finding
+        """
+
+    def progress(self, scanned, total):
+        """
+        Called periodically while the scan runs
+
+        Args:
+            scanned (int): Probes completed so far
+            total (int): Total number of probes
+        """
+
+    def finish(self, scanner, duration):
+        """
+        Called once after the last probe
+
+        Args:
+            scanner: The scanner that finished
+            duration (float): Scan duration in seconds
+        """
+
+    def close(self):
+        """Release any resources held by the sink"""
+
+
+class NullSink(ScanSink):
+    """Sink that discards all output"""
+
+
+class ConsoleSink(ScanSink):
+    """
+    Sink that prints scan progress and findings to stdout
+    """
+
+    def __init__(self, show_host=False):
+        """
+        Initialize console sink
+
+        Args:
+            show_host (bool): Prefix open ports with their host address
+        """
+        self.show_host = show_host
+
+    def start(self, scanner):
+        print()
+        for line in scanner.describe():
+            print(line)
+        print()
+
+    def result(self, result):
+        state = "Open" if result.state == OPEN else result.state
+        if self.show_host:
+            print(f"{result.host}:{result.port} {state} ({result.service})")
+        else:
+            print(f"Port {result.port}: {state} ({result.service})")
+        if result.security_info:
+            print(f"  {result.security_info}")
+
+    def progress(self, scanned, total):
+        progress = (scanned / total) * 100 if total else 100.0
+        print(f"Progress: {progress:.1f}% ({scanned}/{total})")
+
+    def finish(self, scanner, duration):
+        print(f"\nScan completed in {duration:.2f} seconds")
+        print(f"Scanned {scanner.total_ports} ports")
+        print(f"Found {len(scanner.open_ports)} open ports")
+
+
+class MultiSink(ScanSink):
+    """
+    Sink that forwards every event to several sinks
+    """
+
+    def __init__(self, *sinks):
+        """
+        Initialize multi sink
+
+        Args:
+            *sinks (ScanSink): Sinks to forward to
+        """
+        self.sinks = list(sinks)
+
+    def start(self, scanner):
+        for sink in self.sinks:
+            sink.start(scanner)
+
+    def result(self, result):
+        for sink in self.sinks:
+            sink.result(result)
+
+    def progress(self, scanned, total):
+        for sink in self.sinks:
+            sink.progress(scanned, total)
+
+    def finish(self, scanner, duration):
+        for sink in self.sinks:
+            sink.finish(scanner, duration)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
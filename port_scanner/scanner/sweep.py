@@ -0,0 +1,610 @@
+"""
+Multi-host sweep scheduling for the async scan engine
+"""
+
+import asyncio
+import bisect
+import collections
+import ipaddress
+import math
+import random
+from config import DEFAULT_CONCURRENCY, SOCKET_TIMEOUT, ADAPTIVE_TIMING
+from .async_scanner import AsyncPortScanner
+from .resolver import default_resolver
+from .sinks import ConsoleSink
+
+
+def host_count(network):
+    """
+    Count the scannable host addresses in a network
+
+    Follows ``ipaddress`` ``hosts()`` semantics: the network and broadcast
+    addresses of IPv4 networks (and the Subnet-Router anycast address of
+    IPv6 networks) are skipped, except for point-to-point and single-host
+    networks.
+
+    Args:
+        network (ipaddress.IPv4Network | ipaddress.IPv6Network): Network
+
+    Returns:
+        int: Number of host addresses
+    """
+    if network.num_addresses <= 2:
+        return network.num_addresses
+    if network.version == 4:
+        return network.num_addresses - 2
+    return network.num_addresses - 1
+
+
+def host_sort_key(host):
+    """
+    Sort key that orders IPv4 before IPv6 addresses, then numerically
+
+    Args:
+        host (str): IP address
+
+    Returns:
+        tuple: (version, address)
+    """
+    address = ipaddress.ip_address(host)
+    return address.version, address
+
+
+class TargetSet:
+    """
+    Lazy, indexable set of host addresses built from CIDR blocks
+
+    Addresses are computed from their index on demand, so a /16 costs the
+    same memory as a single host.
+    """
+
+    def __init__(self, networks):
+        """
+        Initialize target set
+
+        Args:
+            networks (list): ipaddress network objects
+        """
+        self.networks = list(networks)
+        self._offsets = []
+        total = 0
+        for network in self.networks:
+            self._offsets.append(total)
+            total += host_count(network)
+        self._size = total
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("target index out of range")
+
+        position = bisect.bisect_right(self._offsets, index) - 1
+        network = self.networks[position]
+        offset = index - self._offsets[position]
+        # Skip the network (or Subnet-Router anycast) address
+        if network.num_addresses > 2:
+            offset += 1
+        return str(network.network_address + offset)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self[index]
+
+    def __str__(self):
+        return ", ".join(str(network) for network in self.networks)
+
+
+def split_targets(specs):
+    """
+    Split target specifications into networks and hostnames
+
+    Each specification may hold several comma- or whitespace-separated
+    entries.
+
+    Args:
+        specs (list): Target specification strings
+
+    Returns:
+        tuple: (list of ipaddress networks, list of hostnames), in input order
+    """
+    networks = []
+    names = []
+    for spec in specs:
+        for item in spec.replace(",", " ").split():
+            try:
+                networks.append(ipaddress.ip_network(item, strict=False))
+            except ValueError:
+                if item not in names:
+                    names.append(item)
+    return networks, names
+
+
+def parse_targets(specs, resolver=None):
+    """
+    Parse target specifications into a TargetSet
+
+    Each specification may be an IP address, a CIDR block or a hostname, and
+    may hold several comma- or whitespace-separated entries. Hostnames are
+    resolved concurrently, and every address of a name is scanned. Blocks
+    nested inside other blocks are dropped so no host is scanned twice.
+
+    Args:
+        specs (list): Target specification strings
+        resolver (Resolver): Hostname resolver (defaults to the shared one)
+
+    Returns:
+        TargetSet: Parsed targets
+
+    Raises:
+        ValueError: If a target cannot be parsed or resolved
+    """
+    networks, names = split_targets(specs)
+    if names:
+        resolved = (resolver or default_resolver()).resolve_all(names)
+        for name in names:
+            if not resolved[name]:
+                raise ValueError(f"Invalid target: {name}")
+            networks.extend(ipaddress.ip_network(address) for address in resolved[name])
+    return merge_networks(networks)
+
+
+def merge_networks(networks):
+    """
+    Build a TargetSet from networks, dropping duplicates and nested blocks
+
+    Args:
+        networks (iterable): ipaddress network objects
+
+    Returns:
+        TargetSet: Targets with every host appearing once
+    """
+    networks = list(dict.fromkeys(networks))
+
+    # CIDR blocks either nest or are disjoint, so dropping every block
+    # that sits inside another one removes all duplicate hosts.
+    kept = set()
+    for network in sorted(networks, key=lambda net: (net.version, net.prefixlen)):
+        if not any(network.supernet(new_prefix=prefix) in kept
+                   for prefix in range(network.prefixlen)):
+            kept.add(network)
+
+    return TargetSet(network for network in networks if network in kept)
+
+
+def read_target_list(path):
+    """
+    Read target specifications from a file, one or more per line
+
+    Blank lines and lines starting with '#' are ignored.
+
+    Args:
+        path (str): Path to the target list file
+
+    Returns:
+        list: Target specification strings
+    """
+    specs = []
+    with open(path) as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                specs.append(line)
+    return specs
+
+
+class InterleavedSpace:
+    """
+    Indexable (host, port) space in an interleaved, randomized order
+
+    Maps index ``i`` through the affine permutation ``i -> (a * i + c) mod n``
+    with ``a`` coprime to ``n = hosts * ports``, then splits the result into
+    ``host = j % hosts`` and ``port = j // hosts``. Every pair appears exactly
+    once, nothing is materialized, and consecutive indices land on
+    different hosts.
+    """
+
+    def __init__(self, targets, ports, seed=None):
+        """
+        Initialize interleaved space
+
+        Args:
+            targets (TargetSet): Hosts to scan
+            ports (sequence): Ports to scan on every host (range or PortSpace)
+            seed (int): Seed for the permutation (random if None)
+        """
+        self.targets = targets
+        self.ports = ports
+        self.hosts = len(targets)
+        self._size = self.hosts * len(ports)
+
+        rng = random.Random(seed)
+        self.multiplier = 1
+        if self._size > 2:
+            self.multiplier = rng.randrange(1, self._size)
+            while math.gcd(self.multiplier, self._size) != 1:
+                self.multiplier = rng.randrange(1, self._size)
+        self.increment = rng.randrange(self._size) if self._size else 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._size:
+            raise IndexError("pair index out of range")
+        position = (self.multiplier * index + self.increment) % self._size
+        return self.targets[position % self.hosts], self.ports[position // self.hosts]
+
+
+def interleaved_pairs(targets, ports, seed=None):
+    """
+    Generate (host, port) pairs in an interleaved, randomized order
+
+    Args:
+        targets (TargetSet): Hosts to scan
+        ports (sequence): Ports to scan on every host
+        seed (int): Seed for the permutation (random if None)
+
+    Yields:
+        tuple: (host, port)
+    """
+    space = InterleavedSpace(targets, ports, seed)
+    for index in range(len(space)):
+        yield space[index]
+
+
+class SweepScanner(AsyncPortScanner):
+    """
+    Async scanner for many hosts
+
+    Schedules every (host, port) pair through one shared concurrency budget,
+    so wall-clock time depends on the number of probes and the concurrency,
+    not on how many hosts they are spread over.
+    """
+
+    def __init__(self, targets, start_port=None, end_port=None,
+                 concurrency=DEFAULT_CONCURRENCY, timeout=SOCKET_TIMEOUT, seed=None,
+                 adaptive=ADAPTIVE_TIMING, sink=None, ports=None, checkpoint=None,
+                 protocol='tcp'):
+        """
+        Initialize sweep scanner
+
+        Args:
+            targets (TargetSet): Hosts to scan
+            start_port (int): Starting port number
+            end_port (int): Ending port number
+            concurrency (int): Maximum number of connects in flight
+            timeout (float): Connect timeout in seconds
+            seed (int): Seed for the probe order (random if None)
+            adaptive (bool): Use per-host RTT-based timeouts and windows
+            sink (ScanSink): Receives progress and findings (defaults to ConsoleSink)
+            ports (iterable): Explicit ports to scan instead of start_port-end_port
+            checkpoint (Checkpoint): Records progress and resumes from it (optional)
+            protocol (str): "tcp" for connect scans, "udp" for UDP probes
+        """
+        super().__init__(None, start_port, end_port, concurrency, timeout, adaptive, sink, ports,
+                         checkpoint, protocol)
+        self.targets = targets
+        # A fixed seed keeps the probe order, and so the checkpoint's work
+        # indices, identical across runs
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.space = InterleavedSpace(targets, self.ports, self.seed)
+        self.total_ports = len(self.space)
+        self.concurrency = max(1, min(concurrency, self.total_ports))
+        self.progress_step = max(100, self.total_ports // 100)
+
+    def describe_target(self):
+        """
+        Describe the sweep targets for progress output
+
+        Returns:
+            str: Target description
+        """
+        return f"{len(self.targets)} hosts ({self.targets})"
+
+    def scope(self):
+        """
+        Get the networks this sweep covers, for result stores
+
+        Returns:
+            list: CIDR blocks as strings
+        """
+        return [str(network) for network in self.targets.networks]
+
+    def job(self):
+        """
+        Describe the sweep for checkpoint matching
+
+        Returns:
+            dict: JSON-serializable job description
+        """
+        job = {'kind': 'sweep', 'targets': str(self.targets), 'ports': str(self.ports),
+               'seed': self.seed}
+        if self.protocol != 'tcp':
+            job['protocol'] = self.protocol
+        return job
+
+    def pair_at(self, index):
+        """
+        Map a work index to the (host, port) pair it stands for
+
+        Args:
+            index (int): Work index in [0, total_ports)
+
+        Returns:
+            tuple: (host, port)
+        """
+        return self.space[index]
+
+    def default_sink(self):
+        """
+        Get the sink used when none is passed in
+
+        Returns:
+            ScanSink: Console output sink that shows host addresses
+        """
+        return ConsoleSink(show_host=True)
+
+    def record_open(self, result):
+        """
+        Record an open port in open_ports
+
+        Args:
+            result (ScanResult): The finding
+        """
+        self.open_ports.append((result.host, result.port, result.service, result.security_info))
+
+    def results_by_host(self):
+        """
+        Group open ports by host
+
+        Returns:
+            dict: Host address -> list of tuples (port, service, security_info)
+        """
+        results = {}
+        for host, port, service, security_info in self.open_ports:
+            results.setdefault(host, []).append((port, service, security_info))
+        return results
+
+    def host_label(self, host):
+        """
+        Get the heading for a host in the summary
+
+        Args:
+            host (str): IP address
+
+        Returns:
+            str: Host heading
+        """
+        return host
+
+    def get_scan_summary(self):
+        """
+        Get formatted sweep summary, grouped by host
+
+        Returns:
+            str: Formatted summary
+        """
+        results = self.results_by_host()
+        if not results:
+            return "\n--- Sweep Summary ---\nNo open ports found." + self.open_filtered_summary()
+
+        lines = ["", "--- Sweep Summary ---"]
+        for host in sorted(results, key=host_sort_key):
+            lines.append(self.host_label(host))
+            for port, service, security_info in sorted(results[host]):
+                lines.append(f"  Port {port}: Open ({service})")
+                if security_info:
+                    lines.append(f"    {security_info}")
+
+        return "\n".join(lines) + "\n" + self.open_filtered_summary()
+
+
+class ResolvingSweepScanner(SweepScanner):
+    """
+    Sweep scanner that probes hosts while their hostnames still resolve
+
+    Hostnames are resolved concurrently (see Resolver), and each address
+    joins the sweep as soon as its name resolves. Hosts in the sweep are
+    probed round-robin, one port at a time, so probes stay spread over
+    hosts as in a regular sweep. The total number of probes is only known
+    once every name has resolved; until then it assumes one address per
+    name.
+
+    The probe order depends on when names resolve, so these scans cannot
+    be checkpointed or split across processes; resolve the names up front
+    with parse_targets() for that.
+    """
+
+    def __init__(self, names, targets=None, start_port=None, end_port=None,
+                 concurrency=DEFAULT_CONCURRENCY, timeout=SOCKET_TIMEOUT,
+                 adaptive=ADAPTIVE_TIMING, sink=None, ports=None, protocol='tcp', resolver=None):
+        """
+        Initialize resolving sweep scanner
+
+        Args:
+            names (list): Hostnames to resolve and scan
+            targets (TargetSet): Addresses to scan as well, from the start (optional)
+            start_port (int): Starting port number
+            end_port (int): Ending port number
+            concurrency (int): Maximum number of connects in flight
+            timeout (float): Connect timeout in seconds
+            adaptive (bool): Use per-host RTT-based timeouts and windows
+            sink (ScanSink): Receives progress and findings (defaults to ConsoleSink)
+            ports (iterable): Explicit ports to scan instead of start_port-end_port
+            protocol (str): "tcp" for connect scans, "udp" for UDP probes
+            resolver (Resolver): Hostname resolver (defaults to the shared one)
+        """
+        AsyncPortScanner.__init__(self, None, start_port, end_port, concurrency, timeout, adaptive,
+                                  sink, ports, None, protocol)
+        self.names = list(names)
+        self.targets = targets if targets is not None else TargetSet([])
+        self.resolver = resolver or default_resolver()
+        self.seed = None
+        self.hostnames = {}
+        self.unresolved = []
+        self.total_ports = (len(self.targets) + len(self.names)) * len(self.ports)
+        self.concurrency = max(1, min(concurrency, self.total_ports))
+        self.progress_step = max(100, self.total_ports // 100)
+        self._active = collections.deque()
+        self._seen = set()
+        self._feeding = False
+        self._next_index = 0
+        self._arrival = None
+        self._room = None
+
+    def describe_target(self):
+        """
+        Describe the sweep targets for progress output
+
+        Returns:
+            str: Target description
+        """
+        if len(self.targets):
+            return f"{len(self.names)} hostnames and {len(self.targets)} hosts ({self.targets})"
+        return f"{len(self.names)} hostnames"
+
+    def scope(self):
+        """
+        Get the networks and addresses this sweep covers, for result stores
+
+        Returns:
+            list: CIDR blocks and resolved addresses as strings
+        """
+        return [str(network) for network in self.targets.networks] + list(self.hostnames)
+
+    def job(self):
+        raise ValueError("Scans that resolve hostnames while running cannot be checkpointed")
+
+    def host_label(self, host):
+        name = self.hostnames.get(host)
+        return f"{host} ({name})" if name else host
+
+    def get_scan_summary(self):
+        """
+        Get formatted sweep summary, grouped by host
+
+        Returns:
+            str: Formatted summary
+        """
+        summary = super().get_scan_summary()
+        if self.unresolved:
+            return f"{summary}\nCould not resolve: {', '.join(self.unresolved)}\n"
+        return summary
+
+    async def admit(self, host):
+        """
+        Add a host to the sweep, waiting while enough hosts are in progress
+
+        Args:
+            host (str): IP address
+
+        Returns:
+            bool: False if the host was already part of the sweep
+        """
+        if host in self._seen:
+            return False
+        self._seen.add(host)
+        while len(self._active) >= self.concurrency:
+            self._room.clear()
+            await self._room.wait()
+        self._active.append([host, 0])
+        self._arrival.set()
+        return True
+
+    async def feed(self):
+        """Add the fixed targets, then each address as its name resolves"""
+        try:
+            for host in self.targets:
+                await self.admit(host)
+
+            async for name, addresses in self.resolver.resolve_many(self.names):
+                if not addresses:
+                    self.unresolved.append(name)
+                admitted = 0
+                for address in addresses:
+                    self.hostnames.setdefault(address, name)
+                    if await self.admit(address):
+                        admitted += 1
+                # The estimate assumed one new address per name
+                self.total_ports += (admitted - 1) * len(self.ports)
+                self.metrics.total = self.total_ports
+        finally:
+            self._feeding = False
+            self._arrival.set()
+
+    async def next_item(self):
+        """
+        Get the next (index, host, port) to probe, waiting for hosts to resolve
+
+        Returns:
+            tuple: (index, host, port), or None once every host is done
+        """
+        while True:
+            if self._active:
+                entry = self._active.popleft()
+                host, position = entry
+                entry[1] += 1
+                if entry[1] < len(self.ports):
+                    self._active.append(entry)
+                else:
+                    self._room.set()
+                index = self._next_index
+                self._next_index += 1
+                return index, host, self.ports[position]
+            if not self._feeding:
+                return None
+            self._arrival.clear()
+            await self._arrival.wait()
+
+    def work(self):
+        """
+        Work items come from next_item() as names resolve
+
+        Returns:
+            iterator: Empty iterator
+        """
+        return iter(())
+
+    async def worker(self, pairs, results):
+        """
+        Worker coroutine
+
+        Args:
+            pairs (iterator): Unused; work comes from next_item()
+            results (asyncio.Queue): Queue receiving ScanResult events and
+                progress counts
+        """
+        while not self._stopped:
+            item = await self.next_item()
+            if item is None:
+                break
+            await self.probe_item(*item, results)
+
+    async def aiter_results(self):
+        """
+        Resolve the hostnames and run the scan, yielding open ports as found
+
+        Yields:
+            ScanResult: One event per open (or, for UDP, open|filtered) port
+        """
+        self.total_ports = (len(self.targets) + len(self.names)) * len(self.ports)
+        self._active.clear()
+        self._seen.clear()
+        self.hostnames = {}
+        self.unresolved = []
+        self._next_index = 0
+        self._arrival = asyncio.Event()
+        self._room = asyncio.Event()
+        self._feeding = True
+        feeder = asyncio.ensure_future(self.feed())
+        try:
+            async for result in super().aiter_results():
+                yield result
+            # Surface resolver failures
+            await feeder
+        finally:
+            feeder.cancel()
@@ -0,0 +1,174 @@
+"""
+Adaptive per-host timing for the port scanner
+"""
+
+import errno
+import time
+from config import (SOCKET_TIMEOUT, MIN_RTT_TIMEOUT, MAX_RTT_TIMEOUT,
+                    MIN_HOST_WINDOW, TIMEOUT_SPIKE_THRESHOLD)
+
+
+# Probe outcomes
+OPEN = "open"
+CLOSED = "closed"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+# The local machine ran out of sockets or ports; says nothing about the target
+RESOURCE = "resource"
+
+# UDP-only outcomes: ICMP says filtered, or no answer at all
+FILTERED = "filtered"
+OPEN_FILTERED = "open|filtered"
+
+REFUSED_ERRNOS = {errno.ECONNREFUSED, getattr(errno, 'WSAECONNREFUSED', errno.ECONNREFUSED)}
+TIMEOUT_ERRNOS = {errno.EAGAIN, errno.EWOULDBLOCK, errno.ETIMEDOUT, errno.EINPROGRESS,
+                  getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK),
+                  getattr(errno, 'WSAETIMEDOUT', errno.ETIMEDOUT)}
+# Local exhaustion: no ephemeral port, fd limit, system file table, buffers
+RESOURCE_ERRNOS = {errno.EADDRNOTAVAIL, errno.EMFILE, errno.ENFILE, errno.ENOBUFS,
+                   getattr(errno, 'WSAEADDRNOTAVAIL', errno.EADDRNOTAVAIL),
+                   getattr(errno, 'WSAEMFILE', errno.EMFILE),
+                   getattr(errno, 'WSAENOBUFS', errno.ENOBUFS)}
+
+
+def classify_connect_result(code):
+    """
+    Map a connect_ex() return code to a probe outcome
+
+    Args:
+        code (int): Return value of socket.connect_ex()
+
+    Returns:
+        str: OPEN, CLOSED, TIMEOUT, RESOURCE or ERROR
+    """
+    if code == 0:
+        return OPEN
+    if code in REFUSED_ERRNOS:
+        return CLOSED
+    if code in TIMEOUT_ERRNOS:
+        return TIMEOUT
+    if code in RESOURCE_ERRNOS:
+        return RESOURCE
+    return ERROR
+
+
+class HostTiming:
+    """
+    Round-trip-time estimator and congestion window for one host
+
+    The connect timeout follows RFC 6298: a smoothed RTT plus four times
+    its variance, clamped to [min_timeout, max_timeout]. Until the host has
+    answered once, the configured default timeout is used.
+
+    The in-flight window starts at ``max_window``. It is halved when the
+    recent timeout rate jumps above the long-run rate. Each reply grows it
+    again, in slow start below ``ssthresh`` and additively above it.
+    """
+
+    __slots__ = ('srtt', 'rttvar', 'initial_timeout', 'min_timeout', 'max_timeout',
+                 'window', 'ssthresh', 'min_window', 'max_window', 'in_flight',
+                 'loss_fast', 'loss_slow', 'last_decrease')
+
+    def __init__(self, max_window, initial_timeout=SOCKET_TIMEOUT,
+                 min_timeout=MIN_RTT_TIMEOUT, max_timeout=MAX_RTT_TIMEOUT,
+                 min_window=MIN_HOST_WINDOW):
+        """
+        Initialize host timing
+
+        Args:
+            max_window (int): Upper bound for probes in flight to this host
+            initial_timeout (float): Timeout used before the first RTT sample
+            min_timeout (float): Lower bound for the adaptive timeout
+            max_timeout (float): Upper bound for the adaptive timeout
+            min_window (int): Lower bound for the in-flight window
+        """
+        self.srtt = None
+        self.rttvar = None
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max(max_timeout, initial_timeout)
+        self.max_window = max(1, max_window)
+        self.min_window = min(min_window, self.max_window)
+        self.window = float(self.max_window)
+        self.ssthresh = float(self.max_window)
+        self.in_flight = 0
+        self.loss_fast = 0.0
+        self.loss_slow = 0.0
+        self.last_decrease = float('-inf')
+
+    @property
+    def has_samples(self):
+        """bool: True once the host has answered at least one probe"""
+        return self.srtt is not None
+
+    def timeout(self, attempt=0):
+        """
+        Get the connect timeout for a probe
+
+        Args:
+            attempt (int): Retransmission number, each one doubles the timeout
+
+        Returns:
+            float: Timeout in seconds
+        """
+        if self.srtt is None:
+            return self.initial_timeout
+
+        rto = self.srtt + 4 * self.rttvar
+        rto = max(self.min_timeout, min(rto, self.max_timeout))
+        return min(rto * (2 ** attempt), self.max_timeout)
+
+    def can_send(self):
+        """
+        Check whether another probe fits in the window
+
+        Returns:
+            bool: True if a probe may be sent now
+        """
+        return self.in_flight < int(self.window)
+
+    def on_reply(self, rtt):
+        """
+        Update the estimator after the host answered (open or refused)
+
+        Args:
+            rtt (float): Measured round-trip time in seconds
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+        self._observe(False)
+        if self.window < self.ssthresh:
+            self.window += 1
+        else:
+            self.window += 1 / self.window
+        self.window = min(self.window, self.max_window)
+
+    def on_timeout(self, now=None):
+        """
+        Update the window after a probe timed out
+
+        Args:
+            now (float): Current monotonic time (defaults to time.monotonic())
+        """
+        self._observe(True)
+        if now is None:
+            now = time.monotonic()
+
+        # Filtered ports time out all the time, so only a jump above the
+        # long-run timeout rate counts as congestion, at most once per RTO.
+        spike = self.loss_fast > self.loss_slow + TIMEOUT_SPIKE_THRESHOLD
+        if spike and now - self.last_decrease >= self.timeout():
+            self.ssthresh = max(self.window / 2, self.min_window)
+            self.window = self.ssthresh
+            self.last_decrease = now
+
+    def _observe(self, lost):
+        sample = 1.0 if lost else 0.0
+        self.loss_fast += (sample - self.loss_fast) / 8
+        self.loss_slow += (sample - self.loss_slow) / 64
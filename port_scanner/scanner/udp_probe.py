@@ -0,0 +1,335 @@
+"""
+UDP probing: protocol payloads, a shared socket pool and ICMP error handling
+"""
+
+import asyncio
+import errno
+import socket
+import struct
+import sys
+import time
+from config import (SOCKET_TIMEOUT, UDP_SOCKET_POOL, UDP_MAX_RETRIES, UDP_MIN_TIMEOUT,
+                    UDP_MAX_HOST_RATE, UDP_MIN_HOST_RATE)
+from .timing import HostTiming, OPEN, CLOSED, ERROR, OPEN_FILTERED, FILTERED
+
+# Payloads that make common UDP services answer. Ports without one get an
+# empty datagram, which only closed ports (ICMP unreachable) answer reliably.
+DNS_PAYLOAD = (b'\x13\x37\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00'   # id, RD, 1 question
+               b'\x07version\x04bind\x00\x00\x10\x00\x03')           # version.bind TXT CH
+NTP_PAYLOAD = b'\xe3' + b'\x00' * 47                                  # v4 client request
+SNMP_PAYLOAD = (b'\x30\x26\x02\x01\x00\x04\x06public\xa0\x19\x02\x04\x13\x37\x13\x37'
+                b'\x02\x01\x00\x02\x01\x00\x30\x0b\x30\x09\x06\x05\x2b\x06\x01\x02\x01'
+                b'\x05\x00')                                          # v1 get sysDescr-tree
+NETBIOS_PAYLOAD = (b'\x13\x37\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00'
+                   b'\x20CKAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA\x00\x00\x21\x00\x01')  # NBSTAT *
+SSDP_PAYLOAD = (b'M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\n'
+                b'MAN: "ssdp:discover"\r\nMX: 1\r\nST: ssdp:all\r\n\r\n')
+TFTP_PAYLOAD = b'\x00\x01port-scanner\x00octet\x00'                   # read request
+
+UDP_PAYLOADS = {
+    53: DNS_PAYLOAD,
+    123: NTP_PAYLOAD,
+    137: NETBIOS_PAYLOAD,
+    161: SNMP_PAYLOAD,
+    1900: SSDP_PAYLOAD,
+    5353: DNS_PAYLOAD,
+    69: TFTP_PAYLOAD,
+}
+
+# Linux reports ICMP errors for unconnected UDP sockets through the socket
+# error queue once IP_RECVERR is set. Python does not export the constants.
+IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+IPV6_RECVERR = getattr(socket, 'IPV6_RECVERR', 25)
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+_EXTENDED_ERROR = struct.Struct('=IBBBB')
+
+# ICMP destination-unreachable codes meaning "filtered" (host/net
+# unreachable, administratively prohibited)
+FILTERED_ICMP_CODES = {1, 2, 9, 10, 13}
+
+
+def udp_payload(port):
+    """
+    Get the probe payload for a UDP port
+
+    Args:
+        port (int): Port number
+
+    Returns:
+        bytes: Payload (empty if no protocol-specific probe exists)
+    """
+    return UDP_PAYLOADS.get(port, b'')
+
+
+def classify_icmp_error(origin, icmp_type, icmp_code):
+    """
+    Map an ICMP error from the socket error queue to a port state
+
+    Args:
+        origin (int): ee_origin of the extended error
+        icmp_type (int): ICMP type
+        icmp_code (int): ICMP code
+
+    Returns:
+        str: CLOSED, FILTERED, or None if the error says nothing about the port
+    """
+    if origin == SO_EE_ORIGIN_ICMP and icmp_type == 3:
+        if icmp_code == 3:
+            return CLOSED
+        if icmp_code in FILTERED_ICMP_CODES:
+            return FILTERED
+    elif origin == SO_EE_ORIGIN_ICMP6 and icmp_type == 1:
+        return CLOSED if icmp_code == 4 else FILTERED
+    return None
+
+
+class UdpPacer:
+    """
+    Per-host send rate for UDP probes
+
+    Most systems rate-limit ICMP port-unreachable messages (Linux sends
+    about one per second after a short burst). Once a host has shown that
+    it answers closed ports, silence from it may be a suppressed ICMP
+    message rather than an open port. The pacer then halves its send rate
+    (at most once per timeout period) so the host's ICMP budget keeps up,
+    and grows it by one probe per second for every answer. Hosts that never
+    answer are not slowed down, so filtered hosts cost no extra time.
+    """
+
+    __slots__ = ('rate', 'min_rate', 'max_rate', 'next_send', 'last_decrease')
+
+    def __init__(self, max_rate=UDP_MAX_HOST_RATE, min_rate=UDP_MIN_HOST_RATE):
+        """
+        Initialize UDP pacer
+
+        Args:
+            max_rate (float): Highest probes per second to the host
+            min_rate (float): Lowest probes per second to the host
+        """
+        self.rate = float(max_rate)
+        self.min_rate = min(min_rate, max_rate)
+        self.max_rate = max_rate
+        self.next_send = 0.0
+        self.last_decrease = float('-inf')
+
+    def reserve(self, now):
+        """
+        Reserve the next send slot
+
+        Args:
+            now (float): Current monotonic time
+
+        Returns:
+            float: Seconds to wait before sending
+        """
+        start = max(now, self.next_send)
+        self.next_send = start + 1 / self.rate
+        return start - now
+
+    def on_answer(self):
+        """Grow the rate after a reply or ICMP error"""
+        self.rate = min(self.max_rate, self.rate + 1)
+
+    def on_silence(self, now, period):
+        """
+        Slow down after an unanswered probe to a host that answers
+
+        Args:
+            now (float): Current monotonic time
+            period (float): Minimum seconds between two decreases
+        """
+        if now - self.last_decrease >= period:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.last_decrease = now
+
+
+class UdpProber:
+    """
+    Sends UDP probes from a small shared socket pool and matches answers
+
+    Replies are matched to probes by their source (host, port). On Linux,
+    ICMP port-unreachable errors are read from the sockets' error queue,
+    which carries the original destination, so closed ports are detected
+    without a socket per probe. Elsewhere unconnected sockets do not see
+    ICMP errors and unanswered ports are reported as open|filtered.
+    """
+
+    def __init__(self, timeout=SOCKET_TIMEOUT, retries=UDP_MAX_RETRIES, pool_size=UDP_SOCKET_POOL,
+                 adaptive=True, rate_limiter=None):
+        """
+        Initialize UDP prober
+
+        Args:
+            timeout (float): Reply timeout in seconds (initial timeout when adaptive)
+            retries (int): Retransmissions for unanswered probes to answering hosts
+            pool_size (int): Sockets per address family
+            adaptive (bool): Use per-host RTT-based timeouts and send pacing
+            rate_limiter (RateLimiter): Probe-rate ceiling for every datagram, retransmissions included
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = max(1, pool_size)
+        self.adaptive = adaptive
+        self.rate_limiter = rate_limiter
+        self.recverr = sys.platform.startswith('linux')
+        self.pending = {}
+        self.host_timing = {}
+        self.pacers = {}
+        self._pools = {}
+        self._next_socket = 0
+        self._loop = None
+
+    def _socket_for(self, family):
+        """Get the next socket of the family's pool, creating the pool on first use"""
+        pool = self._pools.get(family)
+        if pool is None:
+            pool = []
+            for _ in range(self.pool_size):
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                if self.recverr:
+                    if family == socket.AF_INET6:
+                        sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+                    else:
+                        sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+                self._loop.add_reader(sock.fileno(), self._on_readable, sock)
+                pool.append(sock)
+            self._pools[family] = pool
+
+        self._next_socket = (self._next_socket + 1) % len(pool)
+        return pool[self._next_socket]
+
+    def _resolve(self, host, port, state):
+        future = self.pending.get((host, port))
+        if future is not None and not future.done():
+            future.set_result(state)
+
+    def _on_readable(self, sock):
+        """Drain replies and ICMP errors from a pool socket"""
+        while True:
+            try:
+                _, address = sock.recvfrom(4096)
+            except ConnectionRefusedError:
+                # Pending ICMP error; the error queue says which probe it was
+                continue
+            except OSError:
+                break
+            self._resolve(address[0], address[1], OPEN)
+
+        while self.recverr:
+            try:
+                _, ancdata, _, address = sock.recvmsg(1, 512, socket.MSG_ERRQUEUE)
+            except OSError:
+                break
+            for level, kind, data in ancdata:
+                if (level, kind) not in ((socket.IPPROTO_IP, IP_RECVERR),
+                                         (socket.IPPROTO_IPV6, IPV6_RECVERR)):
+                    continue
+                _, origin, icmp_type, icmp_code, _ = _EXTENDED_ERROR.unpack_from(data)
+                state = classify_icmp_error(origin, icmp_type, icmp_code)
+                if state and address:
+                    self._resolve(address[0], address[1], state)
+
+    def open(self):
+        """Bind the prober to the running event loop"""
+        self._loop = asyncio.get_running_loop()
+
+    def close(self):
+        """Close the socket pool"""
+        for pool in self._pools.values():
+            for sock in pool:
+                self._loop.remove_reader(sock.fileno())
+                sock.close()
+        self._pools = {}
+
+    def timing_for(self, host):
+        """
+        Get the timing state and pacer for a host, creating them on first use
+
+        Args:
+            host (str): Target IP address
+
+        Returns:
+            tuple: (HostTiming, UdpPacer)
+        """
+        timing = self.host_timing.get(host)
+        if timing is None:
+            timing = HostTiming(1, initial_timeout=self.timeout, min_timeout=UDP_MIN_TIMEOUT)
+            self.host_timing[host] = timing
+            self.pacers[host] = UdpPacer()
+        return timing, self.pacers[host]
+
+    async def send(self, host, port):
+        """
+        Send one probe datagram, waiting while the socket buffer is full
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+
+        Returns:
+            bool: True if the datagram was sent
+        """
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        sock = self._socket_for(family)
+        payload = udp_payload(port)
+        while True:
+            try:
+                sock.sendto(payload, (host, port))
+                return True
+            except (BlockingIOError, InterruptedError):
+                await asyncio.sleep(0.001)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    await asyncio.sleep(0.001)
+                    continue
+                return False
+
+    async def probe(self, host, port):
+        """
+        Probe one UDP port
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+
+        Returns:
+            str: OPEN, CLOSED, FILTERED, OPEN_FILTERED or ERROR
+        """
+        timing, pacer = self.timing_for(host)
+        retries = self.retries if self.adaptive else 0
+        for attempt in range(retries + 1):
+            if self.adaptive:
+                delay = pacer.reserve(time.monotonic())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(host)
+            timeout = timing.timeout(attempt) if self.adaptive else self.timeout
+
+            future = self._loop.create_future()
+            self.pending[(host, port)] = future
+            start = time.monotonic()
+            try:
+                if not await self.send(host, port):
+                    return ERROR
+                state = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                state = None
+            finally:
+                self.pending.pop((host, port), None)
+
+            if state is None:
+                # Silence is only suspicious from hosts that do answer
+                if self.adaptive and timing.has_samples:
+                    pacer.on_silence(time.monotonic(), timing.timeout())
+                    if attempt < retries:
+                        continue
+                return OPEN_FILTERED
+
+            timing.on_reply(time.monotonic() - start)
+            pacer.on_answer()
+            return state
+
+        return OPEN_FILTERED
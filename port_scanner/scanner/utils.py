@@ -3,7 +3,7 @@ Utility functions for the port scanner
 """
 
 import ipaddress
-import socket
+from .resolver import default_resolver
 
 
 def validate_ip(ip_string):
@@ -50,17 +50,18 @@ def resolve_hostname(hostname):
     """
     Resolve hostname to IP address
 
+    Answers are cached; see Resolver for all addresses of a name.
+
     Args:
         hostname (str): Hostname to resolve
 
     Returns:
-        str: IP address or None if resolution fails
+        str: IPv4 address or None if resolution fails
     """
-    try:
-        ip = socket.gethostbyname(hostname)
-        return ip
-    except socket.gaierror:
-        return None
+    for address in default_resolver().resolve(hostname):
+        if ':' not in address:
+            return address
+    return None
 
 
 def format_scan_results(open_ports):
@@ -76,11 +77,31 @@ def format_scan_results(open_ports):
     if not open_ports:
         return "No open ports found."
 
-    result = "\n--- Scan Summary ---\n"
-    for port, service in sorted(open_ports):
-        result += f"Port {port}: Open ({service})\n"
+    lines = ["", "--- Scan Summary ---"]
+    lines.extend(f"Port {port}: Open ({service})" for port, service in sorted(open_ports))
+    return "\n".join(lines) + "\n"
+
+
+def format_scan_summary(open_ports):
+    """
+    Format detailed scan results, including security information
+
+    Args:
+        open_ports (list): List of tuples (port, service, security_info)
+
+    Returns:
+        str: Formatted summary string
+    """
+    if not open_ports:
+        return "\n--- Scan Summary ---\nNo open ports found."
+
+    lines = ["", "--- Scan Summary ---"]
+    for port, service, security_info in sorted(open_ports):
+        lines.append(f"Port {port}: Open ({service})")
+        if security_info:
+            lines.append(f"  {security_info}")
 
-    return result
+    return "\n".join(lines) + "\n"
 
 
 def get_user_input():
@@ -0,0 +1,354 @@
+"""
+Banner grabbing and service-version detection for open ports
+"""
+
+import asyncio
+import json
+import os
+import re
+import ssl
+import time
+from collections import namedtuple
+from config import VERSION_PROBE_TIMEOUT, VERSION_CONCURRENCY, VERSION_CACHE_TTL
+from .service_identifier import identify_service
+
+
+# A protocol probe: the bytes to send (empty for "wait for a banner")
+Probe = namedtuple('Probe', ['name', 'payload'])
+
+# Result of version detection for one (host, port)
+ServiceMatch = namedtuple('ServiceMatch', ['host', 'port', 'service', 'version', 'tls', 'banner'])
+
+NULL_PROBE = Probe('NULL', b'')
+HTTP_PROBE = Probe('GetRequest', b'GET / HTTP/1.0\r\nUser-Agent: port-scanner\r\n\r\n')
+REDIS_PROBE = Probe('RedisPing', b'*1\r\n$4\r\nPING\r\n')
+GENERIC_PROBE = Probe('GenericLines', b'\r\n\r\n')
+
+# Ports where the client speaks first, so waiting for a banner is pointless
+HTTP_PORTS = {80, 81, 443, 591, 3000, 5000, 8000, 8008, 8080, 8081, 8088, 8443, 8888, 9000, 9200, 9443}
+
+# Ports that usually wrap their protocol in TLS
+TLS_PORTS = {443, 465, 563, 636, 853, 989, 990, 992, 993, 994, 995, 5986, 8443, 9443}
+
+# Signature set: (service, pattern, version group or None). Patterns are
+# matched against the start of the reply, the first match wins. A bare 220
+# greeting names no protocol, so it is left unmatched rather than guessed.
+_SIGNATURES = [
+    ('ssh', rb'^SSH-[\d.]+-([^\r\n]+)', 1),
+    ('http', rb'^HTTP/1\.[01] \d{3}.*?\r\nServer: *([^\r\n]+)', 1),
+    ('http', rb'^HTTP/1\.[01] \d{3}', None),
+    ('ftp', rb'^220[ -]([^\r\n]*FTP[^\r\n]*)', 1),
+    ('smtp', rb'^220[ -]([^\r\n]*(?:SMTP|Postfix|Exim|Sendmail)[^\r\n]*)', 1),
+    ('pop3', rb'^\+OK ?([^\r\n]*)', 1),
+    ('imap', rb'^\* OK ?([^\r\n]*)', 1),
+    ('mysql', rb'^.\x00\x00\x00\x0a(\d[\w.\-]*)', 1),
+    ('mysql', rb'^.\x00\x00\x00\xffj\x04Host', None),
+    ('redis', rb'^\+PONG', None),
+    ('redis', rb'^-(?:NOAUTH|ERR)', None),
+    ('vnc', rb'^RFB (\d{3}\.\d{3})', 1),
+    ('telnet', rb'^\xff[\xfb-\xfe]', None),
+    ('rtsp', rb'^RTSP/1\.0 \d{3}.*?\r\nServer: *([^\r\n]+)', 1),
+    ('rtsp', rb'^RTSP/1\.0 \d{3}', None),
+    ('irc', rb'^:[\w.\-]+ NOTICE ', None),
+    ('memcached', rb'^ERROR\r\n', None),
+]
+SIGNATURES = [(service, re.compile(pattern, re.S | re.I), group)
+              for service, pattern, group in _SIGNATURES]
+
+
+def match_banner(banner):
+    """
+    Match a service reply against the signature set
+
+    Args:
+        banner (bytes): Bytes received from the service
+
+    Returns:
+        tuple: (service, version) or None if nothing matched
+    """
+    for service, pattern, group in SIGNATURES:
+        match = pattern.search(banner)
+        if match:
+            version = None
+            if group is not None:
+                version = match.group(group).decode('latin-1').strip()
+            return service, version
+    return None
+
+
+def probes_for_port(port):
+    """
+    Get the probes to try on a port, most likely first
+
+    Args:
+        port (int): Port number
+
+    Returns:
+        list: Probe objects
+    """
+    if port in HTTP_PORTS:
+        return [HTTP_PROBE, NULL_PROBE]
+    if port == 6379:
+        return [REDIS_PROBE, NULL_PROBE]
+    return [NULL_PROBE, HTTP_PROBE, GENERIC_PROBE]
+
+
+class ProbeCache:
+    """
+    Cache of version-detection results keyed by (host, port)
+
+    Entries younger than ``ttl`` seconds are reused instead of probing the
+    service again. With a path, the cache is loaded from and saved to a
+    JSON file so it survives between scans.
+    """
+
+    def __init__(self, path=None, ttl=VERSION_CACHE_TTL):
+        """
+        Initialize probe cache
+
+        Args:
+            path (str): JSON file to persist the cache in (memory only if None)
+            ttl (float): Seconds an entry stays valid
+        """
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def _key(host, port):
+        return f"{host}|{port}"
+
+    def get(self, host, port, now=None):
+        """
+        Get a fresh cached result
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+            now (float): Current time (defaults to time.time())
+
+        Returns:
+            ServiceMatch: Cached result, or None if missing or expired
+        """
+        entry = self.entries.get(self._key(host, port))
+        if entry is None:
+            return None
+        if now is None:
+            now = time.time()
+        if now - entry['time'] > self.ttl:
+            return None
+        return ServiceMatch(host, port, entry['service'], entry['version'], entry['tls'], entry['banner'])
+
+    def put(self, match, now=None):
+        """
+        Store a result
+
+        Args:
+            match (ServiceMatch): Result to cache
+            now (float): Current time (defaults to time.time())
+        """
+        self.entries[self._key(match.host, match.port)] = {
+            'time': time.time() if now is None else now,
+            'service': match.service,
+            'version': match.version,
+            'tls': match.tls,
+            'banner': match.banner,
+        }
+
+    def load(self):
+        """Load entries from the cache file, ignoring a corrupt file"""
+        try:
+            with open(self.path) as handle:
+                self.entries = json.load(handle)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write entries to the cache file, dropping expired ones"""
+        if not self.path:
+            return
+        now = time.time()
+        fresh = {key: entry for key, entry in self.entries.items()
+                 if now - entry['time'] <= self.ttl}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as handle:
+            json.dump(fresh, handle)
+        os.replace(temp_path, self.path)
+
+
+class ServiceDetector:
+    """
+    Concurrent banner grabber and version detector
+
+    Sends protocol probes to ports already known to be open and matches the
+    replies against the signature set. Up to ``concurrency`` ports are
+    probed at once.
+    """
+
+    def __init__(self, concurrency=VERSION_CONCURRENCY, timeout=VERSION_PROBE_TIMEOUT, cache=None,
+                 rate_limiter=None):
+        """
+        Initialize service detector
+
+        Args:
+            concurrency (int): Maximum number of ports probed at once
+            timeout (float): Connect and read timeout per probe in seconds
+            cache (ProbeCache): Cache of earlier results (optional)
+            rate_limiter (RateLimiter): Probe-rate ceiling for every connect (optional)
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self._tls_context = ssl.create_default_context()
+        # Only the service banner is of interest, not the certificate
+        self._tls_context.check_hostname = False
+        self._tls_context.verify_mode = ssl.CERT_NONE
+
+    async def grab(self, host, port, probe, use_tls=False):
+        """
+        Send one probe and read the reply
+
+        Args:
+            host (str): Target IP address
+            port (int): Port number
+            probe (Probe): Probe to send
+            use_tls (bool): Wrap the connection in TLS
+
+        Returns:
+            bytes: Reply bytes (empty if the service stayed silent)
+        """
+        tls = self._tls_context if use_tls else None
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(host)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=tls), self.timeout)
+        try:
+            if probe.payload:
+                writer.write(probe.payload)
+                await writer.drain()
+            try:
+                return await asyncio.wait_for(reader.read(4096), self.timeout)
+            except asyncio.TimeoutError:
+                return b''
+        finally:
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                pass
+
+    async def detect(self, host, port):
+        """
+        Detect the service and version on one open port
+
+        Args:
+            host (str): Target IP address
+            port (int): Open port number
+
+        Returns:
+            ServiceMatch: Detection result
+        """
+        if self.cache is not None:
+            cached = self.cache.get(host, port)
+            if cached is not None:
+                return cached
+
+        attempts = [port in TLS_PORTS, port not in TLS_PORTS]
+        first_banner = b''
+        result = None
+        for use_tls in attempts:
+            for probe in probes_for_port(port):
+                try:
+                    banner = await self.grab(host, port, probe, use_tls)
+                except (OSError, asyncio.TimeoutError, ssl.SSLError):
+                    break
+                if banner and not first_banner:
+                    first_banner = banner
+                matched = match_banner(banner) if banner else None
+                if matched:
+                    service, version = matched
+                    result = ServiceMatch(host, port, service, version, use_tls, _printable(banner))
+                    break
+            if result:
+                break
+
+        if result is None:
+            result = ServiceMatch(host, port, identify_service(port), None, False, _printable(first_banner))
+
+        if self.cache is not None:
+            self.cache.put(result)
+        return result
+
+    async def detect_all(self, targets):
+        """
+        Detect services on many open ports concurrently
+
+        Args:
+            targets (iterable): (host, port) tuples
+
+        Returns:
+            list: ServiceMatch results, in input order
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(host, port):
+            async with semaphore:
+                return await self.detect(host, port)
+
+        return await asyncio.gather(*(bounded(host, port) for host, port in targets))
+
+
+def _printable(banner, limit=120):
+    """Get a short, printable form of a banner"""
+    text = banner[:limit].decode('latin-1')
+    return ''.join(ch if ch.isprintable() else '.' for ch in text).strip()
+
+
+def detect_services(targets, concurrency=VERSION_CONCURRENCY, timeout=VERSION_PROBE_TIMEOUT,
+                    cache_path=None, rate_limiter=None):
+    """
+    Run version detection on open ports from a finished scan
+
+    Args:
+        targets (iterable): (host, port) tuples of open ports
+        concurrency (int): Maximum number of ports probed at once
+        timeout (float): Connect and read timeout per probe in seconds
+        cache_path (str): JSON file caching results between runs (optional)
+        rate_limiter (RateLimiter): Probe-rate ceiling (optional)
+
+    Returns:
+        list: ServiceMatch results
+    """
+    cache = ProbeCache(cache_path) if cache_path else None
+    detector = ServiceDetector(concurrency, timeout, cache, rate_limiter)
+    results = asyncio.run(detector.detect_all(list(targets)))
+    if cache is not None:
+        cache.save()
+    return results
+
+
+def format_service_matches(matches):
+    """
+    Format version-detection results for display
+
+    Args:
+        matches (list): ServiceMatch results
+
+    Returns:
+        str: Formatted results string
+    """
+    if not matches:
+        return ""
+
+    lines = ["", "--- Service Detection ---"]
+    show_host = len({match.host for match in matches}) > 1
+    for match in sorted(matches, key=lambda m: (m.host, m.port)):
+        where = f"{match.host}:{match.port}" if show_host else f"Port {match.port}"
+        tls = " (TLS)" if match.tls else ""
+        version = f" - {match.version}" if match.version else ""
+        lines.append(f"{where}: {match.service}{tls}{version}")
+
+    return "\n".join(lines) + "\n"
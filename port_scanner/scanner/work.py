@@ -0,0 +1,163 @@
+"""
+Lazy work distribution for the scan engines
+"""
+
+import bisect
+import threading
+from collections import namedtuple
+
+
+class PortRange(namedtuple('PortRange', ['start', 'end'])):
+    """
+    Inclusive range of ports, e.g. PortRange(1, 1024)
+    """
+
+    __slots__ = ()
+
+    def __len__(self):
+        return self.end - self.start + 1
+
+
+def ranges_from_ports(ports):
+    """
+    Compress a collection of ports into sorted PortRange descriptors
+
+    Args:
+        ports (iterable): Port numbers, in any order, duplicates allowed
+
+    Returns:
+        list: PortRange objects covering exactly the given ports
+    """
+    ranges = []
+    for port in sorted(set(ports)):
+        if ranges and ranges[-1].end == port - 1:
+            ranges[-1] = PortRange(ranges[-1].start, port)
+        else:
+            ranges.append(PortRange(port, port))
+    return ranges
+
+
+class RangeSpace:
+    """
+    Indexable sequence of integers defined by inclusive range descriptors
+
+    Memory use depends on the number of ranges, not the number of values.
+    """
+
+    def __init__(self, ranges):
+        """
+        Initialize range space
+
+        Args:
+            ranges (list): PortRange descriptors (or (start, end) tuples)
+        """
+        self.ranges = [PortRange(*port_range) for port_range in ranges]
+        self._offsets = []
+        total = 0
+        for port_range in self.ranges:
+            self._offsets.append(total)
+            total += len(port_range)
+        self._size = total
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("range space index out of range")
+
+        position = bisect.bisect_right(self._offsets, index) - 1
+        return self.ranges[position].start + index - self._offsets[position]
+
+    def __iter__(self):
+        for port_range in self.ranges:
+            yield from range(port_range.start, port_range.end + 1)
+
+    def __str__(self):
+        return ",".join(
+            str(r.start) if r.start == r.end else f"{r.start}-{r.end}" for r in self.ranges
+        )
+
+
+class PortSpace(RangeSpace):
+    """
+    Indexable sequence of ports defined by range descriptors, e.g. the
+    ports "1-1024,3306,8080-8090"
+    """
+
+
+class WorkSource:
+    """
+    Thread-safe source of work chunks over the index space [0, size)
+
+    Chunks are handed out on demand as ``range`` objects, so nothing is
+    queued up front and memory use stays O(1) whatever the size. A source
+    can be split into interleaved shards: shard ``i`` of ``n`` receives
+    chunks ``i, i + n, i + 2n, ...``.
+    """
+
+    def __init__(self, size, chunk_size=1, shard=0, shards=1):
+        """
+        Initialize work source
+
+        Args:
+            size (int): Number of work items (indices 0 .. size - 1)
+            chunk_size (int): Indices per chunk
+            shard (int): Index of this shard
+            shards (int): Total number of shards
+        """
+        if not 0 <= shard < shards:
+            raise ValueError("shard must be in [0, shards)")
+
+        self.size = size
+        self.chunk_size = max(1, chunk_size)
+        self.shard_index = shard
+        self.shards = shards
+        self._next_chunk = shard
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of indices that belong to this shard"""
+        chunks, tail = divmod(self.size, self.chunk_size)
+        full, extra = divmod(chunks, self.shards)
+        count = full * self.chunk_size
+        if self.shard_index < extra:
+            count += self.chunk_size
+        elif self.shard_index == extra:
+            count += tail
+        return count
+
+    def next_chunk(self):
+        """
+        Take the next chunk of indices
+
+        Returns:
+            range: Indices to process, or None once the source is exhausted
+        """
+        with self._lock:
+            start = self._next_chunk * self.chunk_size
+            if start >= self.size:
+                return None
+            self._next_chunk += self.shards
+
+        return range(start, min(start + self.chunk_size, self.size))
+
+    def __iter__(self):
+        """Yield indices one by one, taking chunks on demand"""
+        for chunk in iter(self.next_chunk, None):
+            yield from chunk
+
+    def shard(self, index, count):
+        """
+        Get one shard of this source's full index space
+
+        Args:
+            index (int): Shard index
+            count (int): Number of shards
+
+        Returns:
+            WorkSource: Independent source for the shard
+        """
+        return WorkSource(self.size, self.chunk_size, index, count)
@@ -0,0 +1,244 @@
+"""
+Streaming machine-readable output: JSON Lines, CSV and nmap-style XML
+"""
+
+import csv
+import json
+import time
+from xml.sax.saxutils import quoteattr
+from config import OUTPUT_BUFFER_BYTES, OUTPUT_FLUSH_INTERVAL
+from .sinks import ScanSink, MultiSink
+from .timing import OPEN, OPEN_FILTERED
+
+# Columns of the CSV output, also the keys of each JSON Lines record
+FIELDS = ['time', 'host', 'port', 'protocol', 'state', 'service', 'security_info']
+
+
+def timestamp(now=None):
+    """
+    Format a time as an ISO 8601 UTC timestamp
+
+    Args:
+        now (float): Seconds since the epoch (defaults to now)
+
+    Returns:
+        str: Timestamp such as 2024-01-31T12:00:00Z
+    """
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+
+
+class StreamWriter(ScanSink):
+    """
+    Base class for sinks that write every finding to a file as it arrives
+
+    Output goes through a fixed-size file buffer, which is flushed at least
+    every ``flush_interval`` seconds while the scan runs, so readers see
+    findings promptly and memory use does not grow with the scan.
+    Subclasses write a header, one record per finding and a footer.
+    """
+
+    newline = None
+
+    def __init__(self, path, buffer_size=OUTPUT_BUFFER_BYTES, flush_interval=OUTPUT_FLUSH_INTERVAL):
+        """
+        Initialize stream writer
+
+        Args:
+            path (str): Output file
+            buffer_size (int): Bytes buffered before a write to the file
+            flush_interval (float): Longest time in seconds a finding stays buffered
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.handle = open(path, 'w', buffering=buffer_size, encoding='utf-8', newline=self.newline)
+        self.protocol = 'tcp'
+        self.count = 0
+        self.started = False
+        self.finished = False
+        self._last_flush = time.monotonic()
+
+    def start(self, scanner):
+        self.protocol = getattr(scanner, 'protocol', 'tcp')
+        self.started = True
+        self.write_header(scanner)
+        self.flush()
+
+    def result(self, result):
+        self.count += 1
+        self.write_result(result)
+        self.maybe_flush()
+
+    def progress(self, scanned, total):
+        self.maybe_flush()
+
+    def finish(self, scanner, duration):
+        self.write_footer(scanner, duration)
+        self.finished = True
+        self.flush()
+
+    def close(self):
+        if self.handle.closed:
+            return
+        # An interrupted scan still gets a well-formed file
+        if self.started and not self.finished:
+            self.write_footer(None, None)
+            self.finished = True
+        self.handle.close()
+
+    def maybe_flush(self):
+        """Flush if findings have been buffered for too long"""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered output to the file"""
+        self.handle.flush()
+        self._last_flush = time.monotonic()
+
+    def record(self, result):
+        """
+        Build the flat record for a finding
+
+        Args:
+            result (ScanResult): The finding
+
+        Returns:
+            dict: Values for FIELDS
+        """
+        return {
+            'time': timestamp(),
+            'host': result.host,
+            'port': result.port,
+            'protocol': self.protocol,
+            'state': result.state,
+            'service': result.service,
+            'security_info': result.security_info or '',
+        }
+
+    def write_header(self, scanner):
+        """Write whatever precedes the first finding"""
+
+    def write_result(self, result):
+        """Write one finding"""
+        raise NotImplementedError
+
+    def write_footer(self, scanner, duration):
+        """
+        Write whatever follows the last finding
+
+        Args:
+            scanner: The scanner that finished (None if the scan was interrupted)
+            duration (float): Scan duration in seconds (None if interrupted)
+        """
+
+
+class JsonLinesWriter(StreamWriter):
+    """
+    Writes one JSON object per finding and line
+    """
+
+    def write_result(self, result):
+        self.handle.write(json.dumps(self.record(result)) + '\n')
+
+
+class CsvWriter(StreamWriter):
+    """
+    Writes findings as CSV rows under a header row
+    """
+
+    newline = ''
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self.writer = csv.DictWriter(self.handle, fieldnames=FIELDS)
+
+    def write_header(self, scanner):
+        self.writer.writeheader()
+
+    def write_result(self, result):
+        self.writer.writerow(self.record(result))
+
+
+class XmlWriter(StreamWriter):
+    """
+    Writes findings in a subset of the nmap XML format
+
+    Each finding becomes its own ``<host>`` element as it arrives, instead
+    of one element per host holding all its ports, so nothing has to be
+    kept in memory until a host is complete. Tools that import nmap XML
+    merge host elements with the same address.
+    """
+
+    def write_header(self, scanner):
+        now = time.time()
+        self.start_time = now
+        scan_type = 'udp' if self.protocol == 'udp' else 'connect'
+        self.handle.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<!DOCTYPE nmaprun>\n'
+            f'<nmaprun scanner="port_scanner" start="{int(now)}" '
+            f'startstr={quoteattr(time.ctime(now))} version="1.0.0" xmloutputversion="1.05">\n'
+            f'<scaninfo type="{scan_type}" protocol="{self.protocol}" '
+            f'numservices="{len(scanner.ports)}" services={quoteattr(str(scanner.ports))}/>\n')
+
+    def write_result(self, result):
+        address_type = 'ipv6' if ':' in result.host else 'ipv4'
+        if result.state == OPEN:
+            reason = 'udp-response' if self.protocol == 'udp' else 'syn-ack'
+        elif result.state == OPEN_FILTERED:
+            reason = 'no-response'
+        else:
+            reason = 'unknown'
+        service = 'unknown' if result.service == 'Unknown Service' else result.service.lower()
+        self.handle.write(
+            f'<host starttime="{int(time.time())}"><status state="up" reason="{reason}"/>'
+            f'<address addr={quoteattr(result.host)} addrtype="{address_type}"/>'
+            f'<ports><port protocol="{self.protocol}" portid="{result.port}">'
+            f'<state state={quoteattr(result.state)} reason="{reason}" reason_ttl="0"/>'
+            f'<service name={quoteattr(service)} method="table" conf="3"/>'
+            f'</port></ports></host>\n')
+
+    def write_footer(self, scanner, duration):
+        now = time.time()
+        if duration is None:
+            duration = now - self.start_time
+        exit_status = 'success' if scanner is not None else 'error'
+        summary = f"Scan done; {self.count} open ports found in {duration:.2f} seconds"
+        self.handle.write(
+            f'<runstats><finished time="{int(now)}" timestr={quoteattr(time.ctime(now))} '
+            f'elapsed="{duration:.2f}" summary={quoteattr(summary)} exit="{exit_status}"/></runstats>\n'
+            '</nmaprun>\n')
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+    'xml': XmlWriter,
+}
+
+
+def open_writers(outputs):
+    """
+    Open the writers for a set of output files
+
+    Args:
+        outputs (dict): Format ("jsonl", "csv" or "xml") -> output file
+
+    Returns:
+        ScanSink: One writer, a MultiSink over several, or None if no file is given
+    """
+    writers = []
+    try:
+        for kind, path in outputs.items():
+            if path:
+                writers.append(WRITERS[kind](path))
+    except Exception:
+        # Don't leak the files already opened when a later one fails
+        for writer in writers:
+            writer.close()
+        raise
+    if not writers:
+        return None
+    if len(writers) == 1:
+        return writers[0]
+    return MultiSink(*writers)
@@ -0,0 +1,58 @@
+import socket
+import unittest
+from scanner.async_scanner import AsyncPortScanner
+from scanner.port_frequency import top_ports
+from scanner.port_scanner import PortScanner
+from scanner.sinks import NullSink, ScanSink
+
+
+class TestAsyncPortScanner(unittest.TestCase):
+    def setUp(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_finds_open_port(self):
+        scanner = AsyncPortScanner('127.0.0.1', self.port - 5, self.port + 5, concurrency=4,
+                                   sink=NullSink())
+        open_ports = scanner.scan()
+        self.assertIn(self.port, [port for port, _, _ in open_ports])
+        self.assertEqual(scanner.scanned_ports, 11)
+
+    def test_concurrency_capped_by_range(self):
+        scanner = AsyncPortScanner('127.0.0.1', self.port, self.port, concurrency=1000)
+        self.assertEqual(scanner.concurrency, 1)
+
+    def test_iter_results_streams_to_sink(self):
+        class RecordingSink(ScanSink):
+            def __init__(self):
+                self.events = []
+
+            def result(self, result):
+                self.events.append(result)
+
+        for cls in (AsyncPortScanner, PortScanner):
+            sink = RecordingSink()
+            scanner = cls('127.0.0.1', self.port - 2, self.port + 2, sink=sink)
+            results = list(scanner.iter_results())
+            self.assertEqual([result.port for result in results], [self.port])
+            self.assertEqual(sink.events, results)
+            self.assertEqual(scanner.open_ports[0][0], self.port)
+
+    def test_explicit_port_list(self):
+        scanner = AsyncPortScanner('127.0.0.1', ports=[self.port, 1, self.port],
+                                   sink=NullSink())
+        self.assertEqual(scanner.total_ports, 2)
+        self.assertEqual([port for port, _, _ in scanner.scan()], [self.port])
+
+    def test_top_ports(self):
+        self.assertEqual(top_ports(3), [80, 23, 443])
+        self.assertEqual(len(set(top_ports(2000))), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
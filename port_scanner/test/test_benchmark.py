@@ -0,0 +1,84 @@
+import socket
+import unittest
+from scanner.async_scanner import AsyncPortScanner
+from scanner.benchmark import (ListenerFleet, accuracy, probe_latency, run_engine, ACCEPT, REFUSE,
+                               BLACKHOLE, LATENCY_BUCKETS)
+from scanner.metrics import ScanMetrics
+from scanner.timing import OPEN, CLOSED, TIMEOUT
+
+
+def connect(host, port, timeout=0.3):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        return sock.connect_ex((host, port))
+    except socket.timeout:
+        return None
+    finally:
+        sock.close()
+
+
+class TestListenerFleet(unittest.TestCase):
+    def test_ports_answer_by_kind(self):
+        with ListenerFleet(hosts=2, ports=range(21000, 21060), open_ratio=0.3,
+                           blackhole_ratio=0.1, seed=1) as fleet:
+            self.assertEqual(len(fleet.kinds) + fleet.skipped, 120)
+            for kind in (ACCEPT, REFUSE, BLACKHOLE):
+                host, port = next(pair for pair, value in fleet.kinds.items() if value == kind)
+                code = connect(host, port)
+                if kind == ACCEPT:
+                    self.assertEqual(code, 0)
+                elif kind == REFUSE:
+                    self.assertNotIn(code, (0, None))
+                    self.assertNotEqual(code, 11)
+                else:
+                    self.assertIn(code, (None, 11))
+
+    def test_async_engine_is_accurate(self):
+        with ListenerFleet(hosts=1, ports=range(21100, 21200), seed=2) as fleet:
+            result = run_engine('async', fleet, timeout=0.3, concurrency=200)
+        self.assertEqual(result['accuracy'], 1.0)
+        self.assertEqual(result['probes'], 100)
+        self.assertIsNotNone(result['latency_p99'])
+        self.assertGreaterEqual(result['latency_samples'], 100)
+
+    def test_threaded_engine_uses_timeout(self):
+        with ListenerFleet(hosts=1, ports=range(21200, 21220), open_ratio=0.0,
+                           blackhole_ratio=1.0, seed=3) as fleet:
+            result = run_engine('threaded', fleet, timeout=0.2, threads=20)
+        # Black-holed ports cost the given timeout, not the 1 s default
+        self.assertLess(result['latency_p99'], 0.5)
+        self.assertLess(result['duration'], 2.0)
+
+
+class TestBenchmarkHelpers(unittest.TestCase):
+    def test_probe_latency_merges_outcomes(self):
+        metrics = ScanMetrics(LATENCY_BUCKETS)
+        for _ in range(98):
+            metrics.probe_finished(CLOSED, 0.0001)
+        metrics.probe_finished(OPEN, 0.0002)
+        metrics.probe_finished(TIMEOUT, 0.5)
+        latency = probe_latency(metrics)
+        self.assertEqual(latency.count, 100)
+        self.assertLess(latency.quantile(0.5), 0.00015)
+        self.assertGreater(latency.quantile(0.999), 0.3)
+
+    def test_scanner_classes_are_not_patched(self):
+        connect = AsyncPortScanner.connect
+        with ListenerFleet(hosts=1, ports=range(21300, 21310), seed=4) as fleet:
+            run_engine('async', fleet, timeout=0.3)
+        self.assertIs(AsyncPortScanner.connect, connect)
+
+    def test_accuracy_counts_only_fleet_ports(self):
+        fleet = ListenerFleet(hosts=1, ports=())
+        fleet.kinds = {('h', 1): ACCEPT, ('h', 2): REFUSE, ('h', 3): BLACKHOLE}
+        probed = [('h', 1), ('h', 2), ('h', 3), ('h', 4)]
+        scores = accuracy(fleet, probed, {('h', 2), ('h', 4)})
+        self.assertEqual(scores['false_negatives'], 1)
+        self.assertEqual(scores['false_positives'], 1)
+        self.assertEqual(scores['true_negatives'], 1)
+        self.assertAlmostEqual(scores['accuracy'], 1 / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
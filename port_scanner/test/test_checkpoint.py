@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from scanner.async_scanner import AsyncPortScanner
+from scanner.checkpoint import Checkpoint, IntervalSet
+from scanner.sinks import NullSink
+
+
+class TestIntervalSet(unittest.TestCase):
+    def test_out_of_order_values_merge(self):
+        done = IntervalSet()
+        for value in [5, 3, 4, 0, 1, 9, 2]:
+            done.add(value)
+        self.assertEqual(list(done), [(0, 6), (9, 10)])
+        self.assertEqual(len(done), 7)
+        self.assertIn(4, done)
+        self.assertNotIn(7, done)
+
+    def test_gaps(self):
+        done = IntervalSet([(0, 3), (5, 6)])
+        self.assertEqual(list(done.gaps(8)), [3, 4, 6, 7])
+        self.assertEqual(len(IntervalSet([(0, 8)]).gaps(8)), 0)
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_round_trip(self):
+        job = {'kind': 'host', 'target': '127.0.0.1', 'ports': '1-100'}
+        checkpoint = Checkpoint(self.path, job)
+        for index in range(10):
+            checkpoint.mark_done(index)
+        checkpoint.add_finding('127.0.0.1', 22)
+        checkpoint.save()
+
+        restored = Checkpoint.load(self.path, job)
+        self.assertEqual(list(restored.done), [(0, 10)])
+        self.assertEqual(restored.findings, [('127.0.0.1', 22, 'open')])
+        self.assertFalse(restored.complete)
+
+    def test_job_mismatch(self):
+        Checkpoint(self.path, {'kind': 'host', 'target': '127.0.0.1', 'ports': '1-100'}).save()
+        with self.assertRaises(ValueError):
+            Checkpoint.load(self.path, {'kind': 'host', 'target': '127.0.0.1', 'ports': '1-200'})
+
+    def test_resume_skips_done_ports(self):
+        scanner = AsyncPortScanner('127.0.0.1', 1, 50, timeout=0.5, sink=NullSink())
+        checkpoint = Checkpoint(self.path, scanner.job())
+        checkpoint.done.add(0, 40)
+        checkpoint.add_finding('127.0.0.1', 7)
+        scanner.checkpoint = checkpoint
+
+        self.assertEqual([port for _, _, port in scanner.work()], list(range(41, 51)))
+        results = list(scanner.iter_results())
+        self.assertEqual(results[0].port, 7)
+        self.assertEqual(scanner.scanned_ports, 50)
+        self.assertTrue(Checkpoint.load(self.path, scanner.job()).complete)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import socket
+import unittest
+from scanner.discovery import HostDiscovery, icmp_checksum, icmp_echo_request
+
+
+class TestIcmp(unittest.TestCase):
+    def test_echo_request_checksum_verifies(self):
+        message = icmp_echo_request(socket.AF_INET, 7)
+        self.assertEqual(message[0], 8)
+        # A message including its own checksum sums to zero
+        self.assertEqual(icmp_checksum(message), 0)
+
+
+class TestHostDiscovery(unittest.TestCase):
+    def test_refused_connect_counts_as_alive(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        closed_port = listener.getsockname()[1]
+        listener.close()
+
+        discovery = HostDiscovery(ports=[closed_port], timeout=1, icmp=False)
+        self.assertEqual(discovery.discover(['127.0.0.1']), ['127.0.0.1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
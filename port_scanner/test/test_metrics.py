@@ -0,0 +1,76 @@
+import json
+import socket
+import unittest
+import urllib.request
+from scanner.async_scanner import AsyncPortScanner
+from scanner.metrics import Histogram, ScanMetrics, MetricsServer
+from scanner.sinks import NullSink
+
+
+def closed_port():
+    """Find a port with nothing listening on 127.0.0.1"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        histogram = Histogram((0.01, 0.1, 1))
+        for value in (0.005, 0.05, 0.05, 0.5, 5):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 1])
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.0775)
+        self.assertEqual(histogram.quantile(1.0), 1)
+
+        merged = Histogram((0.01, 0.1, 1))
+        merged.merge(histogram.state())
+        self.assertEqual((merged.counts, merged.count), (histogram.counts, 5))
+
+
+class TestScanMetrics(unittest.TestCase):
+    def test_counters_gauges_and_shards(self):
+        metrics = ScanMetrics()
+        metrics.start(10)
+        metrics.probe_started()
+        metrics.probe_started()
+        self.assertEqual(metrics.snapshot()['in_flight'], 2)
+        metrics.probe_finished('closed', 0.002, 111)
+        metrics.probe_finished(None, 0.5)
+        metrics.probe_failed('resource', 24)
+        metrics.item_done()
+
+        worker = ScanMetrics()
+        worker.probe_started()
+        worker.probe_finished('open', 0.001)
+        worker.item_done()
+        metrics.update_shard(0, worker.state())
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['outcomes'], {'closed': 1, 'resource': 1, 'open': 1})
+        self.assertEqual(snapshot['errnos'], {'ECONNREFUSED': 1, 'EMFILE': 1})
+        self.assertEqual((snapshot['completed'], snapshot['pending'], snapshot['in_flight']), (2, 8, 0))
+        text = metrics.prometheus()
+        self.assertIn('portscan_probes_total{outcome="open"} 1', text)
+        self.assertIn('portscan_probe_latency_seconds_bucket{outcome="closed",le="+Inf"} 1', text)
+
+    def test_async_scan_is_instrumented(self):
+        port = closed_port()
+        scanner = AsyncPortScanner('127.0.0.1', port, port, 1, timeout=1, sink=NullSink())
+        server = MetricsServer(scanner.metrics, 0)
+        server.start()
+        try:
+            scanner.scan()
+            url = f'http://127.0.0.1:{server.port}'
+            text = urllib.request.urlopen(f'{url}/metrics').read().decode()
+            snapshot = json.loads(urllib.request.urlopen(f'{url}/metrics.json').read())
+        finally:
+            server.stop()
+        self.assertIn('portscan_probe_errors_total{errno="ECONNREFUSED"} 1', text)
+        self.assertEqual((snapshot['completed'], snapshot['outcomes']), (1, {'closed': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+from scanner.monitor import Monitor, MonitorState, MonitorSink
+from scanner.sweep import parse_targets
+from scanner.work import PortSpace, PortRange
+
+
+class RecordingSink(MonitorSink):
+    def __init__(self):
+        self.changes = []
+        self.reports = []
+
+    def change(self, change, when):
+        self.changes.append((change.host, change.port, change.change))
+
+    def cycle(self, report):
+        self.reports.append(report)
+
+
+def free_ports(count):
+    """Find ports with nothing listening on 127.0.0.1"""
+    sockets = [socket.socket() for _ in range(count)]
+    for sock in sockets:
+        sock.bind(('127.0.0.1', 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+class TestMonitorState(unittest.TestCase):
+    def test_first_rotation_is_silent_and_volatility_decays(self):
+        state = MonitorState(job={})
+        self.assertIsNone(state.update('10.0.0.1', 22, True))
+        self.assertEqual(state.hot_pairs(), [('10.0.0.1', 22)])
+        state.sweeps = 1
+        self.assertEqual(state.update('10.0.0.1', 22, False), 'closed')
+        self.assertEqual(state.update('10.0.0.1', 80, True), 'opened')
+        self.assertEqual(state.hot_pairs(), [('10.0.0.1', 22), ('10.0.0.1', 80)])
+        for _ in range(20):
+            state.update('10.0.0.1', 22, False)
+        self.assertEqual(state.hot_pairs(), [('10.0.0.1', 80)])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.json')
+            state = MonitorState(path, job={'kind': 'monitor'}, seed=5)
+            state.sweeps = 1
+            state.update('10.0.0.1', 443, True)
+            state.cursor = 17
+            state.save()
+            loaded = MonitorState.load(path, {'kind': 'monitor'})
+            self.assertEqual((loaded.seed, loaded.cursor, loaded.open), (5, 17, {'10.0.0.1': {443}}))
+            self.assertEqual(loaded.volatility, {'10.0.0.1': {443: 1.0}})
+            with self.assertRaises(ValueError):
+                MonitorState.load(path, {'kind': 'other'})
+
+
+class TestMonitor(unittest.TestCase):
+    def test_cycles_report_changes(self):
+        ports = free_ports(10)
+        listener = socket.socket()
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(('127.0.0.1', ports[3]))
+        listener.listen(16)
+
+        targets = parse_targets(['127.0.0.1'])
+        space = PortSpace([PortRange(port, port) for port in sorted(ports)])
+        sink = RecordingSink()
+        # Budget of 5 probes per cycle: 1 cold at least, so a rotation takes several cycles
+        monitor = Monitor(targets, space, rate=50, interval=0.1, sinks=[sink], concurrency=10,
+                          timeout=0.5)
+        try:
+            while monitor.state.sweeps == 0:
+                asyncio.run(monitor.run_cycle())
+            self.assertEqual(sink.changes, [])
+            self.assertEqual(monitor.state.open, {'127.0.0.1': {ports[3]}})
+
+            listener.close()
+            asyncio.run(monitor.run_cycle())
+            self.assertEqual(sink.changes, [('127.0.0.1', ports[3], 'closed')])
+            self.assertIn(('127.0.0.1', ports[3]), monitor.state.hot_pairs())
+        finally:
+            listener.close()
+        self.assertGreaterEqual(sum(report.cold for report in sink.reports[:-1]), len(ports))
+
+
+if __name__ == '__main__':
+    unittest.main()
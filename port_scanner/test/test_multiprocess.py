@@ -0,0 +1,36 @@
+import socket
+import unittest
+from scanner.async_scanner import AsyncPortScanner
+from scanner.multiprocess import MultiProcessScanner
+from scanner.sinks import NullSink
+
+
+class TestSharding(unittest.TestCase):
+    def test_shards_cover_the_work_space_once(self):
+        seen = []
+        for index in range(3):
+            scanner = AsyncPortScanner('127.0.0.1', 1, 100, sink=NullSink())
+            scanner.use_shard(index, 3)
+            seen.extend(port for _, _, port in scanner.work())
+        self.assertEqual(sorted(seen), list(range(1, 101)))
+
+
+class TestMultiProcessScanner(unittest.TestCase):
+    def test_results_are_merged(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        try:
+            scanner = AsyncPortScanner('127.0.0.1', port - 20, port + 20, timeout=0.5, sink=NullSink())
+            multi = MultiProcessScanner(scanner, workers=2)
+            open_ports = multi.scan()
+        finally:
+            listener.close()
+
+        self.assertIn(port, [open_port for open_port, _, _ in open_ports])
+        self.assertEqual(multi.scanned_ports, 41)
+
+
+if __name__ == '__main__':
+    unittest.main()
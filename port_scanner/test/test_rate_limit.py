@@ -0,0 +1,107 @@
+import asyncio
+import pickle
+import socket
+import time
+import unittest
+from scanner.async_scanner import AsyncPortScanner
+from scanner.discovery import HostDiscovery
+from scanner.udp_probe import UdpProber
+from scanner.rate_limit import TokenBucket, RateLimiter
+from scanner.sinks import NullSink
+
+
+def closed_port():
+    """Find a port with nothing listening on 127.0.0.1"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class CountingLimiter(RateLimiter):
+    """Unlimited limiter that counts the probes it was asked about"""
+
+    def __init__(self):
+        super().__init__()
+        self.acquired = []
+
+    async def acquire(self, host):
+        self.acquired.append(host)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_even_spacing(self):
+        bucket = TokenBucket(100, 3, now=0.0)
+        delays = [bucket.reserve(0.0) for _ in range(5)]
+        self.assertEqual(delays[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(delays[3], 0.01)
+        self.assertAlmostEqual(delays[4], 0.02)
+
+        # Idle time refills the bucket, but never beyond the burst size
+        self.assertTrue(bucket.full(10.0))
+        self.assertEqual([bucket.reserve(10.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(bucket.reserve(10.0), 0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_per_host_and_global_limits(self):
+        limiter = RateLimiter(rate=1000, burst=10, host_rate=10, host_burst=1)
+        now = time.monotonic()
+        self.assertEqual(limiter.reserve('10.0.0.1', now), 0.0)
+        self.assertAlmostEqual(limiter.reserve('10.0.0.1', now), 0.1)
+        # Another host has its own bucket
+        self.assertEqual(limiter.reserve('10.0.0.2', now), 0.0)
+
+        unlimited = RateLimiter()
+        self.assertFalse(unlimited)
+        self.assertEqual(unlimited.reserve('10.0.0.1'), 0.0)
+
+    def test_split_and_pickle(self):
+        limiter = RateLimiter(rate=1000, burst=40, host_rate=10)
+        share = pickle.loads(pickle.dumps(limiter.split(4)))
+        self.assertEqual((share.rate, share.burst, share.host_rate, share.host_burst), (250, 10, 2.5, 1))
+        self.assertEqual(share.reserve('10.0.0.1'), 0.0)
+
+    def test_async_scan_keeps_to_rate(self):
+        port = closed_port()
+        scanner = AsyncPortScanner('127.0.0.1', port, port + 39, concurrency=40, timeout=1, sink=NullSink())
+        scanner.rate_limiter = RateLimiter(rate=200, burst=1)
+        start = time.monotonic()
+        asyncio.run(scanner.scan_async())
+        elapsed = time.monotonic() - start
+        # 40 probes with one token up front: 39 intervals of 5 ms
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertLess(elapsed, 1.0)
+
+    def test_discovery_is_limited(self):
+        limiter = CountingLimiter()
+        discovery = HostDiscovery(ports=[closed_port()], timeout=1, icmp=False, rate_limiter=limiter)
+        self.assertEqual(discovery.discover(['127.0.0.1']), ['127.0.0.1'])
+        self.assertEqual(limiter.acquired, ['127.0.0.1'])
+
+    def test_udp_retransmissions_are_limited(self):
+        # A bound socket that never answers, on a host known to answer
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(('127.0.0.1', 0))
+        port = silent.getsockname()[1]
+        limiter = CountingLimiter()
+        prober = UdpProber(timeout=0.2, retries=2, rate_limiter=limiter)
+
+        async def run():
+            prober.open()
+            try:
+                prober.timing_for('127.0.0.1')[0].on_reply(0.001)
+                return await prober.probe('127.0.0.1', port)
+            finally:
+                prober.close()
+
+        try:
+            self.assertEqual(asyncio.run(run()), 'open|filtered')
+        finally:
+            silent.close()
+        self.assertEqual(len(limiter.acquired), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+from scanner.resolver import DnsCache, Resolver
+from scanner.sinks import NullSink
+from scanner.sweep import ResolvingSweepScanner, parse_targets
+
+
+class FakeResolver(Resolver):
+    """Resolver with a fixed answer table that records its lookups"""
+
+    def __init__(self, answers, **kwargs):
+        super().__init__(**kwargs)
+        self.answers = answers
+        self.calls = []
+
+    def getaddrinfo(self, name):
+        self.calls.append(name)
+        return list(self.answers.get(name, []))
+
+
+class TestDnsCache(unittest.TestCase):
+    def test_ttl_and_negative_ttl(self):
+        cache = DnsCache(ttl=100, negative_ttl=10)
+        cache.put('a.example', ['192.0.2.1'], now=0)
+        cache.put('b.example', [], now=0)
+        self.assertEqual(cache.get('A.example', now=50), ['192.0.2.1'])
+        self.assertEqual(cache.get('b.example', now=5), [])
+        self.assertIsNone(cache.get('b.example', now=20))
+        self.assertIsNone(cache.get('a.example', now=200))
+
+    def test_persists_to_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dns.json')
+            cache = DnsCache(path)
+            cache.put('a.example', ['192.0.2.1', '2001:db8::1'])
+            cache.save()
+            self.assertEqual(DnsCache(path).get('a.example'), ['192.0.2.1', '2001:db8::1'])
+
+
+class TestResolver(unittest.TestCase):
+    def test_resolve_all_uses_cache_and_shares_lookups(self):
+        resolver = FakeResolver({'a.example': ['192.0.2.1', '2001:db8::1']})
+        answers = resolver.resolve_all(['a.example', 'missing.example'])
+        self.assertEqual(answers['a.example'], ['192.0.2.1', '2001:db8::1'])
+        self.assertEqual(answers['missing.example'], [])
+        resolver.resolve_all(['a.example', 'missing.example'])
+        self.assertEqual(len(resolver.calls), 2)
+
+        async def twice():
+            return await asyncio.gather(resolver.resolve_async('c.example'),
+                                        resolver.resolve_async('c.example'))
+
+        resolver.answers['c.example'] = ['192.0.2.3']
+        self.assertEqual(asyncio.run(twice()), [['192.0.2.3'], ['192.0.2.3']])
+        self.assertEqual(resolver.calls.count('c.example'), 1)
+
+    def test_localhost_has_ipv4_first(self):
+        addresses = Resolver().resolve('localhost')
+        self.assertIn('127.0.0.1', addresses)
+        self.assertNotIn(':', addresses[0])
+
+    def test_parse_targets_adds_every_address(self):
+        resolver = FakeResolver({'a.example': ['192.0.2.1', '192.0.2.2']})
+        targets = parse_targets(['a.example, 192.0.2.0/30'], resolver)
+        self.assertEqual(sorted(targets), ['192.0.2.1', '192.0.2.2'])
+        with self.assertRaises(ValueError):
+            parse_targets(['missing.example'], resolver)
+
+
+class TestResolvingSweepScanner(unittest.TestCase):
+    def test_scans_resolved_hosts(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        try:
+            resolver = FakeResolver({'a.example': ['127.0.0.1'], 'b.example': ['127.0.0.1', '127.0.0.3']})
+            scanner = ResolvingSweepScanner(['a.example', 'b.example', 'missing.example'],
+                                            ports=[port], timeout=0.5, sink=NullSink(),
+                                            resolver=resolver)
+            scanner.scan()
+        finally:
+            listener.close()
+
+        self.assertEqual([(host, port) for host, port, _, _ in scanner.open_ports], [('127.0.0.1', port)])
+        self.assertEqual(scanner.total_ports, 2)
+        self.assertEqual(scanner.scanned_ports, 2)
+        self.assertEqual(scanner.unresolved, ['missing.example'])
+        self.assertIn('127.0.0.1 (a.example)', scanner.get_scan_summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import socket
+import unittest
+from scanner.resources import ResourceGovernor, abortive_close, raise_fd_limit
+from scanner.timing import OPEN, ERROR, RESOURCE
+
+
+class TestResourceGovernor(unittest.TestCase):
+    def test_default_limit_within_fd_limit(self):
+        governor = ResourceGovernor()
+        self.assertLessEqual(governor.limit, raise_fd_limit())
+        self.assertGreater(governor.limit, 0)
+
+    def test_budget_shrinks_on_exhaustion_and_grows_back(self):
+        governor = ResourceGovernor(limit=1000, min_budget=16)
+        governor.in_flight = 400
+        governor.exhausted()
+        self.assertEqual(governor.budget, 200)
+        # Failures arriving together count as one event
+        governor.exhausted()
+        self.assertEqual(governor.budget, 200)
+        governor.succeeded()
+        self.assertEqual(governor.budget, 201)
+        self.assertEqual(governor.backoff, 0)
+
+    def test_budget_floor(self):
+        governor = ResourceGovernor(limit=1000, min_budget=16)
+        governor.in_flight = 3
+        governor.exhausted()
+        self.assertEqual(governor.budget, 16)
+
+    def test_run_retries_resource_errors(self):
+        governor = ResourceGovernor(limit=10)
+        outcomes = [RESOURCE, RESOURCE, OPEN]
+
+        async def connect():
+            return outcomes.pop(0)
+
+        self.assertEqual(asyncio.run(governor.run(connect)), OPEN)
+        self.assertEqual(governor.exhausted_count, 2)
+        self.assertEqual(governor.in_flight, 0)
+
+    def test_run_gives_up_as_error(self):
+        governor = ResourceGovernor(limit=10)
+        governor.exhausted = lambda: 0
+
+        async def connect():
+            return RESOURCE
+
+        self.assertEqual(asyncio.run(governor.run(connect)), ERROR)
+
+    def test_in_flight_capped_by_budget(self):
+        governor = ResourceGovernor(limit=4, min_budget=1)
+
+        async def connect():
+            await asyncio.sleep(0.001)
+            return OPEN
+
+        async def main():
+            await asyncio.gather(*(governor.run(connect) for _ in range(50)))
+
+        asyncio.run(main())
+        self.assertEqual(governor.peak, 4)
+
+
+class TestAbortiveClose(unittest.TestCase):
+    def test_closes_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        abortive_close(sock)
+        self.assertEqual(sock.fileno(), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from scanner.result_store import PortBitmap, ResultStore, PortChange, StoreSink
+from scanner.timing import OPEN, CLOSED
+
+
+class TestPortBitmap(unittest.TestCase):
+    def test_set_operations(self):
+        bitmap = PortBitmap([0, 22, 80, 65535])
+        bitmap.discard(80)
+        self.assertEqual(list(bitmap), [0, 22, 65535])
+        self.assertEqual(len(bitmap), 3)
+        self.assertIn(65535, bitmap)
+        self.assertNotIn(80, bitmap)
+        self.assertEqual(PortBitmap.from_int(bitmap.to_int()), bitmap)
+
+
+class TestResultStore(unittest.TestCase):
+    def test_states_and_interned_services(self):
+        store = ResultStore(range(1, 1025))
+        store.add('10.0.0.1', 22, OPEN, 'OpenSSH')
+        store.add('10.0.0.2', 22, OPEN, 'OpenSSH')
+        store.add('10.0.0.1', 80, CLOSED)
+        store.add('10.0.0.1', 80, OPEN)
+        self.assertEqual(store.services, ['OpenSSH'])
+        self.assertEqual(list(store.ports_for('10.0.0.1')), [22, 80])
+        self.assertEqual(list(store.ports_for('10.0.0.1', CLOSED)), [])
+        self.assertEqual(store.results('10.0.0.2')[0][:2], (22, 'OpenSSH'))
+
+    def test_save_load_and_diff(self):
+        old = ResultStore(range(1, 1025), scope=['10.0.0.0/24'])
+        old.add('10.0.0.1', 22)
+        old.add('10.0.0.1', 23)
+        old.add('10.0.0.9', 80, service='nginx')
+
+        new = ResultStore(range(1, 2049), scope=['10.0.0.0/24'])
+        new.add('10.0.0.1', 22)
+        new.add('10.0.0.1', 443)
+        new.add('10.0.0.1', 2000)
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            old.save(path)
+            old = ResultStore.load(path)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(old.diff(new), [
+            PortChange('10.0.0.1', 23, 'closed', 'Telnet'),
+            PortChange('10.0.0.1', 443, 'opened', 'HTTPS'),
+            PortChange('10.0.0.9', 80, 'closed', 'nginx'),
+        ])
+
+    def test_diff_ignores_hosts_outside_either_scope(self):
+        old = ResultStore(scope=['10.0.0.1'])
+        old.add('10.0.0.1', 22)
+        new = ResultStore(scope=['10.0.0.2'])
+        new.add('10.0.0.2', 22)
+        self.assertEqual(old.diff(new), [])
+
+    def test_diff_reports_host_that_went_down(self):
+        old = ResultStore(range(1, 1025), scope=['10.0.0.1/32', '10.0.0.2/32'])
+        old.add('10.0.0.2', 22, OPEN, 'ssh')
+        new = ResultStore(range(1, 1025), scope=['10.0.0.1/32', '10.0.0.2/32'])
+        self.assertEqual(old.diff(new), [PortChange('10.0.0.2', 22, 'closed', 'ssh')])
+
+
+class LiveHostScanner:
+    """Stands in for a sweep that only probes the hosts discovery found up"""
+
+    ports = range(1, 1025)
+
+    def __init__(self, live):
+        self.live = live
+
+    def scope(self):
+        return self.live
+
+
+class TestStoreSink(unittest.TestCase):
+    def test_scope_keeps_requested_networks(self):
+        sink = StoreSink(scope=['10.0.0.0/30'])
+        scanner = LiveHostScanner(['10.0.0.1/32', '192.0.2.7/32'])
+        sink.start(scanner)
+        sink.finish(scanner, 0.0)
+        # Live hosts inside the requested block add nothing; resolved ones widen the scope
+        self.assertEqual(sink.store.scope, ['10.0.0.0/30', '192.0.2.7/32'])
+        self.assertTrue(sink.store.covers('10.0.0.2'))
+
+    def test_host_that_went_down_reports_closed_ports(self):
+        requested = ['10.0.0.1/32', '10.0.0.2/32']
+        old = ResultStore(range(1, 1025), scope=requested)
+        old.add('10.0.0.2', 22, OPEN, 'ssh')
+        # 10.0.0.2 is down on the second run, so only 10.0.0.1 is scanned
+        sink = StoreSink(scope=requested)
+        scanner = LiveHostScanner(['10.0.0.1/32'])
+        sink.start(scanner)
+        sink.finish(scanner, 0.0)
+        self.assertEqual(old.diff(sink.store), [PortChange('10.0.0.2', 22, 'closed', 'ssh')])
+
+
+if __name__ == '__main__':
+    unittest.main()
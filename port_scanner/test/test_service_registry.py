@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from scanner.service_identifier import identify_service, get_service_description, get_security_info
+from scanner.service_registry import (ServiceRegistry, ServiceEntry, build_index, merge_entries, parse_iana_csv,
+                                      write_source, parse_source, HEADER, TABLE_SIZE)
+
+
+class TestServiceRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, 'services.txt')
+        self.index = os.path.join(self.directory.name, 'services.idx')
+        with open(self.source, 'w', encoding='utf-8') as handle:
+            handle.write("# comment\n"
+                         "22/tcp\tSSH\tSecure Shell\n"
+                         "53/udp\tDNS\tDomain Name System\tDNS - Open resolvers amplify\n"
+                         "65535/tcp\tLast\n")
+        self.registry = ServiceRegistry(self.source, self.index, base=None)
+
+    def tearDown(self):
+        self.registry.close()
+        self.directory.cleanup()
+
+    def test_lazy_build_and_lookup(self):
+        self.assertFalse(os.path.exists(self.index))
+        self.assertEqual(self.registry.entry(22), ServiceEntry('SSH', 'Secure Shell', '', 5))
+        self.assertTrue(os.path.exists(self.index))
+        self.assertEqual(self.registry.risk(53, 'udp'), 'DNS - Open resolvers amplify')
+        self.assertEqual(self.registry.name(53), '')
+        self.assertEqual(self.registry.name(65535), 'Last')
+        self.assertEqual(self.registry.entry(40000), ServiceEntry('', '', '', None))
+        self.assertEqual(self.registry.rank(80), 1)
+
+    def test_rebuilds_stale_index(self):
+        self.registry.name(22)
+        self.registry.close()
+        with open(self.source, 'a', encoding='utf-8') as handle:
+            handle.write("2222/tcp\tAlt SSH\n")
+        os.utime(self.index, (0, 0))
+        self.assertEqual(self.registry.name(2222), 'Alt SSH')
+
+    def test_curated_entries_layer_over_base(self):
+        base = os.path.join(self.directory.name, 'iana-services.txt')
+        write_source({(22, 'tcp'): ('ssh', 'The Secure Shell (SSH) Protocol', ''),
+                      (9418, 'tcp'): ('git', 'git pack transfer service', '')}, base)
+        registry = ServiceRegistry(self.source, os.path.join(self.directory.name, 'layered.idx'), base)
+        try:
+            self.assertEqual(registry.entry(22), ServiceEntry('SSH', 'Secure Shell', '', 5))
+            self.assertEqual(registry.name(9418), 'git')
+            self.assertEqual(registry.name(65535), 'Last')
+        finally:
+            registry.close()
+
+    def test_merge_keeps_base_fields_the_overlay_leaves_empty(self):
+        merged = merge_entries({(873, 'tcp'): ('rsync', 'rsync', '')}, {(873, 'tcp'): ('Rsync', '', 'open')})
+        self.assertEqual(merged, {(873, 'tcp'): ('Rsync', 'rsync', 'open')})
+
+    def test_parse_iana_csv(self):
+        path = os.path.join(self.directory.name, 'iana.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as handle:
+            handle.write('Service Name,Port Number,Transport Protocol,Description,Assignee\n'
+                         'http,80,tcp,World Wide Web HTTP,\n'
+                         'www,80,tcp,World Wide Web HTTP,\n'
+                         'x11,6000-6002,tcp,"X Window\nSystem",\n'
+                         ',6100,udp,Unassigned,\n'
+                         'sctp-only,9902,sctp,,\n'
+                         'name-only,,,,\n')
+        entries = parse_iana_csv(path)
+        self.assertEqual(entries[(80, 'tcp')], ('http', 'World Wide Web HTTP', ''))
+        self.assertEqual(entries[(6002, 'tcp')], ('x11', 'X Window System', ''))
+        self.assertEqual(len(entries), 4)
+        # Round trip through the services.txt format
+        write_source(entries, self.source)
+        self.assertEqual(parse_source(self.source), entries)
+
+    def test_index_layout(self):
+        data = build_index({(7, 'udp'): ('echo', '', '')}, {'tcp': [], 'udp': []})
+        self.assertEqual(len(data) // 1024, (HEADER.size + 2 * TABLE_SIZE) // 1024)
+        self.assertEqual(data[HEADER.size + TABLE_SIZE + 7 * 8:HEADER.size + TABLE_SIZE + 7 * 8 + 2], b'\x01\x00')
+
+
+class TestServiceIdentifier(unittest.TestCase):
+    def test_bundled_registry(self):
+        self.assertEqual(identify_service(445), 'Microsoft DS')
+        self.assertEqual(identify_service(161, 'udp'), 'SNMP')
+        self.assertEqual(identify_service(50000), 'Unknown Service')
+        self.assertEqual(get_service_description(22), 'SSH - Secure Shell - Encrypted remote login protocol')
+        self.assertEqual(get_security_info(23), '⚠️  Telnet - Unencrypted, high security risk')
+        self.assertEqual(get_security_info(80), '')
+
+    def test_bundled_registry_covers_uncommon_registered_ports(self):
+        registered = {(1812, 'udp'): 'RADIUS', (4369, 'tcp'): 'epmd', (6653, 'tcp'): 'openflow',
+                      (9418, 'tcp'): 'git', (40000, 'tcp'): 'safetynetp', (48653, 'tcp'): 'robotraconteur',
+                      (7, 'udp'): 'Echo', (5, 'tcp'): 'rje', (44818, 'udp'): 'EtherNet-IP-2'}
+        for (port, protocol), name in registered.items():
+            self.assertEqual(identify_service(port, protocol).lower(), name.lower(), (port, protocol))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from scanner.sweep import TargetSet, parse_targets, interleaved_pairs
+
+
+class TestTargets(unittest.TestCase):
+    def test_cidr_skips_network_and_broadcast(self):
+        targets = parse_targets(['192.168.1.0/30'])
+        self.assertEqual(list(targets), ['192.168.1.1', '192.168.1.2'])
+
+    def test_nested_blocks_are_dropped(self):
+        targets = parse_targets(['10.0.0.5, 10.0.0.0/24', '10.0.0.0/25'])
+        self.assertEqual(len(targets), 254)
+        self.assertEqual(targets[-1], '10.0.0.254')
+
+    def test_invalid_target(self):
+        with self.assertRaises(ValueError):
+            parse_targets(['10.0.0.0/33'])
+
+
+class TestInterleavedPairs(unittest.TestCase):
+    def test_every_pair_once(self):
+        targets = parse_targets(['10.0.0.0/29'])
+        pairs = list(interleaved_pairs(targets, range(20, 30), seed=7))
+        self.assertEqual(len(pairs), 60)
+        self.assertEqual(len(set(pairs)), 60)
+
+    def test_consecutive_probes_hit_different_hosts(self):
+        targets = parse_targets(['10.0.0.0/28'])
+        pairs = list(interleaved_pairs(targets, range(1, 100), seed=3))
+        for (host_a, _), (host_b, _) in zip(pairs, pairs[1:]):
+            self.assertNotEqual(host_a, host_b)
+
+    def test_empty_targets(self):
+        self.assertEqual(list(interleaved_pairs(TargetSet([]), range(1, 10))), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
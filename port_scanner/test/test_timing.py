@@ -0,0 +1,56 @@
+import errno
+import unittest
+from scanner.timing import HostTiming, classify_connect_result, OPEN, CLOSED, TIMEOUT, RESOURCE
+
+
+class TestHostTiming(unittest.TestCase):
+    def test_initial_timeout_until_first_reply(self):
+        timing = HostTiming(100, initial_timeout=1)
+        self.assertFalse(timing.has_samples)
+        self.assertEqual(timing.timeout(), 1)
+
+    def test_timeout_tracks_rtt(self):
+        timing = HostTiming(100, initial_timeout=1, min_timeout=0.01, max_timeout=3)
+        for _ in range(50):
+            timing.on_reply(0.02)
+        self.assertAlmostEqual(timing.timeout(), 0.02, places=2)
+        self.assertAlmostEqual(timing.timeout(attempt=1), 2 * timing.timeout())
+
+    def test_timeout_clamped(self):
+        timing = HostTiming(100, min_timeout=0.05, max_timeout=3)
+        timing.on_reply(0.0001)
+        self.assertEqual(timing.timeout(), 0.05)
+        timing.on_reply(10)
+        self.assertEqual(timing.timeout(), 3)
+
+    def test_window_shrinks_on_spike_and_grows_on_replies(self):
+        timing = HostTiming(64, min_window=4)
+        for _ in range(100):
+            timing.on_reply(0.01)
+        for now in range(10):
+            timing.on_timeout(now=float(now))
+        shrunk = timing.window
+        self.assertLess(shrunk, 64)
+        self.assertGreaterEqual(shrunk, 4)
+        for _ in range(20):
+            timing.on_reply(0.01)
+        self.assertGreater(timing.window, shrunk)
+
+    def test_steady_timeouts_do_not_collapse_window(self):
+        timing = HostTiming(64)
+        for now in range(1000):
+            timing.on_timeout(now=now * 0.001)
+        self.assertGreaterEqual(timing.window, 32)
+
+
+class TestClassifyConnectResult(unittest.TestCase):
+    def test_codes(self):
+        self.assertEqual(classify_connect_result(0), OPEN)
+        self.assertEqual(classify_connect_result(errno.ECONNREFUSED), CLOSED)
+        self.assertEqual(classify_connect_result(errno.EAGAIN), TIMEOUT)
+        self.assertEqual(classify_connect_result(errno.EMFILE), RESOURCE)
+        self.assertEqual(classify_connect_result(errno.EADDRNOTAVAIL), RESOURCE)
+
+
+if __name__ == '__main__':
+    unittest.main()
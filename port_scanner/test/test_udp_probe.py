@@ -0,0 +1,68 @@
+import socket
+import sys
+import threading
+import unittest
+from scanner.async_scanner import AsyncPortScanner
+from scanner.sinks import NullSink
+from scanner.timing import OPEN, CLOSED, FILTERED, OPEN_FILTERED
+from scanner.udp_probe import (UdpPacer, classify_icmp_error, udp_payload,
+                               SO_EE_ORIGIN_ICMP, SO_EE_ORIGIN_ICMP6)
+
+
+class TestUdpHelpers(unittest.TestCase):
+    def test_payloads(self):
+        self.assertIn(b'version', udp_payload(53))
+        self.assertEqual(len(udp_payload(123)), 48)
+        self.assertEqual(udp_payload(40000), b'')
+
+    def test_classify_icmp_error(self):
+        self.assertEqual(classify_icmp_error(SO_EE_ORIGIN_ICMP, 3, 3), CLOSED)
+        self.assertEqual(classify_icmp_error(SO_EE_ORIGIN_ICMP, 3, 13), FILTERED)
+        self.assertEqual(classify_icmp_error(SO_EE_ORIGIN_ICMP6, 1, 4), CLOSED)
+        self.assertIsNone(classify_icmp_error(SO_EE_ORIGIN_ICMP, 11, 0))
+
+    def test_pacer_slows_down_once_per_period(self):
+        pacer = UdpPacer(max_rate=100, min_rate=10)
+        pacer.on_silence(0.0, 1.0)
+        pacer.on_silence(0.5, 1.0)
+        self.assertEqual(pacer.rate, 50)
+        self.assertAlmostEqual(pacer.reserve(0.0), 0.0)
+        self.assertAlmostEqual(pacer.reserve(0.0), 0.02)
+
+
+class TestUdpScan(unittest.TestCase):
+    def test_reply_open_and_silence_open_filtered(self):
+        replying = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        replying.bind(('127.0.0.1', 0))
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(('127.0.0.1', 0))
+
+        def serve():
+            data, address = replying.recvfrom(512)
+            replying.sendto(b'pong', address)
+        threading.Thread(target=serve, daemon=True).start()
+
+        ports = [replying.getsockname()[1], silent.getsockname()[1]]
+        scanner = AsyncPortScanner('127.0.0.1', ports=ports, timeout=0.3, sink=NullSink(),
+                                   protocol='udp')
+        states = {result.port: result.state for result in scanner.iter_results()}
+        replying.close()
+        silent.close()
+
+        self.assertEqual(states[ports[0]], OPEN)
+        self.assertEqual(states[ports[1]], OPEN_FILTERED)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "ICMP errors are read via IP_RECVERR")
+    def test_closed_port_is_not_reported(self):
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(('127.0.0.1', 0))
+        closed_port = probe.getsockname()[1]
+        probe.close()
+
+        scanner = AsyncPortScanner('127.0.0.1', ports=[closed_port], timeout=1, sink=NullSink(),
+                                   protocol='udp')
+        self.assertEqual(list(scanner.iter_results()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
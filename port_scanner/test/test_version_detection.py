@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from scanner.service_identifier import identify_service
+from scanner.version_detection import ProbeCache, ServiceDetector, ServiceMatch, match_banner
+
+
+class TestMatchBanner(unittest.TestCase):
+    def test_ssh(self):
+        self.assertEqual(match_banner(b'SSH-2.0-OpenSSH_8.9p1 Ubuntu-3\r\n'),
+                         ('ssh', 'OpenSSH_8.9p1 Ubuntu-3'))
+
+    def test_http_server_header(self):
+        reply = b'HTTP/1.1 200 OK\r\nDate: today\r\nServer: nginx/1.24.0\r\n\r\n'
+        self.assertEqual(match_banner(reply), ('http', 'nginx/1.24.0'))
+
+    def test_smtp_before_generic_220(self):
+        self.assertEqual(match_banner(b'220 mail.example.com ESMTP Postfix\r\n'),
+                         ('smtp', 'mail.example.com ESMTP Postfix'))
+
+    def test_unknown(self):
+        self.assertIsNone(match_banner(b'\x00\x01garbage'))
+
+    def test_ftp_needs_ftp_in_greeting(self):
+        self.assertEqual(match_banner(b'220 ProFTPD 1.3.8 Server ready\r\n'), ('ftp', 'ProFTPD 1.3.8 Server ready'))
+        # A bare 220 greeting names no protocol
+        self.assertIsNone(match_banner(b'220 Welcome\r\n'))
+
+    def test_ftp_before_smtp(self):
+        # Greetings naming both are FTP servers that mention mail, not SMTP servers
+        self.assertEqual(match_banner(b'220 FTP server (Sendmail host) ready\r\n')[0], 'ftp')
+
+    def test_http_server_header_before_bare_status(self):
+        self.assertEqual(match_banner(b'HTTP/1.0 404 Not Found\r\nServer: Apache\r\n\r\n'), ('http', 'Apache'))
+        self.assertEqual(match_banner(b'HTTP/1.0 404 Not Found\r\n\r\n'), ('http', None))
+
+    def test_rtsp_server_header_before_bare_status(self):
+        self.assertEqual(match_banner(b'RTSP/1.0 200 OK\r\nServer: GStreamer\r\n\r\n'), ('rtsp', 'GStreamer'))
+        self.assertEqual(match_banner(b'RTSP/1.0 200 OK\r\n\r\n'), ('rtsp', None))
+
+    def test_mysql_version_before_host_blocked(self):
+        self.assertEqual(match_banner(b'J\x00\x00\x00\x0a8.0.36\x00'), ('mysql', '8.0.36'))
+        self.assertEqual(match_banner(b'E\x00\x00\x00\xffj\x04Host is blocked'), ('mysql', None))
+
+
+class TestServiceDetector(unittest.TestCase):
+    def test_unmatched_greeting_reports_port_service(self):
+        async def run():
+            async def greet(reader, writer):
+                writer.write(b'220 Welcome\r\n')
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(greet, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return port, await ServiceDetector(timeout=1.0).detect('127.0.0.1', port)
+
+        port, match = asyncio.run(run())
+        self.assertEqual(match, ServiceMatch('127.0.0.1', port, identify_service(port), None, False, '220 Welcome..'))
+
+
+class TestProbeCache(unittest.TestCase):
+    def test_entries_expire(self):
+        cache = ProbeCache(ttl=60)
+        match = ServiceMatch('10.0.0.1', 22, 'ssh', 'OpenSSH_9.6', False, 'SSH-2.0-OpenSSH_9.6')
+        cache.put(match, now=1000)
+        self.assertEqual(cache.get('10.0.0.1', 22, now=1030), match)
+        self.assertIsNone(cache.get('10.0.0.1', 22, now=1061))
+        self.assertIsNone(cache.get('10.0.0.1', 80, now=1030))
+
+
+if __name__ == '__main__':
+    unittest.main()
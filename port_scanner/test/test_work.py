@@ -0,0 +1,52 @@
+import threading
+import unittest
+from scanner.work import PortRange, PortSpace, WorkSource, ranges_from_ports
+
+
+class TestPortSpace(unittest.TestCase):
+    def test_indexing_across_ranges(self):
+        ports = PortSpace([PortRange(20, 22), PortRange(80, 80), PortRange(443, 444)])
+        self.assertEqual(len(ports), 6)
+        self.assertEqual([ports[i] for i in range(6)], [20, 21, 22, 80, 443, 444])
+        self.assertEqual(list(ports), [20, 21, 22, 80, 443, 444])
+        self.assertEqual(str(ports), '20-22,80,443-444')
+
+    def test_ranges_from_ports(self):
+        self.assertEqual(ranges_from_ports([443, 22, 21, 80, 23, 22]),
+                         [PortRange(21, 23), PortRange(80, 80), PortRange(443, 443)])
+
+
+class TestWorkSource(unittest.TestCase):
+    def test_full_range_is_lazy(self):
+        source = WorkSource(65535 * 65536)
+        self.assertEqual(source.next_chunk(), range(0, 1))
+
+    def test_shards_partition_the_space(self):
+        seen = []
+        for shard in range(3):
+            source = WorkSource(100, chunk_size=7, shard=shard, shards=3)
+            indices = list(source)
+            self.assertEqual(len(indices), len(source))
+            seen.extend(indices)
+        self.assertEqual(sorted(seen), list(range(100)))
+
+    def test_threads_take_each_index_once(self):
+        source = WorkSource(10000, chunk_size=3)
+        taken = []
+        lock = threading.Lock()
+
+        def drain():
+            for index in source:
+                with lock:
+                    taken.append(index)
+
+        threads = [threading.Thread(target=drain) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(taken), list(range(10000)))
+
+
+if __name__ == '__main__':
+    unittest.main()
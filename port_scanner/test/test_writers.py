@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import xml.etree.ElementTree as ElementTree
+from scanner.sinks import ScanResult
+from scanner.work import PortRange, PortSpace
+from scanner.writers import JsonLinesWriter, CsvWriter, XmlWriter, open_writers
+
+
+class FakeScanner:
+    protocol = 'tcp'
+    ports = PortSpace([PortRange(1, 1024)])
+
+
+RESULTS = [
+    ScanResult('192.0.2.1', 22, 'open', 'SSH', 'Secure remote access'),
+    ScanResult('2001:db8::1', 80, 'open', 'HTTP', None),
+]
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_scan(self, writer_class, finish=True):
+        path = os.path.join(self.directory.name, 'out')
+        writer = writer_class(path)
+        writer.start(FakeScanner())
+        for result in RESULTS:
+            writer.result(result)
+        if finish:
+            writer.finish(FakeScanner(), 1.5)
+        writer.close()
+        return path
+
+    def test_jsonl(self):
+        with open(self.run_scan(JsonLinesWriter)) as handle:
+            records = [json.loads(line) for line in handle]
+        self.assertEqual([(r['host'], r['port'], r['service']) for r in records],
+                         [('192.0.2.1', 22, 'SSH'), ('2001:db8::1', 80, 'HTTP')])
+        self.assertEqual(records[1]['security_info'], '')
+
+    def test_csv(self):
+        with open(self.run_scan(CsvWriter), newline='') as handle:
+            rows = list(csv.DictReader(handle))
+        self.assertEqual(rows[0]['security_info'], 'Secure remote access')
+        self.assertEqual(rows[1]['port'], '80')
+
+    def test_xml(self):
+        root = ElementTree.parse(self.run_scan(XmlWriter)).getroot()
+        self.assertEqual(root.tag, 'nmaprun')
+        self.assertEqual(root.find('scaninfo').get('services'), '1-1024')
+        hosts = root.findall('host')
+        self.assertEqual(hosts[1].find('address').get('addrtype'), 'ipv6')
+        self.assertEqual(hosts[0].find('ports/port').get('portid'), '22')
+        self.assertEqual(hosts[0].find('ports/port/service').get('name'), 'ssh')
+        self.assertEqual(root.find('runstats/finished').get('exit'), 'success')
+
+    def test_interrupted_xml_is_well_formed(self):
+        root = ElementTree.parse(self.run_scan(XmlWriter, finish=False)).getroot()
+        self.assertEqual(len(root.findall('host')), 2)
+        self.assertEqual(root.find('runstats/finished').get('exit'), 'error')
+
+    def test_open_writers(self):
+        self.assertIsNone(open_writers({'jsonl': None}))
+        path = os.path.join(self.directory.name, 'a.jsonl')
+        writer = open_writers({'jsonl': path})
+        self.assertIsInstance(writer, JsonLinesWriter)
+        writer.close()
+
+    def test_open_writers_closes_opened_files_on_failure(self):
+        opened = []
+        original = JsonLinesWriter.__init__
+
+        def init(writer, path, **kwargs):
+            original(writer, path, **kwargs)
+            opened.append(writer)
+
+        outputs = {'jsonl': os.path.join(self.directory.name, 'ok.jsonl'),
+                   'xml': os.path.join(self.directory.name, 'missing', 'x.xml')}
+        with mock.patch.object(JsonLinesWriter, '__init__', init):
+            with self.assertRaises(FileNotFoundError):
+                open_writers(outputs)
+        self.assertEqual(len(opened), 1)
+        self.assertTrue(opened[0].handle.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
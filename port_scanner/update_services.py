@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Service Registry Update
+
+Regenerates scanner/data/iana-services.txt from the IANA service name and
+transport protocol port number registry. Download the CSV export from
+https://www.iana.org/assignments/service-names-port-numbers/service-names-port-numbers.csv
+and pass its path. The curated entries in scanner/data/services.txt are
+not touched; they are layered over this file when the index is built.
+"""
+
+import sys
+import os
+import argparse
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scanner.service_registry import REGISTRY_FILE, parse_iana_csv, write_source
+
+HEADER = """\
+# IANA service name and transport protocol port number registry (TCP and UDP)
+#
+# Generated by update_services.py; do not edit. Curated names, descriptions
+# and risk notes go in services.txt, which is layered over this file.
+#
+# One entry per line, tab-separated: port/protocol  name  description
+"""
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Regenerate the bundled port registry from the IANA CSV export"
+    )
+    parser.add_argument('csv', help='service-names-port-numbers.csv from iana.org')
+    parser.add_argument('-o', '--output', default=REGISTRY_FILE,
+                        help=f'Registry file to write (default: {REGISTRY_FILE})')
+
+    args = parser.parse_args()
+
+    entries = parse_iana_csv(args.csv)
+    if not entries:
+        parser.error(f"no TCP or UDP registrations found in {args.csv}")
+    write_source(entries, args.output, HEADER)
+
+    ports = {protocol: sum(1 for _, proto in entries if proto == protocol) for protocol in ('tcp', 'udp')}
+    print(f"Wrote {ports['tcp']} TCP and {ports['udp']} UDP ports to {args.output}")
+
+
+if __name__ == "__main__":
+    main()